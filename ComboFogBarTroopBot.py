@@ -1,24 +1,32 @@
 """
-Combo Bot - Fog Scout + Barbarian Farming + Troop Training (6-activity cycle)
+Combo Bot - Fog Scout + Barbarian Farming + Troop Training (deadline scheduled)
 """
-import io
-import sys
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-
+import logging
 import pyautogui
 import time
 import random
 import threading
 from enum import Enum
+from typing import Optional
 from bot_utils import ensure_assets_directory
+from scheduler import ActivityScheduler, format_status
+from state_store import state_store, scoped
+from sequences import infantry_sequence, archers_sequence, cavalry_sequence, siege_sequence
+from sequences.training_timers import training_timers
+from sequences.barbarian_sequence import MIN_STAMINA
+from sequences.stamina_tracker import get_stamina_tracker
+from sequences.march_tracker import get_march_tracker
 from sequences import (
     execute_fog_scout_sequence, 
     execute_barbarian_farm_sequence,
-    execute_infantry_sequence,
-    execute_archers_sequence,
-    execute_cavalry_sequence,
-    execute_siege_sequence
+    preload_assets
 )
+from bot_log import event, get_logger, register_renderer
+from metrics import record_activity, start_exporter
+from scale_calibration import calibrate_templates
+from tracing import span, export as export_trace
+
+logger = get_logger("ComboFogBarTroopBot")
 
 # Global flag for F12 stop signal
 stop_bot_flag = threading.Event()
@@ -27,14 +35,14 @@ def monitor_f12_key():
     """Monitor for F12 key press to stop the bot"""
     try:
         import keyboard
-        print("F12 key monitoring active - Press F12 to stop the bot", flush=True)
+        logger.info("F12 key monitoring active - Press F12 to stop the bot")
         keyboard.wait('f12')
-        print("F12 pressed - Stopping bot...", flush=True)
+        logger.info("F12 pressed - Stopping bot...")
         stop_bot_flag.set()
     except ImportError:
-        print("keyboard module not available - F12 monitoring disabled", flush=True)
+        logger.info("keyboard module not available - F12 monitoring disabled")
     except Exception as e:
-        print(f"Error in F12 monitoring: {e}", flush=True)
+        logger.error(f"Error in F12 monitoring: {e}")
 
 
 class ActivityType(Enum):
@@ -53,6 +61,15 @@ class Config:
     SCREENSHOT_PAUSE = 0.3
     MIN_DELAY = 1.3
     MAX_DELAY = 1.5
+    # Seconds until an activity is worth running again
+    SCOUT_RETURN = 180  # Scout sent, out exploring
+    SCOUT_BUSY_RECHECK = 120  # No idle scout at the camp
+    BARBARIAN_MARCH = 90  # Attack march out and back
+    TRAINING_DURATION = 1800  # Fresh batch in training
+    TRAINING_BUSY_RECHECK = 600  # Queue still training, countdown unreadable
+    TRAINING_DONE_MARGIN = 15  # Seconds after the OCR'd countdown ends
+    FAILED_RETRY = 60  # Anything that failed for another reason
+    STATE_KEY = "combo_fog_bar_troop/scheduler"  # Deadlines and counters kept across restarts
     
     @staticmethod
     def get_random_delay():
@@ -60,176 +77,204 @@ class Config:
         return random.uniform(Config.MIN_DELAY, Config.MAX_DELAY)
 
 
-class ActivityTracker:
-    """Track current activity and entry counts"""
-    def __init__(self):
-        self.activities = [
-            ActivityType.FOG_SCOUT,
-            ActivityType.BARBARIAN_FARM,
-            ActivityType.INFANTRY,
-            ActivityType.FOG_SCOUT,
-            ActivityType.BARBARIAN_FARM,
-            ActivityType.ARCHERS,
-            ActivityType.FOG_SCOUT,
-            ActivityType.BARBARIAN_FARM,
-            ActivityType.CAVALRY,
-            ActivityType.FOG_SCOUT,
-            ActivityType.BARBARIAN_FARM,
-            ActivityType.SIEGE
-        ]
-        self.current_index = 0
-        self.activity_counts = {activity: 0 for activity in self.activities}
-        self.total_cycles = 0
-        self.barbarian_recovery_until = 0  # Timestamp when barbarian can resume
-    
-    @property
-    def current_activity(self):
-        """Get current activity"""
-        return self.activities[self.current_index]
-    
-    def get_current_entries(self):
-        """Get current entry count for active activity"""
-        return self.activity_counts[self.current_activity]
-    
-    def increment_current_entries(self):
-        """Increment entry count for current activity"""
-        self.activity_counts[self.current_activity] += 1
-    
-    def should_switch_activity(self):
-        """Always switch after each single cycle"""
-        return True
-    
-    def is_barbarian_recovering(self):
-        """Check if barbarian is in recovery period"""
-        return time.time() < self.barbarian_recovery_until
-    
-    def set_barbarian_recovery(self, minutes=10):
-        """Set barbarian recovery period"""
-        self.barbarian_recovery_until = time.time() + (minutes * 60)
-        print(f"Barbarian stamina low - recovery period set for {minutes} minutes", flush=True)
-    
-    def get_barbarian_recovery_remaining(self):
-        """Get remaining recovery time in minutes"""
-        remaining = self.barbarian_recovery_until - time.time()
-        return max(0, remaining / 60)
-    
-    def switch_activity(self):
-        """Switch to next activity in sequence, considering barbarian recovery"""
-        # If barbarian is recovering, skip it in the rotation
-        if self.is_barbarian_recovering():
-            if self.current_activity == ActivityType.BARBARIAN_FARM:
-                # Skip barbarian, go to next activity
-                self.current_index = (self.current_index + 1) % len(self.activities)
-                # If we ended up back on barbarian, skip it again
-                if self.current_activity == ActivityType.BARBARIAN_FARM:
-                    self.current_index = (self.current_index + 1) % len(self.activities)
-                remaining = self.get_barbarian_recovery_remaining()
-                print(f"Skipping barbarian (recovery: {remaining:.1f} min left)", flush=True)
-            else:
-                # Normal switching for other activities
-                self.current_index = (self.current_index + 1) % len(self.activities)
-                # Skip barbarian if we land on it
-                if self.current_activity == ActivityType.BARBARIAN_FARM and self.is_barbarian_recovering():
-                    self.current_index = (self.current_index + 1) % len(self.activities)
-                    remaining = self.get_barbarian_recovery_remaining()
-                    print(f"Skipping barbarian in rotation (recovery: {remaining:.1f} min left)", flush=True)
-        else:
-            # Normal switching
-            self.current_index = (self.current_index + 1) % len(self.activities)
-            
-            if self.current_index == 0:  # Completed full cycle
-                self.total_cycles += 1
-        
-        activity_names = {
-            ActivityType.FOG_SCOUT: "Trinh Sát Sương Mù",
-            ActivityType.BARBARIAN_FARM: "Farm Barbarian",
-            ActivityType.INFANTRY: "Huấn Luyện Bộ Binh",
-            ActivityType.ARCHERS: "Huấn Luyện Cung Thủ",
-            ActivityType.CAVALRY: "Huấn Luyện Kỵ Binh",
-            ActivityType.SIEGE: "Huấn Luyện Công Thành"
-        }
-        
-        activity_name = activity_names[self.current_activity]
-        print(f"\n★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★", flush=True)
-        print(f"★                   CHUYỂN HOẠT ĐỘNG                    ★", flush=True) 
-        print(f"★              Đã chuyển sang {activity_name:<18} ★", flush=True)
-        print(f"★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★", flush=True)
-    
-    def print_status(self):
-        """Print current status"""
-        activity_names = {
-            ActivityType.FOG_SCOUT: "Trinh Sát Sương Mù",
-            ActivityType.BARBARIAN_FARM: "Farm Barbarian",
-            ActivityType.INFANTRY: "Huấn Luyện Bộ Binh",
-            ActivityType.ARCHERS: "Huấn Luyện Cung Thủ",
-            ActivityType.CAVALRY: "Huấn Luyện Kỵ Binh",
-            ActivityType.SIEGE: "Huấn Luyện Công Thành"
-        }
-        
-        activity_name = activity_names[self.current_activity]
-        print(f"┌─────────────────────────────────────────────────────┐", flush=True)
-        print(f"│  🎯 Hoạt động hiện tại: {activity_name:<20} │", flush=True)
-        print(f"│  🔄 Lần thực hiện: {self.get_current_entries():<25} │", flush=True)
-        print(f"│  ✅ Tổng chu kỳ hoàn thành: {self.total_cycles:<18} │", flush=True)
-        print(f"└─────────────────────────────────────────────────────┘", flush=True)
+ACTIVITY_NAMES = {
+    ActivityType.FOG_SCOUT: "Trinh Sát Sương Mù",
+    ActivityType.BARBARIAN_FARM: "Farm Barbarian",
+    ActivityType.INFANTRY: "Huấn Luyện Bộ Binh",
+    ActivityType.ARCHERS: "Huấn Luyện Cung Thủ",
+    ActivityType.CAVALRY: "Huấn Luyện Kỵ Binh",
+    ActivityType.SIEGE: "Huấn Luyện Công Thành"
+}
 
+TROOP_TRAINING = {
+    ActivityType.INFANTRY: infantry_sequence.TRAINING,
+    ActivityType.ARCHERS: archers_sequence.TRAINING,
+    ActivityType.CAVALRY: cavalry_sequence.TRAINING,
+    ActivityType.SIEGE: siege_sequence.TRAINING
+}
 
-def execute_current_activity(tracker: ActivityTracker) -> str:
-    """Execute the current activity"""
-    current_activity = tracker.current_activity
-    
-    # Skip barbarian if in recovery period
-    if current_activity == ActivityType.BARBARIAN_FARM and tracker.is_barbarian_recovering():
-        remaining = tracker.get_barbarian_recovery_remaining()
-        print(f"Skipping barbarian activity - still recovering ({remaining:.1f} min left)", flush=True)
-        return "SKIPPED"
-    
-    # Execute activity based on type
-    if current_activity == ActivityType.FOG_SCOUT:
+
+def create_scheduler() -> ActivityScheduler:
+    """Scheduler over all activities, ties go fog → barbarian → troops
+
+    Deadlines and counters saved by the previous run are restored.
+    """
+    scheduler = ActivityScheduler(ActivityType)
+    scheduler.restore(state_store.get(scoped(Config.STATE_KEY)))
+    apply_training_timers(scheduler)
+    return scheduler
+
+
+def save_scheduler(scheduler: ActivityScheduler):
+    """Persist deadlines and counters"""
+    state_store.put(scoped(Config.STATE_KEY), scheduler.snapshot())
+
+
+def apply_training_timers(scheduler: ActivityScheduler):
+    """Make troop activities ready right when their queues free up"""
+    for activity in TROOP_TRAINING:
+        remaining = training_timers.remaining(activity.value)
+        if remaining is not None:
+            scheduler.defer(activity, remaining + Config.TRAINING_DONE_MARGIN, "queue timer")
+
+
+def set_barbarian_recovery(scheduler: ActivityScheduler, minutes: Optional[float] = None):
+    """Set barbarian recovery period, by default until stamina is predicted back above the threshold"""
+    if minutes is None:
+        minutes = get_stamina_tracker(MIN_STAMINA).seconds_until_attack() / 60
+    scheduler.defer(ActivityType.BARBARIAN_FARM, minutes * 60, "stamina recovery")
+    logger.info(f"Barbarian stamina low - recovery period set for {minutes:.1f} minutes")
+
+
+RESULT_MESSAGES = {
+    "SUCCESS": "✅ Hoạt động hoàn thành thành công",
+    "STAMINA_LOW": "⚠️  Barbarian stamina low - troops recalled, entering recovery mode",
+    "BUSY": "⏭️  Vẫn bận (hàng đợi huấn luyện / đạo quân), đã hẹn lại"
+}
+
+
+def render_status(fields: dict) -> str:
+    """Status box of a scheduler status event"""
+    lines = [f"┌─────────────────────────────────────────────────────┐",
+             f"│  ✅ Tổng hoạt động đã chạy: {fields['total_runs']:<18} │"]
+    lines += [f"│  {line}" for line in format_status(fields['activities'])]
+    lines.append(f"└─────────────────────────────────────────────────────┘")
+    return "\n".join(lines)
+
+
+def render_cycle(fields: dict) -> str:
+    """Banner of a new cycle"""
+    return (f"\n🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥\n"
+            f"🔥                           CHU KỲ {fields['cycle']:<3}                            🔥\n"
+            f"🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥")
+
+
+def render_activity_start(fields: dict) -> str:
+    """Banner of the activity about to run"""
+    name = ACTIVITY_NAMES.get(ActivityType(fields['activity']), fields['activity'])
+    return (f"\n★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★\n"
+            f"★              Hoạt động: {name:<22} ★\n"
+            f"★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★")
+
+
+def render_activity_result(fields: dict) -> str:
+    """Outcome line of a finished activity"""
+    return RESULT_MESSAGES.get(fields['result'], "❌ Hoạt động thất bại, sẽ thử lại sau")
+
+
+register_renderer("status", render_status)
+register_renderer("cycle", render_cycle)
+register_renderer("activity_start", render_activity_start)
+register_renderer("activity_result", render_activity_result)
+
+
+def print_status(scheduler: ActivityScheduler):
+    """Log next-ready time of every activity"""
+    logger.info(f"{scheduler.total_runs} activities run",
+                extra=event("status", total_runs=scheduler.total_runs, activities=scheduler.status()))
+
+
+def execute_activity(scheduler: ActivityScheduler, activity: ActivityType) -> str:
+    """Execute one activity"""
+    if activity == ActivityType.FOG_SCOUT:
         result = execute_fog_scout_sequence()
         return "SUCCESS" if result else "FAILED"
     
-    elif current_activity == ActivityType.BARBARIAN_FARM:
+    elif activity == ActivityType.BARBARIAN_FARM:
         result = execute_barbarian_farm_sequence(combo_mode=True)
         
         # Handle barbarian-specific results
         if result == "STAMINA_LOW":
-            tracker.set_barbarian_recovery(10)  # 10 minute recovery
-            return "STAMINA_LOW"
-        
+            set_barbarian_recovery(scheduler)
         return result
     
-    elif current_activity == ActivityType.INFANTRY:
-        result = execute_infantry_sequence()
-        return "SUCCESS" if result else "FAILED"
+    elif activity in TROOP_TRAINING:
+        return TROOP_TRAINING[activity].run()
     
-    elif current_activity == ActivityType.ARCHERS:
-        result = execute_archers_sequence()
-        return "SUCCESS" if result else "FAILED"
+    return "FAILED"
+
+
+def schedule_next(scheduler: ActivityScheduler, activity: ActivityType, result: str):
+    """Push the activity's deadline out according to how it ended"""
+    if activity == ActivityType.FOG_SCOUT:
+        # Fog only fails early when no scout is idle
+        if result == "SUCCESS":
+            scheduler.defer(activity, Config.SCOUT_RETURN, "scout exploring")
+        else:
+            scheduler.defer(activity, Config.SCOUT_BUSY_RECHECK, "no idle scout")
+    elif activity == ActivityType.BARBARIAN_FARM:
+        if result == "SUCCESS":
+            scheduler.defer(activity, Config.BARBARIAN_MARCH, "march out")
+        elif result == "BUSY":
+            wait = get_march_tracker().seconds_until_free() or Config.FAILED_RETRY
+            scheduler.defer(activity, wait, "march slots busy")
+        elif result != "STAMINA_LOW":  # Recovery deadline already set
+            scheduler.defer(activity, Config.FAILED_RETRY, "retry")
+    else:
+        if result == "SUCCESS":
+            scheduler.defer(activity, Config.TRAINING_DURATION, "training")
+        elif result == "BUSY":
+            scheduler.defer(activity, Config.TRAINING_BUSY_RECHECK, "queue busy")
+        else:
+            scheduler.defer(activity, Config.FAILED_RETRY, "retry")
+        # One busy check reads every visible queue timer, exact times win over estimates
+        apply_training_timers(scheduler)
+
+
+def run_cycle(scheduler: ActivityScheduler, stop_flag: Optional[threading.Event] = None) -> Optional[str]:
+    """Wait for the activity that is ready soonest, run it and reschedule it
+
+    Returns None when stopped while waiting.
+    """
+    activity = scheduler.wait_for_next(stop_flag)
+    if activity is None:
+        return None
     
-    elif current_activity == ActivityType.CAVALRY:
-        result = execute_cavalry_sequence()
-        return "SUCCESS" if result else "FAILED"
+    with span("cycle", "cycle", activity=activity.value):
+        result = run_activity(scheduler, activity)
+    export_trace(activity.value)  # No-op unless tracing is enabled
+    return result
+
+
+def run_activity(scheduler: ActivityScheduler, activity: ActivityType) -> str:
+    """Run one ready activity, reschedule it and pause before the next"""
+    logger.info(f"Starting {activity.value}", extra=event("activity_start", activity=activity.value))
+    scheduler.record_run(activity)
+    with span(activity.value, "activity"):
+        result = execute_activity(scheduler, activity)
+    schedule_next(scheduler, activity, result)
+    record_activity(activity.value, result)
+    if result == "SUCCESS":
+        scheduler.record_success(activity)
+    save_scheduler(scheduler)
     
-    elif current_activity == ActivityType.SIEGE:
-        result = execute_siege_sequence()
-        return "SUCCESS" if result else "FAILED"
+    level = logging.INFO if result in ("SUCCESS", "BUSY") else logging.WARNING
+    logger.log(level, f"{activity.value} finished: {result}",
+               extra=event("activity_result", activity=activity.value, result=result,
+                           ready_in=round(scheduler.ready_in(activity), 1)))
     
-    return "FAILED"
+    # Random delay after activity execution
+    delay = Config.get_random_delay()
+    logger.info(f"Chờ {delay:.1f}s sau khi hoàn thành hoạt động...")
+    time.sleep(delay)
+    
+    return result
 
 
 def main():
     """Main execution of combo bot"""
-    print(f"RoK Combo Bot (Fog + Barbarian + Troop Training) bắt đầu sau {Config.STARTUP_DELAY} giây...")
-    print("Cấu hình: Fog → Barbarian → Infantry → Archers → Cavalry → Siege → Lặp lại")
-    print("🔴 Press F12 anytime to stop the bot")
+    logger.info(f"RoK Combo Bot (Fog + Barbarian + Troop Training) bắt đầu sau {Config.STARTUP_DELAY} giây...")
+    logger.info("Cấu hình: hoạt động nào sẵn sàng sớm nhất sẽ chạy trước (Fog, Barbarian, Infantry, Archers, Cavalry, Siege)")
+    logger.info("🔴 Press F12 anytime to stop the bot")
     time.sleep(Config.STARTUP_DELAY)
     
     # Configure PyAutoGUI
     pyautogui.FAILSAFE = True
     pyautogui.PAUSE = Config.SCREENSHOT_PAUSE
+    calibrate_templates()  # Assets were captured at one UI scale
     
-    tracker = ActivityTracker()
+    scheduler = create_scheduler()
+    start_exporter()
     
     # Start F12 key monitoring in a separate thread
     f12_thread = threading.Thread(target=monitor_f12_key, daemon=True)
@@ -239,57 +284,23 @@ def main():
         while True:
             # Check if F12 was pressed
             if stop_bot_flag.is_set():
-                print("🛑 Bot stopped by F12 key press", flush=True)
+                logger.info("🛑 Bot stopped by F12 key press")
                 break
-            print(f"\n🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥", flush=True)
-            print(f"🔥                           CHU KỲ {tracker.get_current_entries() + 1:<3}                            🔥", flush=True)
-            print(f"🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥", flush=True)
-            tracker.print_status()
-            
-            # Execute current activity
-            result = execute_current_activity(tracker)
-            
-            # Random delay after activity execution
-            delay = Config.get_random_delay()
-            print(f"Chờ {delay:.1f}s sau khi hoàn thành hoạt động...", flush=True)
-            time.sleep(delay)
-            
-            # Handle different result types
-            if result == "SUCCESS":
-                tracker.increment_current_entries()
-                print(f"✅ Hoạt động hoàn thành thành công", flush=True)
-            elif result == "STAMINA_LOW":
-                tracker.increment_current_entries()
-                print(f"⚠️  Barbarian stamina low - troops recalled, entering recovery mode", flush=True)
-            elif result == "SKIPPED":
-                # Don't increment for skipped activities
-                print(f"⏭️  Hoạt động đã bỏ qua do đang phục hồi", flush=True)
-            else:
-                print("❌ Hoạt động thất bại, sẽ thử lại sau khi chuyển nếu cần", flush=True)
-                tracker.increment_current_entries()
+            logger.info(f"Cycle {scheduler.total_runs + 1}", extra=event("cycle", cycle=scheduler.total_runs + 1))
+            print_status(scheduler)
             
-            # Switch activity after each cycle
-            if tracker.should_switch_activity():
-                print(f"\n⚡⚡⚡ ĐANG CHUYỂN ĐỔII HOẠT ĐỘNG SAU 1 CHU KỲ ⚡⚡⚡", flush=True)
-                tracker.switch_activity()
-                
-                # Random delay before starting next activity
-                switch_delay = Config.get_random_delay()
-                print(f"⏰ Chờ {switch_delay:.1f}s trước khi bắt đầu hoạt động tiếp theo...", flush=True)
-                time.sleep(switch_delay)
-            else:
-                delay = Config.get_random_delay()
-                time.sleep(delay)
+            run_cycle(scheduler, stop_bot_flag)
             
     except KeyboardInterrupt:
-        print("\nCombo bot đã dừng bởi người dùng", flush=True)
-        tracker.print_status()
+        logger.info("\nCombo bot đã dừng bởi người dùng")
+        print_status(scheduler)
         
     except Exception as e:
-        print(f"Lỗi không mong muốn: {e}", flush=True)
-        tracker.print_status()
+        logger.error(f"Lỗi không mong muốn: {e}")
+        print_status(scheduler)
 
 
 if __name__ == "__main__":
     ensure_assets_directory()
+    preload_assets()
     main()
\ No newline at end of file
@@ -1,17 +1,23 @@
 """
 Combo Bot - Fog Scout + Barbarian Farming (2-activity cycle)
 """
-import io
-import sys
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-
+import logging
 import pyautogui
 import time
 import random
 import threading
 from enum import Enum
 from bot_utils import ensure_assets_directory
-from sequences import execute_fog_scout_sequence, execute_barbarian_farm_sequence
+from state_store import state_store, scoped
+from sequences import execute_fog_scout_sequence, execute_barbarian_farm_sequence, preload_assets
+from sequences.barbarian_sequence import MIN_STAMINA
+from sequences.stamina_tracker import get_stamina_tracker
+from bot_log import event, get_logger, register_renderer
+from metrics import record_activity, start_exporter
+from scale_calibration import calibrate_templates
+from tracing import span, export as export_trace
+
+logger = get_logger("ComboFogBarbarianBot")
 
 # Global flag for F12 stop signal
 stop_bot_flag = threading.Event()
@@ -20,14 +26,14 @@ def monitor_f12_key():
     """Monitor for F12 key press to stop the bot"""
     try:
         import keyboard
-        print("F12 key monitoring active - Press F12 to stop the bot", flush=True)
+        logger.info("F12 key monitoring active - Press F12 to stop the bot")
         keyboard.wait('f12')
-        print("F12 pressed - Stopping bot...", flush=True)
+        logger.info("F12 pressed - Stopping bot...")
         stop_bot_flag.set()
     except ImportError:
-        print("keyboard module not available - F12 monitoring disabled", flush=True)
+        logger.info("keyboard module not available - F12 monitoring disabled")
     except Exception as e:
-        print(f"Error in F12 monitoring: {e}", flush=True)
+        logger.error(f"Error in F12 monitoring: {e}")
 
 
 class ActivityType(Enum):
@@ -42,6 +48,7 @@ class Config:
     SCREENSHOT_PAUSE = 0.3
     MIN_DELAY = 1.3
     MAX_DELAY = 1.5
+    STATE_KEY = "combo_fog_barbarian/tracker"  # Rotation and recovery kept across restarts
     
     @staticmethod
     def get_random_delay():
@@ -60,6 +67,31 @@ class ActivityTracker:
         self.activity_counts = {activity: 0 for activity in self.activities}
         self.total_cycles = 0
         self.barbarian_recovery_until = 0  # Timestamp when barbarian can resume
+        self.restore()
+    
+    def restore(self):
+        """Resume rotation, counts and recovery deadline saved by the previous run"""
+        data = state_store.get(scoped(Config.STATE_KEY))
+        if not data:
+            return
+        try:
+            self.current_index = int(data.get('current_index', 0)) % len(self.activities)
+            counts = data.get('activity_counts', {})
+            for activity in self.activities:
+                self.activity_counts[activity] = int(counts.get(activity.value, 0))
+            self.total_cycles = int(data.get('total_cycles', 0))
+            self.barbarian_recovery_until = float(data.get('barbarian_recovery_until', 0))
+        except (AttributeError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring saved tracker state: {e}")
+    
+    def save(self):
+        """Persist rotation, counts and recovery deadline"""
+        state_store.put(scoped(Config.STATE_KEY), {
+            'current_index': self.current_index,
+            'activity_counts': {activity.value: count for activity, count in self.activity_counts.items()},
+            'total_cycles': self.total_cycles,
+            'barbarian_recovery_until': self.barbarian_recovery_until
+        })
     
     @property
     def current_activity(self):
@@ -82,10 +114,12 @@ class ActivityTracker:
         """Check if barbarian is in recovery period"""
         return time.time() < self.barbarian_recovery_until
     
-    def set_barbarian_recovery(self, minutes=10):
-        """Set barbarian recovery period"""
+    def set_barbarian_recovery(self, minutes=None):
+        """Set barbarian recovery period, by default until stamina is predicted back above the threshold"""
+        if minutes is None:
+            minutes = get_stamina_tracker(MIN_STAMINA).seconds_until_attack() / 60
         self.barbarian_recovery_until = time.time() + (minutes * 60)
-        print(f"Barbarian stamina low - recovery period set for {minutes} minutes", flush=True)
+        logger.info(f"Barbarian stamina low - recovery period set for {minutes:.1f} minutes")
     
     def get_barbarian_recovery_remaining(self):
         """Get remaining recovery time in minutes"""
@@ -100,10 +134,10 @@ class ActivityTracker:
                 # Skip barbarian, go to fog
                 self.current_index = 0  # Fog scout index
                 remaining = self.get_barbarian_recovery_remaining()
-                print(f"Skipping barbarian (recovery: {remaining:.1f} min left) → Fog", flush=True)
+                logger.info(f"Skipping barbarian (recovery: {remaining:.1f} min left) → Fog")
             else:
                 # Stay on fog scouting
-                print(f"Staying on fog scouting (barbarian recovery: {self.get_barbarian_recovery_remaining():.1f} min left)", flush=True)
+                logger.info(f"Staying on fog scouting (barbarian recovery: {self.get_barbarian_recovery_remaining():.1f} min left)")
         else:
             # Normal switching
             self.current_index = (self.current_index + 1) % len(self.activities)
@@ -111,30 +145,65 @@ class ActivityTracker:
             if self.current_index == 0:  # Completed full cycle
                 self.total_cycles += 1
         
-        activity_names = {
-            ActivityType.FOG_SCOUT: "Trinh Sát Sương Mù",
-            ActivityType.BARBARIAN_FARM: "Farm Barbarian"
-        }
-        
-        activity_name = activity_names[self.current_activity]
-        print(f"\n★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★", flush=True)
-        print(f"★                   CHUYỂN HOẠT ĐỘNG                    ★", flush=True) 
-        print(f"★              Đã chuyển sang {activity_name:<18} ★", flush=True)
-        print(f"★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★", flush=True)
+        activity = self.current_activity.value
+        logger.info(f"Switched to {activity}", extra=event("activity_switch", activity=activity))
     
     def print_status(self):
-        """Print current status"""
-        activity_names = {
-            ActivityType.FOG_SCOUT: "Trinh Sát Sương Mù",
-            ActivityType.BARBARIAN_FARM: "Farm Barbarian"
-        }
-        
-        activity_name = activity_names[self.current_activity]
-        print(f"┌─────────────────────────────────────────────────────┐", flush=True)
-        print(f"│  🎯 Hoạt động hiện tại: {activity_name:<20} │", flush=True)
-        print(f"│  🔄 Lần thực hiện: {self.get_current_entries():<25} │", flush=True)
-        print(f"│  ✅ Tổng chu kỳ hoàn thành: {self.total_cycles:<18} │", flush=True)
-        print(f"└─────────────────────────────────────────────────────┘", flush=True)
+        """Log current status"""
+        logger.info(f"Current activity {self.current_activity.value}",
+                    extra=event("tracker_status", activity=self.current_activity.value,
+                                entries=self.get_current_entries(), total_cycles=self.total_cycles,
+                                recovery_minutes=round(self.get_barbarian_recovery_remaining(), 1)))
+
+
+ACTIVITY_NAMES = {
+    ActivityType.FOG_SCOUT: "Trinh Sát Sương Mù",
+    ActivityType.BARBARIAN_FARM: "Farm Barbarian"
+}
+
+RESULT_MESSAGES = {
+    "SUCCESS": "✅ Hoạt động hoàn thành thành công",
+    "STAMINA_LOW": "⚠️  Barbarian stamina low - troops recalled, entering recovery mode",
+    "SKIPPED": "⏭️  Hoạt động đã bỏ qua do đang phục hồi",
+    "BUSY": "⏭️  Tất cả đạo quân đang hành quân, bỏ qua"
+}
+
+
+def render_activity_switch(fields: dict) -> str:
+    """Banner of an activity switch"""
+    name = ACTIVITY_NAMES[ActivityType(fields['activity'])]
+    return (f"\n★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★\n"
+            f"★                   CHUYỂN HOẠT ĐỘNG                    ★\n"
+            f"★              Đã chuyển sang {name:<18} ★\n"
+            f"★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★")
+
+
+def render_tracker_status(fields: dict) -> str:
+    """Status box of a tracker status event"""
+    name = ACTIVITY_NAMES[ActivityType(fields['activity'])]
+    return (f"┌─────────────────────────────────────────────────────┐\n"
+            f"│  🎯 Hoạt động hiện tại: {name:<20} │\n"
+            f"│  🔄 Lần thực hiện: {fields['entries']:<25} │\n"
+            f"│  ✅ Tổng chu kỳ hoàn thành: {fields['total_cycles']:<18} │\n"
+            f"└─────────────────────────────────────────────────────┘")
+
+
+def render_cycle(fields: dict) -> str:
+    """Banner of a new cycle"""
+    return (f"\n🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥\n"
+            f"🔥                           CHU KỲ {fields['cycle']:<3}                            🔥\n"
+            f"🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥")
+
+
+def render_activity_result(fields: dict) -> str:
+    """Outcome line of a finished activity"""
+    return RESULT_MESSAGES.get(fields['result'], "❌ Hoạt động thất bại, sẽ thử lại sau khi chuyển nếu cần")
+
+
+register_renderer("activity_switch", render_activity_switch)
+register_renderer("tracker_status", render_tracker_status)
+register_renderer("cycle", render_cycle)
+register_renderer("activity_result", render_activity_result)
 
 
 def execute_current_activity(tracker: ActivityTracker) -> str:
@@ -144,7 +213,7 @@ def execute_current_activity(tracker: ActivityTracker) -> str:
     # Skip barbarian if in recovery period
     if current_activity == ActivityType.BARBARIAN_FARM and tracker.is_barbarian_recovering():
         remaining = tracker.get_barbarian_recovery_remaining()
-        print(f"Skipping barbarian activity - still recovering ({remaining:.1f} min left)", flush=True)
+        logger.info(f"Skipping barbarian activity - still recovering ({remaining:.1f} min left)")
         return "SKIPPED"
     
     if current_activity == ActivityType.FOG_SCOUT:
@@ -156,7 +225,7 @@ def execute_current_activity(tracker: ActivityTracker) -> str:
         
         # Handle barbarian-specific results
         if result == "STAMINA_LOW":
-            tracker.set_barbarian_recovery(10)  # 10 minute recovery
+            tracker.set_barbarian_recovery()  # Until predicted stamina is back
             return "STAMINA_LOW"
         
         return result
@@ -166,16 +235,18 @@ def execute_current_activity(tracker: ActivityTracker) -> str:
 
 def main():
     """Main execution of combo bot"""
-    print(f"RoK Combo Bot (Fog + Barbarian) bắt đầu sau {Config.STARTUP_DELAY} giây...")
-    print("Cấu hình: Fog Scout → Barbarian Farm → Lặp lại")
-    print("🔴 Press F12 anytime to stop the bot")
+    logger.info(f"RoK Combo Bot (Fog + Barbarian) bắt đầu sau {Config.STARTUP_DELAY} giây...")
+    logger.info("Cấu hình: Fog Scout → Barbarian Farm → Lặp lại")
+    logger.info("🔴 Press F12 anytime to stop the bot")
     time.sleep(Config.STARTUP_DELAY)
     
     # Configure PyAutoGUI
     pyautogui.FAILSAFE = True
     pyautogui.PAUSE = Config.SCREENSHOT_PAUSE
+    calibrate_templates()  # Assets were captured at one UI scale
     
     tracker = ActivityTracker()
+    start_exporter()
     
     # Start F12 key monitoring in a separate thread
     f12_thread = threading.Thread(target=monitor_f12_key, daemon=True)
@@ -185,57 +256,56 @@ def main():
         while True:
             # Check if F12 was pressed
             if stop_bot_flag.is_set():
-                print("🛑 Bot stopped by F12 key press", flush=True)
+                logger.info("🛑 Bot stopped by F12 key press")
                 break
-            print(f"\n🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥", flush=True)
-            print(f"🔥                           CHU KỲ {tracker.get_current_entries() + 1:<3}                            🔥", flush=True)
-            print(f"🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥", flush=True)
-            tracker.print_status()
+            activity = tracker.current_activity.value
+            with span("cycle", "cycle", activity=activity):
+                cycle = tracker.get_current_entries() + 1
+                logger.info(f"Cycle {cycle}", extra=event("cycle", cycle=cycle))
+                tracker.print_status()
             
-            # Execute current activity
-            result = execute_current_activity(tracker)
+                # Execute current activity
+                with span(activity, "activity"):
+                    result = execute_current_activity(tracker)
             
-            # Random delay after activity execution
-            delay = Config.get_random_delay()
-            print(f"Chờ {delay:.1f}s sau khi hoàn thành hoạt động...", flush=True)
-            time.sleep(delay)
+                # Random delay after activity execution
+                delay = Config.get_random_delay()
+                logger.info(f"Chờ {delay:.1f}s sau khi hoàn thành hoạt động...")
+                time.sleep(delay)
             
-            # Handle different result types
-            if result == "SUCCESS":
-                tracker.increment_current_entries()
-                print(f"✅ Hoạt động hoàn thành thành công", flush=True)
-            elif result == "STAMINA_LOW":
-                tracker.increment_current_entries()
-                print(f"⚠️  Barbarian stamina low - troops recalled, entering recovery mode", flush=True)
-            elif result == "SKIPPED":
-                # Don't increment for skipped activities
-                print(f"⏭️  Hoạt động đã bỏ qua do đang phục hồi", flush=True)
-            else:
-                print("❌ Hoạt động thất bại, sẽ thử lại sau khi chuyển nếu cần", flush=True)
-                tracker.increment_current_entries()
+                record_activity(tracker.current_activity.value, result)
+                # Skipped activities don't count as entries
+                if result != "SKIPPED":
+                    tracker.increment_current_entries()
+                level = logging.INFO if result in ("SUCCESS", "SKIPPED", "BUSY") else logging.WARNING
+                logger.log(level, f"{tracker.current_activity.value} finished: {result}",
+                           extra=event("activity_result", activity=tracker.current_activity.value, result=result))
             
-            # Switch activity after each cycle
-            if tracker.should_switch_activity():
-                print(f"\n⚡⚡⚡ ĐANG CHUYỂN ĐỔII HOẠT ĐỘNG SAU 1 CHU KỲ ⚡⚡⚡", flush=True)
-                tracker.switch_activity()
+                # Switch activity after each cycle
+                if tracker.should_switch_activity():
+                    logger.info(f"\n⚡⚡⚡ ĐANG CHUYỂN ĐỔII HOẠT ĐỘNG SAU 1 CHU KỲ ⚡⚡⚡")
+                    tracker.switch_activity()
                 
-                # Random delay before starting next activity
-                switch_delay = Config.get_random_delay()
-                print(f"⏰ Chờ {switch_delay:.1f}s trước khi bắt đầu hoạt động tiếp theo...", flush=True)
-                time.sleep(switch_delay)
-            else:
-                delay = Config.get_random_delay()
-                time.sleep(delay)
+                    # Random delay before starting next activity
+                    switch_delay = Config.get_random_delay()
+                    logger.info(f"⏰ Chờ {switch_delay:.1f}s trước khi bắt đầu hoạt động tiếp theo...")
+                    time.sleep(switch_delay)
+                else:
+                    delay = Config.get_random_delay()
+                    time.sleep(delay)
+                tracker.save()
+            export_trace(activity)  # No-op unless tracing is enabled
             
     except KeyboardInterrupt:
-        print("\nCombo bot đã dừng bởi người dùng", flush=True)
+        logger.info("\nCombo bot đã dừng bởi người dùng")
         tracker.print_status()
         
     except Exception as e:
-        print(f"Lỗi không mong muốn: {e}", flush=True)
+        logger.error(f"Lỗi không mong muốn: {e}")
         tracker.print_status()
 
 
 if __name__ == "__main__":
     ensure_assets_directory()
+    preload_assets()
     main()
\ No newline at end of file
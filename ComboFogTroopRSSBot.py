@@ -1,24 +1,26 @@
 """
 Combo Bot - Fog Scout + Troop Training (Infantry, Archers, Cavalry, Siege)
 """
-import io
-import sys
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-
+import logging
 import pyautogui
 import time
 import threading
 from enum import Enum
 from bot_utils import ensure_assets_directory
-from sequences import (
-    execute_fog_scout_sequence,
-    execute_infantry_sequence,
-    execute_archers_sequence,
-    execute_cavalry_sequence,
-    execute_siege_sequence
-)
-from sequences.resources_sequence import check_joan_rss, check_gaius_rss, check_constance_rss, check_sarka_rss, execute_resource_gathering
+from scheduler import ActivityScheduler, format_status
+from state_store import state_store, scoped
+from sequences import infantry_sequence, archers_sequence, cavalry_sequence, siege_sequence
+from sequences.training_timers import training_timers
+from sequences import execute_fog_scout_sequence, preload_assets
+from sequences.resources_sequence import RSS_COMMANDERS, count_rss_commanders, execute_resource_gathering
 from sequences.reconnect_sequence import execute_reconnect_sequence
+from sequences.march_tracker import get_march_tracker
+from bot_log import event, get_logger, register_renderer
+from metrics import record_activity, start_exporter
+from scale_calibration import calibrate_templates
+from tracing import span, export as export_trace
+
+logger = get_logger("ComboFogTroopRSSBot")
 
 # Global flag for F12 stop signal
 stop_bot_flag = threading.Event()
@@ -28,14 +30,14 @@ def monitor_f12_key():
     """Monitor for F12 key press to stop the bot"""
     try:
         import keyboard
-        print("F12 key monitoring active - Press F12 to stop the bot", flush=True)
+        logger.info("F12 key monitoring active - Press F12 to stop the bot")
         keyboard.wait('f12')
-        print("F12 pressed - Stopping bot...", flush=True)
+        logger.info("F12 pressed - Stopping bot...")
         stop_bot_flag.set()
     except ImportError:
-        print("keyboard module not available - F12 monitoring disabled", flush=True)
+        logger.info("keyboard module not available - F12 monitoring disabled")
     except Exception as e:
-        print(f"Error in F12 monitoring: {e}", flush=True)
+        logger.error(f"Error in F12 monitoring: {e}")
 
 
 class ActivityType(Enum):
@@ -53,128 +55,170 @@ class Config:
     STARTUP_DELAY = 2
     SCREENSHOT_PAUSE = 0.3
     ACTIVITY_SWITCH_DELAY = 1.5
+    # Seconds until an activity is worth running again
+    SCOUT_RETURN = 180  # Scout sent, out exploring
+    SCOUT_BUSY_RECHECK = 120  # No idle scout at the camp
+    TRAINING_DURATION = 1800  # Fresh batch in training
+    TRAINING_BUSY_RECHECK = 600  # Queue still training, countdown unreadable
+    TRAINING_DONE_MARGIN = 15  # Seconds after the OCR'd countdown ends
+    GATHER_RETURN = 1800  # Gatherers sent out
+    GATHER_RECHECK = 600  # Enough RSS commanders already out
+    FAILED_RETRY = 60  # Anything that failed for another reason
+    STATE_KEY = "combo_fog_troop_rss/scheduler"  # Deadlines and counters kept across restarts
 
 
-class ActivityTracker:
-    """Track current activity and entry counts"""
-    def __init__(self):
-        self.activities = [
-            ActivityType.FOG_SCOUT,
-            ActivityType.INFANTRY,
-            ActivityType.FOG_SCOUT,
-            ActivityType.RESOURCES,
-            ActivityType.ARCHERS,
-            ActivityType.FOG_SCOUT,
-            ActivityType.RESOURCES,
-            ActivityType.CAVALRY,
-            ActivityType.FOG_SCOUT,
-            ActivityType.RESOURCES,
-            ActivityType.SIEGE
-        ]
-        self.current_index = 0
-        self.activity_counts = {activity: 0 for activity in self.activities}
-        self.total_cycles = 0
-    
-    @property
-    def current_activity(self):
-        """Get current activity"""
-        return self.activities[self.current_index]
-    
-    def get_current_entries(self):
-        """Get current entry count for active activity"""
-        return self.activity_counts[self.current_activity]
-    
-    def increment_current_entries(self):
-        """Increment entry count for current activity"""
-        self.activity_counts[self.current_activity] += 1
-    
-    def should_switch_activity(self):
-        """Always switch after each single cycle"""
-        return True
-    
-    def switch_activity(self):
-        """Switch to next activity in sequence"""
-        self.current_index = (self.current_index + 1) % len(self.activities)
-        
-        if self.current_index == 0:  # Completed full cycle
-            self.total_cycles += 1
-        
-        activity_names = {
-            ActivityType.FOG_SCOUT: "Trinh Sát Sương Mù",
-            ActivityType.INFANTRY: "Huấn Luyện Bộ Binh",
-            ActivityType.ARCHERS: "Huấn Luyện Cung Thủ",
-            ActivityType.CAVALRY: "Huấn Luyện Kỵ Binh",
-            ActivityType.SIEGE: "Huấn Luyện Công Thành",
-            ActivityType.RESOURCES: "Thu Thập Tài Nguyên"
-        }
-        
-        activity_name = activity_names[self.current_activity]
-        print(f"\n★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★", flush=True)
-        print(f"★                   CHUYỂN HOẠT ĐỘNG                    ★", flush=True) 
-        print(f"★              Đã chuyển sang {activity_name:<18} ★", flush=True)
-        print(f"★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★★", flush=True)
-    
-    def print_status(self):
-        """Print current status"""
-        activity_names = {
-            ActivityType.FOG_SCOUT: "Trinh Sát Sương Mù",
-            ActivityType.INFANTRY: "Huấn Luyện Bộ Binh",
-            ActivityType.ARCHERS: "Huấn Luyện Cung Thủ",
-            ActivityType.CAVALRY: "Huấn Luyện Kỵ Binh",
-            ActivityType.SIEGE: "Huấn Luyện Công Thành",
-            ActivityType.RESOURCES: "Thu Thập Tài Nguyên"
-        }
-        
-        activity_name = activity_names[self.current_activity]
-        print(f"┌─────────────────────────────────────────────────────┐", flush=True)
-        print(f"│  🎯 Hoạt động hiện tại: {activity_name:<20} │", flush=True)
-        print(f"│  🔄 Lần thực hiện: {self.get_current_entries():<25} │", flush=True)
-        print(f"│  ✅ Tổng chu kỳ hoàn thành: {self.total_cycles:<18} │", flush=True)
-        print(f"└─────────────────────────────────────────────────────┘", flush=True)
+ACTIVITY_NAMES = {
+    ActivityType.FOG_SCOUT: "Trinh Sát Sương Mù",
+    ActivityType.INFANTRY: "Huấn Luyện Bộ Binh",
+    ActivityType.ARCHERS: "Huấn Luyện Cung Thủ",
+    ActivityType.CAVALRY: "Huấn Luyện Kỵ Binh",
+    ActivityType.SIEGE: "Huấn Luyện Công Thành",
+    ActivityType.RESOURCES: "Thu Thập Tài Nguyên"
+}
+
+TROOP_TRAINING = {
+    ActivityType.INFANTRY: infantry_sequence.TRAINING,
+    ActivityType.ARCHERS: archers_sequence.TRAINING,
+    ActivityType.CAVALRY: cavalry_sequence.TRAINING,
+    ActivityType.SIEGE: siege_sequence.TRAINING
+}
+
+
+def create_scheduler() -> ActivityScheduler:
+    """Scheduler over all activities, ties go fog → troops → resources
+
+    Deadlines and counters saved by the previous run are restored.
+    """
+    scheduler = ActivityScheduler(ActivityType)
+    scheduler.restore(state_store.get(scoped(Config.STATE_KEY)))
+    apply_training_timers(scheduler)
+    return scheduler
+
+
+def save_scheduler(scheduler: ActivityScheduler):
+    """Persist deadlines and counters"""
+    state_store.put(scoped(Config.STATE_KEY), scheduler.snapshot())
+
+
+def apply_training_timers(scheduler: ActivityScheduler):
+    """Make troop activities ready right when their queues free up"""
+    for activity in TROOP_TRAINING:
+        remaining = training_timers.remaining(activity.value)
+        if remaining is not None:
+            scheduler.defer(activity, remaining + Config.TRAINING_DONE_MARGIN, "queue timer")
 
 
-def execute_current_activity(tracker: ActivityTracker) -> bool:
-    """Execute the current activity"""
-    if tracker.current_activity == ActivityType.RESOURCES:
+RESULT_MESSAGES = {
+    "SUCCESS": "✅ Hoạt động hoàn thành thành công",
+    "BUSY": "⏭️  Chưa cần chạy, đã hẹn lại"
+}
+
+
+def render_status(fields: dict) -> str:
+    """Status box of a scheduler status event"""
+    lines = [f"┌─────────────────────────────────────────────────────┐",
+             f"│  ✅ Tổng hoạt động đã chạy: {fields['total_runs']:<18} │"]
+    lines += [f"│  {line}" for line in format_status(fields['activities'])]
+    lines.append(f"└─────────────────────────────────────────────────────┘")
+    return "\n".join(lines)
+
+
+def render_cycle(fields: dict) -> str:
+    """Banner of a new activity slot"""
+    return (f"\n🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥\n"
+            f"🔥                        HOẠT ĐỘNG {fields['cycle']:<3}                        🔥\n"
+            f"🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥")
+
+
+def render_activity_start(fields: dict) -> str:
+    """Banner of the activity about to run"""
+    name = ACTIVITY_NAMES.get(ActivityType(fields['activity']), fields['activity'])
+    return f"\n⚡⚡⚡ {name} ⚡⚡⚡"
+
+
+def render_activity_result(fields: dict) -> str:
+    """Outcome line of a finished activity"""
+    return RESULT_MESSAGES.get(fields['result'], "❌ Hoạt động thất bại, sẽ thử lại sau")
+
+
+register_renderer("status", render_status)
+register_renderer("cycle", render_cycle)
+register_renderer("activity_start", render_activity_start)
+register_renderer("activity_result", render_activity_result)
+
+
+def print_status(scheduler: ActivityScheduler):
+    """Log next-ready time of every activity"""
+    logger.info(f"{scheduler.total_runs} activities run",
+                extra=event("status", total_runs=scheduler.total_runs, activities=scheduler.status()))
+
+
+def execute_activity(activity: ActivityType) -> str:
+    """Execute one activity"""
+    if activity == ActivityType.RESOURCES:
+        # Every march slot known busy - no need to look at the screen yet
+        marches = get_march_tracker()
+        if marches.all_busy():
+            logger.info(f"All march slots busy for {marches.seconds_until_free():.0f}s - no gathering possible")
+            return "BUSY"
+        
         # Resources activity has special logic - check if 3 out of 4 RSS commanders are available
-        rss_checks = [
-            check_joan_rss(),
-            check_gaius_rss(), 
-            check_constance_rss(),
-            check_sarka_rss()
-        ]
-        available_count = sum(rss_checks)
+        available_count = count_rss_commanders()
         
         if available_count >= 3:
-            print(f"RSS commanders available ({available_count}/4) - no gathering needed", flush=True)
-            return True
+            logger.info(f"RSS commanders available ({available_count}/{len(RSS_COMMANDERS)}) - no gathering needed")
+            return "BUSY"
         else:
-            print("Starting resource gathering sequence...", flush=True)
-            return execute_resource_gathering()
+            logger.info("Starting resource gathering sequence...")
+            return "SUCCESS" if execute_resource_gathering() else "FAILED"
     
-    activity_map = {
-        ActivityType.FOG_SCOUT: execute_fog_scout_sequence,
-        ActivityType.INFANTRY: execute_infantry_sequence,
-        ActivityType.ARCHERS: execute_archers_sequence,
-        ActivityType.CAVALRY: execute_cavalry_sequence,
-        ActivityType.SIEGE: execute_siege_sequence
-    }
+    if activity in TROOP_TRAINING:
+        return TROOP_TRAINING[activity].run()
     
-    return activity_map[tracker.current_activity]()
+    return "SUCCESS" if execute_fog_scout_sequence() else "FAILED"
+
+
+def schedule_next(scheduler: ActivityScheduler, activity: ActivityType, result: str):
+    """Push the activity's deadline out according to how it ended"""
+    if activity == ActivityType.FOG_SCOUT:
+        # Fog only fails early when no scout is idle
+        if result == "SUCCESS":
+            scheduler.defer(activity, Config.SCOUT_RETURN, "scout exploring")
+        else:
+            scheduler.defer(activity, Config.SCOUT_BUSY_RECHECK, "no idle scout")
+    elif activity == ActivityType.RESOURCES:
+        if result == "SUCCESS":
+            scheduler.defer(activity, Config.GATHER_RETURN, "gathering")
+        elif result == "BUSY":
+            wait = get_march_tracker().seconds_until_free() or Config.GATHER_RECHECK
+            scheduler.defer(activity, wait, "commanders out")
+        else:
+            scheduler.defer(activity, Config.FAILED_RETRY, "retry")
+    else:
+        if result == "SUCCESS":
+            scheduler.defer(activity, Config.TRAINING_DURATION, "training")
+        elif result == "BUSY":
+            scheduler.defer(activity, Config.TRAINING_BUSY_RECHECK, "queue busy")
+        else:
+            scheduler.defer(activity, Config.FAILED_RETRY, "retry")
+        # One busy check reads every visible queue timer, exact times win over estimates
+        apply_training_timers(scheduler)
 
 
 def main():
     """Main execution of combo bot"""
-    print(f"RoK Combo Bot (Fog Scout + Troop Training) bắt đầu sau {Config.STARTUP_DELAY} giây...")
-    print("Cấu hình: Fog Scout → Infantry → Archers → Cavalry → Siege → Resources → Lặp lại")
-    print("🔴 Press F12 anytime to stop the bot")
+    logger.info(f"RoK Combo Bot (Fog Scout + Troop Training) bắt đầu sau {Config.STARTUP_DELAY} giây...")
+    logger.info("Cấu hình: hoạt động nào sẵn sàng sớm nhất sẽ chạy trước (Fog Scout, Infantry, Archers, Cavalry, Siege, Resources)")
+    logger.info("🔴 Press F12 anytime to stop the bot")
     time.sleep(Config.STARTUP_DELAY)
     
     # Configure PyAutoGUI
     pyautogui.FAILSAFE = True
     pyautogui.PAUSE = Config.SCREENSHOT_PAUSE
+    calibrate_templates()  # Assets were captured at one UI scale
     
-    tracker = ActivityTracker()
+    scheduler = create_scheduler()
+    start_exporter()
     
     # Start F12 key monitoring in a separate thread
     f12_thread = threading.Thread(target=monitor_f12_key, daemon=True)
@@ -184,47 +228,52 @@ def main():
         while True:
             # Check if F12 was pressed
             if stop_bot_flag.is_set():
-                print("🛑 Bot stopped by F12 key press", flush=True)
+                logger.info("🛑 Bot stopped by F12 key press")
                 break
-            print(f"\n🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥", flush=True)
-            print(f"🔥                        HOẠT ĐỘNG {tracker.get_current_entries() + 1:<3}                        🔥", flush=True)
-            print(f"🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥", flush=True)
-            tracker.print_status()
+            logger.info(f"Activity {scheduler.total_runs + 1}", extra=event("cycle", cycle=scheduler.total_runs + 1))
+            print_status(scheduler)
             
-            # Execute current activity
-            success = execute_current_activity(tracker)
+            # Sleep until the soonest deadline instead of cycling through busy activities
+            activity = scheduler.wait_for_next(stop_bot_flag)
+            if activity is None:
+                continue
+            with span("cycle", "cycle", activity=activity.value):
+                logger.info(f"Starting {activity.value}", extra=event("activity_start", activity=activity.value))
+                scheduler.record_run(activity)
+                with span(activity.value, "activity"):
+                    result = execute_activity(activity)
+                schedule_next(scheduler, activity, result)
+                record_activity(activity.value, result)
+                if result == "SUCCESS":
+                    scheduler.record_success(activity)
+                save_scheduler(scheduler)
             
-            if success:
-                tracker.increment_current_entries()
-                print(f"✅ Hoạt động hoàn thành thành công", flush=True)
-            else:
-                print("❌ Hoạt động thất bại, sẽ thử lại sau khi chuyển nếu cần", flush=True)
-                tracker.increment_current_entries()
+                level = logging.INFO if result in ("SUCCESS", "BUSY") else logging.WARNING
+                logger.log(level, f"{activity.value} finished: {result}",
+                           extra=event("activity_result", activity=activity.value, result=result,
+                                       ready_in=round(scheduler.ready_in(activity), 1)))
             
-            # Check for reconnection needs
-            print(f"\n🔌 Kiểm tra kết nối...", flush=True)
-            reconnect_result = execute_reconnect_sequence()
-            if reconnect_result:
-                print("🔌 Đã kết nối lại thành công", flush=True)
+                # Check for reconnection needs
+                logger.info(f"\n🔌 Kiểm tra kết nối...")
+                reconnect_result = execute_reconnect_sequence()
+                if reconnect_result:
+                    logger.info("🔌 Đã kết nối lại thành công")
             
-            # Switch to next activity after each cycle
-            if tracker.should_switch_activity():
-                print(f"\n⚡⚡⚡ ĐANG CHUYỂN ĐỔII HOẠT ĐỘNG TIẾP THEO ⚡⚡⚡", flush=True)
-                tracker.switch_activity()
-                
                 # Wait before starting next activity
-                print(f"⏰ Chờ {Config.ACTIVITY_SWITCH_DELAY}s trước khi bắt đầu hoạt động tiếp theo...", flush=True)
+                logger.info(f"⏰ Chờ {Config.ACTIVITY_SWITCH_DELAY}s trước khi bắt đầu hoạt động tiếp theo...")
                 time.sleep(Config.ACTIVITY_SWITCH_DELAY)
+            export_trace(activity.value)  # No-op unless tracing is enabled
             
     except KeyboardInterrupt:
-        print("\nCombo bot đã dừng bởi người dùng", flush=True)
-        tracker.print_status()
+        logger.info("\nCombo bot đã dừng bởi người dùng")
+        print_status(scheduler)
         
     except Exception as e:
-        print(f"Lỗi không mong muốn: {e}", flush=True)
-        tracker.print_status()
+        logger.error(f"Lỗi không mong muốn: {e}")
+        print_status(scheduler)
 
 
 if __name__ == "__main__":
     ensure_assets_directory()
+    preload_assets()
     main()
\ No newline at end of file
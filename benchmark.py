@@ -0,0 +1,295 @@
+"""
+Benchmark suite - detection latency and cycle cost on recorded frames
+
+Usage: python benchmark.py <recordings_dir> [--json] [--repeats N]
+                           [--baseline FILE] [--threshold 0.15]
+
+<recordings_dir> holds one sub-directory of PNG frames per activity, named
+after ComboFogBarTroopBot's ActivityType values (fog_scout, barbarian_farm,
+infantry, archers, cavalry, siege). Every frame found below it is also used
+for the per-template latency numbers.
+
+With --baseline, p50 values are compared against a previous --json report
+and the exit code is 1 when any metric regressed by more than --threshold.
+"""
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+import replay
+from bot_log import setup_logging
+from frame_memo import Config as MemoConfig, match_memo
+
+
+class Config:
+    """Benchmark configuration constants"""
+    REPEATS = 3
+    REGRESSION_THRESHOLD = 0.15  # Allowed p50 slowdown before failing
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """p50/p90/p99 summary of a sample"""
+    if not values:
+        return {'n': 0, 'mean': 0.0, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0}
+    data = np.asarray(values, dtype=float)
+    return {
+        'n': int(data.size),
+        'mean': float(data.mean()),
+        'p50': float(np.percentile(data, 50)),
+        'p90': float(np.percentile(data, 90)),
+        'p99': float(np.percentile(data, 99))
+    }
+
+
+def _frame_dirs(recordings_dir: str) -> Dict[str, str]:
+    return {
+        name: os.path.join(recordings_dir, name) for name in sorted(os.listdir(recordings_dir))
+        if os.path.isdir(os.path.join(recordings_dir, name))
+        and any(f.lower().endswith('.png') for f in os.listdir(os.path.join(recordings_dir, name)))
+    }
+
+
+@contextlib.contextmanager
+def manual_roi_hints():
+    """Search with the shipped ROI manifest only, so results don't depend on earlier runs"""
+    import bot_utils
+    from roi_hints import RoiHints
+
+    learned = bot_utils.roi_hints
+    bot_utils.roi_hints = RoiHints(learned_path=None)
+    try:
+        yield
+    finally:
+        bot_utils.roi_hints = learned
+
+
+@contextlib.contextmanager
+def scratch_state():
+    """Point the state store at a temporary directory, yielding it; the live log is never written"""
+    from state_store import state_store
+
+    live_path = state_store.path
+    with tempfile.TemporaryDirectory(prefix="rok_bench_") as directory:
+        state_store.reopen(os.path.join(directory, "bot_state.jsonl"))
+        try:
+            yield directory
+        finally:
+            state_store.reopen(live_path)
+
+
+def reset_bot_state(directory: str, name: str):
+    """Fresh, empty state for one repeat: no marches, stamina anchors or training timers carried over"""
+    from state_store import state_store
+    from sequences import march_tracker, stamina_tracker
+
+    state_store.reopen(os.path.join(directory, f"{name}.jsonl"))  # Training timers live in the store
+    with march_tracker._lock:
+        march_tracker._trackers.clear()
+    with stamina_tracker._lock:
+        stamina_tracker._trackers.clear()
+
+
+def bench_template_latency(frame_dirs: Dict[str, str], repeats: int) -> Dict[str, dict]:
+    """Per-template locate_template latency in ms, one fresh frame per call
+
+    The match memo is off: repeats on the same frame would otherwise time a
+    memo lookup instead of matchTemplate.
+    """
+    import bot_utils
+    from sequences import collect_asset_paths
+
+    image_paths = sorted(set(collect_asset_paths()))
+    bot_utils.preload_templates(image_paths)
+    timings = {image_path: [] for image_path in image_paths}
+    memo_enabled, MemoConfig.ENABLED = MemoConfig.ENABLED, False
+    try:
+        for frames_dir in frame_dirs.values():
+            driver = replay.ReplayDriver(frames_dir)
+            replay.install(driver)
+            for index in range(len(driver.frames)):
+                driver.index = index
+                bot_utils.invalidate_frame()
+                frame = bot_utils.get_frame()
+                frame.gray  # Conversion is a capture cost, not a match cost
+                for image_path in image_paths:
+                    for _ in range(repeats):
+                        start = time.perf_counter()
+                        bot_utils.locate_template(image_path, frame=frame)
+                        timings[image_path].append((time.perf_counter() - start) * 1000)
+    finally:
+        MemoConfig.ENABLED = memo_enabled
+        replay.uninstall()
+    return {image_path: percentiles(values) for image_path, values in timings.items()}
+
+
+def bench_stamina_ocr(frame_dirs: Dict[str, str], repeats: int) -> dict:
+    """get_current_stamina latency in ms on frames that show the stamina panel"""
+    from sequences import barbarian_sequence
+    from sequences.digit_reader import glyph_bank
+    import bot_utils
+
+    if not barbarian_sequence.TESSERACT_AVAILABLE and not glyph_bank.ready():
+        return {'skipped': 'pytesseract not available and glyph bank not bootstrapped'}
+
+    timings = []
+    for frames_dir in frame_dirs.values():
+        driver = replay.ReplayDriver(frames_dir)
+        replay.install(driver)
+        for index in range(len(driver.frames)):
+            driver.index = index
+            bot_utils.invalidate_frame()
+            if barbarian_sequence.find_stamina_check_position() is None:
+                continue
+            for _ in range(repeats):
+                bot_utils.invalidate_frame()
+                start = time.perf_counter()
+                barbarian_sequence.get_current_stamina()
+                timings.append((time.perf_counter() - start) * 1000)
+    replay.uninstall()
+    return percentiles(timings)
+
+
+def bench_activities(frame_dirs: Dict[str, str], repeats: int, state_dir: str) -> Dict[str, dict]:
+    """Per-activity cost through ComboFogBarTroopBot.execute_activity
+
+    Every repeat starts from empty bot state in state_dir, so one repeat's
+    dispatches can't turn the next into a skipped BUSY cycle.
+    """
+    import ComboFogBarTroopBot as combo
+
+    results = {}
+    for activity in combo.ActivityType:
+        frames_dir = frame_dirs.get(activity.value)
+        if frames_dir is None:
+            continue
+        cpu_ms, bot_s, captures, outcomes = [], [], [], []
+        for seed in range(repeats):
+            driver = replay.ReplayDriver(frames_dir, seed=seed)
+            replay.install(driver)
+            match_memo.clear()  # Every repeat starts cold
+            reset_bot_state(state_dir, f"{activity.value}_{seed}")
+            scheduler = combo.create_scheduler()
+            start = time.perf_counter()
+            try:
+                outcomes.append(str(combo.execute_activity(scheduler, activity)))
+            finally:
+                replay.uninstall()
+            cpu_ms.append((time.perf_counter() - start) * 1000)
+            bot_s.append(driver.virtual_time)
+            captures.append(sum(1 for event in driver.events if event.kind == 'screenshot'))
+        results[activity.value] = {
+            'processing_ms': percentiles(cpu_ms),
+            'bot_seconds': percentiles(bot_s),
+            'captures_per_cycle': percentiles(captures),
+            'outcomes': outcomes
+        }
+    return results
+
+
+def run(recordings_dir: str, repeats: int = Config.REPEATS) -> dict:
+    """Run every benchmark and return the report"""
+    frame_dirs = _frame_dirs(recordings_dir)
+    if not frame_dirs:
+        raise ValueError(f"No frame directories in {recordings_dir}")
+
+    # Sequence logs go to stderr so stdout only carries the report
+    setup_logging(stream=sys.stderr)
+    # pyautogui must be replaced before bot_utils is first imported
+    replay.install(replay.ReplayDriver(next(iter(frame_dirs.values()))))
+    replay.uninstall()
+
+    with contextlib.redirect_stdout(sys.stderr), manual_roi_hints(), scratch_state() as state_dir:
+        return {
+            'recordings': recordings_dir,
+            'template_latency_ms': bench_template_latency(frame_dirs, repeats),
+            'stamina_ocr_ms': bench_stamina_ocr(frame_dirs, repeats),
+            'activities': bench_activities(frame_dirs, repeats, state_dir)
+        }
+
+
+def flatten_p50(report: dict) -> Dict[str, float]:
+    """Metric name -> p50 for regression comparison"""
+    flat = {}
+    for image_path, stats in report.get('template_latency_ms', {}).items():
+        flat[f"template:{image_path}"] = stats['p50']
+    if 'p50' in report.get('stamina_ocr_ms', {}):
+        flat['stamina_ocr'] = report['stamina_ocr_ms']['p50']
+    for activity, stats in report.get('activities', {}).items():
+        flat[f"activity:{activity}:processing_ms"] = stats['processing_ms']['p50']
+        flat[f"activity:{activity}:captures"] = stats['captures_per_cycle']['p50']
+    return flat
+
+
+def find_regressions(report: dict, baseline: dict, threshold: float) -> List[str]:
+    """Metrics whose p50 got worse than baseline by more than threshold"""
+    current = flatten_p50(report)
+    regressions = []
+    for name, old in flatten_p50(baseline).items():
+        new = current.get(name)
+        if new is None or old <= 0:
+            continue
+        if new > old * (1 + threshold):
+            regressions.append(f"{name}: {old:.3f} -> {new:.3f} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_report(report: dict):
+    """Human readable summary"""
+    print("Per-template match latency (ms):")
+    rows = sorted(report['template_latency_ms'].items(), key=lambda item: -item[1]['p50'])
+    for image_path, stats in rows:
+        print(f"  {image_path:<48} p50 {stats['p50']:7.2f}  p90 {stats['p90']:7.2f}  p99 {stats['p99']:7.2f}")
+
+    ocr = report['stamina_ocr_ms']
+    if 'skipped' in ocr:
+        print(f"Stamina OCR: skipped ({ocr['skipped']})")
+    else:
+        print(f"Stamina OCR (ms): p50 {ocr['p50']:.1f}  p90 {ocr['p90']:.1f}  p99 {ocr['p99']:.1f}  (n={ocr['n']})")
+
+    print("Activities:")
+    for activity, stats in report['activities'].items():
+        print(f"  {activity:<16} processing p50 {stats['processing_ms']['p50']:8.1f} ms  "
+              f"bot time p50 {stats['bot_seconds']['p50']:6.2f} s  "
+              f"captures p50 {stats['captures_per_cycle']['p50']:4.1f}  results {stats['outcomes']}")
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0].startswith('--'):
+        print(__doc__)
+        return 2
+
+    def option(name, default):
+        return args[args.index(name) + 1] if name in args else default
+
+    repeats = int(option('--repeats', Config.REPEATS))
+    threshold = float(option('--threshold', Config.REGRESSION_THRESHOLD))
+    baseline_path = option('--baseline', None)
+
+    report = run(args[0], repeats)
+    if '--json' in args:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, threshold)
+        if regressions:
+            print(f"Regressions over {threshold * 100:.0f}%:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print(f"No regressions over {threshold * 100:.0f}% against {baseline_path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Structured logging - per-module loggers, console rendering and a JSON-lines sink
+
+Records are put on a queue by the calling thread and written by one
+listener thread, so the bot loop never waits on the console or the disk.
+A record can carry an event name and fields:
+
+    logger.info("Scout sent", extra=event("scout_sent", x=412, y=230))
+
+The JSON sink stores the fields as they are. The console shows the message,
+or the text of a renderer registered for the event (status boxes, banners).
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from typing import Any, Callable, Dict, Optional, TextIO
+
+
+class Config:
+    """Logging configuration constants"""
+    ROOT = "rok"  # Parent of every bot logger
+    LOG_PATH = "logs/bot.jsonl"
+    CONSOLE_LEVEL = logging.INFO
+    FILE_LEVEL = logging.DEBUG
+    MAX_BYTES = 20 * 1024 * 1024  # Rotate the JSON log at this size
+    BACKUP_COUNT = 5
+
+
+Renderer = Callable[[Dict[str, Any]], str]
+_renderers: Dict[str, Renderer] = {}
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[logging.Handler] = None
+_setup_lock = threading.Lock()
+_current_instance = None
+
+
+def event(name: str, **fields) -> Dict[str, Any]:
+    """extra= argument tagging a record with an event name and fields"""
+    return {'event': name, 'fields': fields}
+
+
+def register_renderer(name: str, renderer: Renderer):
+    """Console text of an event, built from its fields"""
+    _renderers[name] = renderer
+
+
+class _InstanceFilter(logging.Filter):
+    """Tag records with the game instance of the logging thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        global _current_instance
+        if _current_instance is None:
+            from multi_instance import current_instance
+            _current_instance = current_instance
+        instance = _current_instance()
+        record.instance = instance.name if instance is not None else None
+        return True
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Plain message or event rendering, prefixed with the instance name"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = None
+        renderer = _renderers.get(getattr(record, 'event', None))
+        if renderer is not None:
+            try:
+                text = renderer(getattr(record, 'fields', {}))
+            except Exception:
+                text = None  # Fall back to the message
+        if text is None:
+            text = record.getMessage()
+        instance = getattr(record, 'instance', None)
+        return f"[{instance}] {text}" if instance else text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage().strip()
+        }
+        instance = getattr(record, 'instance', None)
+        if instance:
+            entry['instance'] = instance
+        name = getattr(record, 'event', None)
+        if name:
+            entry['event'] = name
+            entry['fields'] = getattr(record, 'fields', {})
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(log_path: str = Config.LOG_PATH, console_level: int = Config.CONSOLE_LEVEL,
+                  stream: Optional[TextIO] = None):
+    """Start the queue listener once, safe to call again
+
+    The console handler writes to stream, stdout by default.
+    """
+    global _listener, _handler
+    with _setup_lock:
+        if _listener is not None:
+            return
+        stream = sys.stdout if stream is None else stream
+        try:
+            stream.reconfigure(encoding='utf-8', errors='replace')  # Emoji on Windows consoles
+        except (AttributeError, ValueError):
+            pass
+        console = logging.StreamHandler(stream)
+        console.setLevel(console_level)
+        console.setFormatter(ConsoleFormatter())
+        handlers = [console]
+        try:
+            directory = os.path.dirname(log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            sink = logging.handlers.RotatingFileHandler(log_path, maxBytes=Config.MAX_BYTES,
+                                                        backupCount=Config.BACKUP_COUNT,
+                                                        encoding='utf-8', delay=True)
+            sink.setLevel(Config.FILE_LEVEL)
+            sink.setFormatter(JsonFormatter())
+            handlers.append(sink)
+        except OSError as e:
+            print(f"JSON log disabled: {e}", flush=True)
+
+        records = queue.SimpleQueue()
+        _handler = logging.handlers.QueueHandler(records)
+        _handler.addFilter(_InstanceFilter())
+        root = logging.getLogger(Config.ROOT)
+        root.setLevel(min(h.level for h in handlers))
+        root.addHandler(_handler)
+        root.propagate = False
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener"""
+    global _listener, _handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        logging.getLogger(Config.ROOT).removeHandler(_handler)
+        _listener.stop()
+        _listener = _handler = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger of one module, logging is set up on first use"""
+    setup_logging()
+    return logging.getLogger(f"{Config.ROOT}.{name}")
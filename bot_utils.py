@@ -6,52 +6,432 @@ import cv2
 import numpy as np
 import pyautogui
 import random
-from typing import Optional, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from roi_hints import roi_hints
+from pyramid_match import match_brute_force, match_pyramid, should_use_pyramid
+from pyramid_match import clear_cache as clear_pyramid_cache
+from frame_memo import fingerprint, match_memo
+from frame_memo import Config as MemoConfig
+from capture import Capture, game_region, to_gray, to_rgb
+from capture import get_backend as get_capture_backend
+from multi_instance import current_instance, exclusive_input, shared_grabber, using_instance
+from bot_log import get_logger
+from metrics import record_match, record_memo_hit
+from tracing import span
+
+logger = get_logger("bot_utils")
 
 
 class Config:
     """Base configuration constants"""
     ACCURACY_THRESHOLD = 0.7
+    TEMPLATE_RECHECK_INTERVAL = 5.0  # Seconds between mtime checks of a cached template
+    FRAME_MAX_AGE = 1.0  # Seconds a shared frame stays valid without any input event
+    MATCH_WORKERS = min(4, os.cpu_count() or 1)  # Threads for batched template matching
+    MAX_MATCHES = 32  # Locations kept per template when finding all of them
+
+
+class TemplateCache:
+    """Process-wide cache of decoded grayscale templates keyed by asset path
+
+    Templates are resized by scale when decoded, so assets captured at one UI
+    scale match a game window running at another with single-scale matching.
+    """
+
+    def __init__(self, recheck_interval: float = Config.TEMPLATE_RECHECK_INTERVAL):
+        self.recheck_interval = recheck_interval
+        self.scale = 1.0
+        self._entries = {}  # path -> (template, mtime, last_checked)
+        self._lock = threading.Lock()
+
+    def get(self, image_path: str) -> Optional[np.ndarray]:
+        """Return cached template, reloading it only when the file's mtime changed"""
+        now = time.monotonic()
+        entry = self._entries.get(image_path)
+        if entry is not None and now - entry[2] < self.recheck_interval:
+            return entry[0]
+
+        try:
+            mtime = os.path.getmtime(image_path)
+        except OSError:
+            self._entries.pop(image_path, None)
+            logger.error(f"Error: Image not found - {image_path}")
+            return None
+
+        if entry is not None and entry[1] == mtime:
+            self._entries[image_path] = (entry[0], mtime, now)
+            return entry[0]
+
+        with self._lock:
+            template = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+            if template is None:
+                self._entries.pop(image_path, None)
+                logger.error(f"Error: Could not load image - {image_path}")
+                return None
+            if self.scale != 1.0:
+                template = scale_template(template, self.scale)
+            self._entries[image_path] = (template, mtime, now)
+        return template
+
+    def set_scale(self, scale: float):
+        """Resize every template by scale from now on
+
+        Templates already decoded (e.g. by preload_assets at startup) are
+        decoded again at the new scale right away, so the first cycle after
+        calibration doesn't pay for reading them from disk.
+        """
+        with self._lock:
+            if scale == self.scale:
+                return
+            self.scale = scale
+            cached = list(self._entries)
+            self._entries.clear()
+        self.preload(cached)
+
+    def preload(self, image_paths: Iterable[str]) -> List[str]:
+        """Decode every template up front and return the paths that failed"""
+        failed = []
+        for image_path in sorted(set(image_paths)):
+            if self.get(image_path) is None:
+                failed.append(image_path)
+        return failed
+
+    def invalidate(self, image_path: Optional[str] = None):
+        """Drop one cached template, or all of them"""
+        if image_path is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(image_path, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def scale_template(template: np.ndarray, scale: float) -> np.ndarray:
+    """Template resized by scale, area-averaged when shrinking"""
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+    width = max(1, round(template.shape[1] * scale))
+    height = max(1, round(template.shape[0] * scale))
+    return cv2.resize(template, (width, height), interpolation=interpolation)
+
+
+template_cache = TemplateCache()
+
+
+def get_template(image_path: str) -> Optional[np.ndarray]:
+    """Get decoded grayscale template from the process-wide cache"""
+    return template_cache.get(image_path)
+
+
+def asset_paths(*asset_classes) -> List[str]:
+    """Collect every .png path declared on AssetPaths-style classes"""
+    paths = []
+    for asset_class in asset_classes:
+        for name in dir(asset_class):
+            value = getattr(asset_class, name)
+            if not name.startswith('_') and isinstance(value, str) and value.endswith('.png'):
+                paths.append(value)
+    return paths
+
+
+def preload_templates(image_paths: Iterable[str]) -> bool:
+    """Preload and validate templates, report missing ones"""
+    image_paths = list(image_paths)
+    failed = template_cache.preload(image_paths)
+    loaded = len(set(image_paths)) - len(failed)
+    logger.info(f"Template cache ready: {loaded} loaded, {len(failed)} failed")
+    for image_path in failed:
+        logger.info(f"  Missing or unreadable template: {image_path}")
+    return not failed
+
+
+class Match(NamedTuple):
+    """Template match in screen coordinates (same fields as pyautogui's Box)"""
+    left: int
+    top: int
+    width: int
+    height: int
+    score: float
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return (self.left + self.width // 2, self.top + self.height // 2)
+
+
+class Frame:
+    """One screen capture shared by every detector until the next input event"""
+
+    def __init__(self, capture: Capture, slot: Optional[str] = None):
+        self.capture = capture
+        self.origin = capture.origin
+        self.slot = slot  # Instance owning the gray buffer, None in single-instance mode
+        self.captured_at = time.monotonic()
+        self._gray = None
+        self.signature: Optional[np.ndarray] = None  # Block means for the match memo
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Grayscale pixels, converted once on first use into a reused buffer"""
+        if self._gray is None:
+            clear_pyramid_cache(self.slot)  # Buffer contents are about to change, other instances keep theirs
+            self._gray = to_gray(self.capture, self.slot)
+            if MemoConfig.ENABLED:
+                # Taken now, the buffer is overwritten by the slot's next capture
+                self.signature = fingerprint(self._gray)
+        return self._gray
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.captured_at
+
+    def crop(self, left: int, top: int, width: int, height: int) -> np.ndarray:
+        """RGB pixels of a screen rectangle"""
+        return to_rgb(self.capture, left - self.origin[0], top - self.origin[1], width, height)
+
+
+_current_frame: Optional[Frame] = None
+
+
+def get_frame(max_age: float = Config.FRAME_MAX_AGE) -> Frame:
+    """Return the shared frame, capturing a new one only when it expired"""
+    global _current_frame
+    instance = current_instance()
+    if instance is not None:
+        # Multi-instance: per-window frame sliced from the shared grab
+        frame = instance.frame
+        if frame is None or frame.age > max_age:
+            with span("capture", "capture"):
+                frame = Frame(shared_grabber().grab(instance, max_age), instance.name)
+            instance.frame = frame
+        return frame
+
+    frame = _current_frame
+    if frame is None or frame.age > max_age:
+        _current_frame = None
+        with span("capture", "capture"):
+            frame = Frame(get_capture_backend().grab(game_region()))
+        _current_frame = frame
+    return frame
+
+
+def invalidate_frame():
+    """Expire the shared frame because the screen is about to change"""
+    global _current_frame
+    instance = current_instance()
+    if instance is not None:
+        instance.invalidate()
+    else:
+        _current_frame = None
+
+
+def _match_region(gray: np.ndarray, template: np.ndarray, left: int = 0, top: int = 0,
+                  slot: Optional[str] = None) -> Match:
+    """Best TM_CCOEFF_NORMED match of template inside a grayscale region of slot's frame"""
+    if should_use_pyramid(gray, template):
+        max_loc, max_val = match_pyramid(gray, template, slot=slot)
+    else:
+        max_loc, max_val = match_brute_force(gray, template)
+    h, w = template.shape
+    return Match(left + max_loc[0], top + max_loc[1], w, h, max_val)
+
+
+def _best_match(frame: Frame, image_path: str, confidence: Optional[float] = None) -> Optional[Match]:
+    """Best location and score of one template, searching its ROI hint first when given a threshold"""
+    template = get_template(image_path)
+    if template is None:
+        return None
+
+    gray = frame.gray
+    h, w = template.shape
+    frame_size = (gray.shape[1], gray.shape[0])
+    key = (frame.slot, image_path, confidence)
+    if frame.signature is not None:
+        start = time.perf_counter()
+        match = match_memo.get(key, template, frame.signature, frame_size)
+        if match is not None:
+            record_memo_hit(image_path, (time.perf_counter() - start) * 1000)
+            return match._replace(left=match.left + frame.origin[0], top=match.top + frame.origin[1])
+
+    with span("match", "vision", template=image_path):
+        start = time.perf_counter()
+        match = searched = None
+        if confidence is not None:
+            region = roi_hints.region(image_path, frame_size, (w, h))
+            if region is not None:
+                left, top, width, height = region
+                match = _match_region(gray[top:top + height, left:left + width], template, left, top, frame.slot)
+                if match.score <= confidence:
+                    match = None
+                else:
+                    searched = region
+
+        # No hint, or the hint missed: full-frame search
+        if match is None:
+            match = _match_region(gray, template, slot=frame.slot)
+        hit = None if confidence is None else match.score > confidence
+        if hit:
+            roi_hints.record_hit(image_path, match.left, match.top, w, h, frame_size)
+        record_match(image_path, match.score, (time.perf_counter() - start) * 1000, hit, (match.left, match.top))
+    if frame.signature is not None:
+        match_memo.put(key, template, frame.signature, frame_size, searched, match)
+
+    # Frame-local to screen coordinates
+    return match._replace(left=match.left + frame.origin[0], top=match.top + frame.origin[1])
+
+
+def locate_template(image_path: str, confidence: float = Config.ACCURACY_THRESHOLD,
+                    frame: Optional[Frame] = None) -> Optional[Match]:
+    """Find best match of a cached template in the shared frame"""
+    if get_template(image_path) is None:
+        return None
+
+    if frame is None:
+        frame = get_frame()
+
+    match = _best_match(frame, image_path, confidence)
+    if match is not None and match.score > confidence:
+        return match
+    return None
+
+
+def _all_matches(frame: Frame, image_path: str, confidence: float,
+                 max_matches: int = Config.MAX_MATCHES) -> List[Match]:
+    """Every location scoring above confidence, best first, one per object
+
+    Non-maximum suppression: after taking the best peak, every location whose
+    box would be centered within half a template of it is blanked, so one
+    icon gives one match instead of a cluster of neighbouring pixels.
+    """
+    template = get_template(image_path)
+    if template is None:
+        return []
+
+    with span("match_all", "vision", template=image_path):
+        start = time.perf_counter()
+        result = cv2.matchTemplate(frame.gray, template, cv2.TM_CCOEFF_NORMED)
+        h, w = template.shape
+        ox, oy = frame.origin
+        matches = []
+        best_score = None
+        for _ in range(max_matches):
+            _, max_val, _, (x, y) = cv2.minMaxLoc(result)
+            if best_score is None:
+                best_score = max_val
+            if max_val <= confidence:
+                break
+            matches.append(Match(x + ox, y + oy, w, h, float(max_val)))
+            result[max(0, y - h // 2):y + h // 2 + 1, max(0, x - w // 2):x + w // 2 + 1] = -1.0
+        point = (matches[0].left - ox, matches[0].top - oy) if matches else None
+        record_match(image_path, best_score, (time.perf_counter() - start) * 1000, bool(matches), point)
+    return matches
+
+
+def locate_all(image_path: str, confidence: float = Config.ACCURACY_THRESHOLD,
+               frame: Optional[Frame] = None) -> List[Match]:
+    """Every non-overlapping match of a cached template in the shared frame"""
+    if frame is None:
+        frame = get_frame()
+    return _all_matches(frame, image_path, confidence)
+
+
+_match_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _match_pool
+    if _match_pool is None:
+        _match_pool = ThreadPoolExecutor(max_workers=Config.MATCH_WORKERS, thread_name_prefix="match")
+    return _match_pool
+
+
+def _pool_map(func, items: Iterable) -> List:
+    """func over items on the match pool, run as the caller's game instance (traces, metrics)"""
+    instance = current_instance()
+
+    def run(item):
+        with using_instance(instance):
+            return func(item)
+    return list(_pool().map(run, items))
+
+
+def match_templates(image_paths: Iterable[str], frame: Optional[Frame] = None,
+                    confidences: Optional[Dict[str, float]] = None) -> Dict[str, Optional[Match]]:
+    """Best match and score of every template against one frame, matched in parallel
+
+    With confidences, each template searches its ROI hint first and only falls back
+    to the full frame when the hint scores below its threshold.
+    """
+    if frame is None:
+        frame = get_frame()
+    frame.gray  # Convert once before fanning out
+
+    # cv2.matchTemplate releases the GIL, so templates really run side by side
+    unique_paths = list(dict.fromkeys(image_paths))
+    confidences = confidences or {}
+    results = _pool_map(lambda image_path: _best_match(frame, image_path, confidences.get(image_path)),
+                        unique_paths)
+    return dict(zip(unique_paths, results))
+
+
+def match_all_templates(probes: Dict[str, float], frame: Optional[Frame] = None) -> Dict[str, List[Match]]:
+    """Every non-overlapping match per template (path -> confidence) from one frame, in parallel"""
+    if frame is None:
+        frame = get_frame()
+    frame.gray  # Convert once before fanning out
+    results = _pool_map(lambda image_path: _all_matches(frame, image_path, probes[image_path]), probes)
+    return dict(zip(probes, results))
 
 
 def _find_button(image_path: str) -> Optional[Tuple[int, int]]:
     """Find button position on screen using image recognition"""
-    if not os.path.exists(image_path):
-        print(f"Error: Image not found - {image_path}", flush=True)
+    if get_template(image_path) is None:
         return None
         
-    print(f"Searching for image: {image_path}", flush=True)
+    logger.debug(f"Searching for image: {image_path}")
     
     try:
-        template = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-        if template is None:
-            print(f"Error: Could not load image - {image_path}", flush=True)
-            return None
-            
-        screen = np.array(pyautogui.screenshot())
-        screen = cv2.cvtColor(screen, cv2.COLOR_RGB2GRAY)
+        from vision import get_vision
+        match = get_vision().find(image_path, Config.ACCURACY_THRESHOLD)
         
-        result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
-        _, max_val, _, max_loc = cv2.minMaxLoc(result)
-        
-        if max_val > Config.ACCURACY_THRESHOLD:
-            h, w = template.shape
-            random_x = max_loc[0] + random.randint(0, w)
-            random_y = max_loc[1] + random.randint(0, h)
-            print(f"Image found with accuracy: {max_val:.3f}")
+        if match:
+            random_x = match.left + random.randint(0, match.width)
+            random_y = match.top + random.randint(0, match.height)
+            logger.debug(f"Image found with accuracy: {match.score:.3f}")
             return (random_x, random_y)
     
     except Exception as e:
-        print(f"Error in image recognition: {e}", flush=True)
+        logger.error(f"Error in image recognition: {e}")
         
     return None
 
 
+def press_key(key: str):
+    """Press a key and expire the shared frame"""
+    with exclusive_input(), span("press_key", "input", key=key):
+        invalidate_frame()
+        pyautogui.press(key)
+
+
+def click_at(*args, **kwargs):
+    """pyautogui.click wrapper that expires the shared frame"""
+    with exclusive_input(), span("click", "input"):
+        invalidate_frame()
+        pyautogui.click(*args, **kwargs)
+
+
 def move_mouse_zigzag(target_x: int, target_y: int, duration: float = 0.5):
     """Move mouse in natural human-like pattern to target position"""
+    with exclusive_input(), span("move_mouse", "input"):
+        _move_mouse_zigzag(target_x, target_y, duration)
+
+
+def _move_mouse_zigzag(target_x: int, target_y: int, duration: float):
     import math
-    import time
     
+    invalidate_frame()
     current_x, current_y = pyautogui.position()
     distance = math.sqrt((target_x - current_x)**2 + (target_y - current_y)**2)
     
@@ -131,16 +511,28 @@ def move_mouse_zigzag(target_x: int, target_y: int, duration: float = 0.5):
         total_time += segment_duration
 
 
+def click_match(match: Match, name: str = "") -> Tuple[int, int]:
+    """Click a random point inside an already located match"""
+    position = (match.left + random.randint(0, match.width), match.top + random.randint(0, match.height))
+    logger.info(f"Clicking {name} at {position}")
+    duration = random.uniform(0.08, 0.20)  # Much faster: 0.08-0.20s
+    with exclusive_input():  # Move and click as one gesture
+        move_mouse_zigzag(*position, duration)
+        click_at()
+    return position
+
+
 def click_button(image_path: str) -> bool:
     """Click button if found"""
     position = _find_button(image_path)
     if position:
-        print(f"Clicking {os.path.basename(image_path)} at {position}", flush=True)
+        logger.info(f"Clicking {os.path.basename(image_path)} at {position}")
         duration = random.uniform(0.08, 0.20)  # Much faster: 0.08-0.20s
-        move_mouse_zigzag(*position, duration)
-        pyautogui.click()
+        with exclusive_input():
+            move_mouse_zigzag(*position, duration)
+            click_at()
         return True
-    print(f"Button not found: {os.path.basename(image_path)}", flush=True)
+    logger.info(f"Button not found: {os.path.basename(image_path)}")
     return False
 
 
@@ -149,4 +541,4 @@ def ensure_assets_directory():
     assets_dir = "assets"
     if not os.path.exists(assets_dir):
         os.makedirs(assets_dir)
-        print(f"Created {assets_dir} directory")
\ No newline at end of file
+        logger.info(f"Created {assets_dir} directory")
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""
+Screen capture backends - game-window grabs into reusable buffers
+"""
+import threading
+import cv2
+import numpy as np
+from typing import Dict, Optional, Tuple
+from bot_log import get_logger
+
+logger = get_logger("capture")
+
+Region = Tuple[int, int, int, int]  # left, top, width, height in screen pixels
+
+
+class Config:
+    """Capture configuration constants"""
+    BACKEND = "auto"  # "auto", "mss" or "pyautogui"
+    GAME_WINDOW_TITLE = "Rise of Kingdoms"
+    GAME_REGION: Optional[Region] = None  # Fixed capture rectangle, overrides window lookup
+
+
+class Capture:
+    """Raw pixels of one grab plus how to read them"""
+
+    def __init__(self, pixels: np.ndarray, to_gray: int, to_rgb: Optional[int], origin: Tuple[int, int]):
+        self.pixels = pixels
+        self.to_gray = to_gray  # cv2 conversion code to grayscale
+        self.to_rgb = to_rgb  # cv2 conversion code to RGB, None when already RGB
+        self.origin = origin  # Screen position of pixel (0, 0)
+
+
+class CaptureBackend:
+    """Grab a screen region"""
+    name = "base"
+
+    def grab(self, region: Optional[Region]) -> Capture:
+        raise NotImplementedError
+
+
+class PyAutoGUICapture(CaptureBackend):
+    """pyautogui.screenshot - PIL round trip, works everywhere"""
+    name = "pyautogui"
+
+    def grab(self, region: Optional[Region]) -> Capture:
+        import pyautogui
+        image = pyautogui.screenshot(region=region) if region else pyautogui.screenshot()
+        origin = (region[0], region[1]) if region else (0, 0)
+        return Capture(np.asarray(image), cv2.COLOR_RGB2GRAY, None, origin)
+
+
+class MssCapture(CaptureBackend):
+    """mss grab (XShm on Linux, BitBlt on Windows) viewed in place as BGRA"""
+    name = "mss"
+
+    def __init__(self):
+        import mss  # noqa: F401 - fail early when missing
+        self._local = threading.local()  # mss handles are per thread
+
+    def _handle(self):
+        handle = getattr(self._local, 'handle', None)
+        if handle is None:
+            import mss
+            handle = mss.mss()
+            self._local.handle = handle
+        return handle
+
+    def grab(self, region: Optional[Region]) -> Capture:
+        handle = self._handle()
+        if region:
+            monitor = {'left': region[0], 'top': region[1], 'width': region[2], 'height': region[3]}
+        else:
+            monitor = handle.monitors[1]
+        shot = handle.grab(monitor)
+        # No copy: numpy view over mss's own BGRA buffer
+        pixels = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        return Capture(pixels, cv2.COLOR_BGRA2GRAY, cv2.COLOR_BGRA2RGB, (monitor['left'], monitor['top']))
+
+
+_backend: Optional[CaptureBackend] = None
+_gray_buffers: Dict[Tuple[Optional[str], int, int], np.ndarray] = {}
+
+
+def get_backend() -> CaptureBackend:
+    """Active capture backend, picking the fastest available one first time"""
+    global _backend
+    if _backend is None:
+        if Config.BACKEND in ("auto", "mss"):
+            try:
+                _backend = MssCapture()
+            except ImportError:
+                if Config.BACKEND == "mss":
+                    raise
+        if _backend is None:
+            _backend = PyAutoGUICapture()
+        logger.info(f"Screen capture backend: {_backend.name}")
+    return _backend
+
+
+def set_backend(backend: Optional[CaptureBackend]):
+    """Force a capture backend, None to auto-detect again"""
+    global _backend
+    _backend = backend
+
+
+_UNSET = object()
+_game_region = _UNSET
+
+
+def game_region() -> Optional[Region]:
+    """Capture rectangle, looked up once per process"""
+    global _game_region
+    if _game_region is _UNSET:
+        _game_region = find_game_window()
+        if _game_region:
+            logger.info(f"Capturing game window at {_game_region}")
+    return _game_region
+
+
+def set_game_region(region: Optional[Region]):
+    """Pin the capture rectangle, None for the whole screen"""
+    global _game_region
+    _game_region = region
+
+
+def find_game_window() -> Optional[Region]:
+    """Game window rectangle, None to capture the whole screen"""
+    if Config.GAME_REGION:
+        return Config.GAME_REGION
+    try:
+        import pygetwindow
+        windows = [w for w in pygetwindow.getWindowsWithTitle(Config.GAME_WINDOW_TITLE) if w.width > 0]
+    except Exception:
+        return None
+    if not windows:
+        return None
+    window = windows[0]
+    return (window.left, window.top, window.width, window.height)
+
+
+def to_gray(capture: Capture, slot: Optional[str] = None) -> np.ndarray:
+    """Grayscale conversion written into a buffer reused across captures of the same size
+
+    The returned array is overwritten by the next capture's conversion in the
+    same slot, so it must not outlive its frame. Each game instance converts
+    into its own slot.
+    """
+    h, w = capture.pixels.shape[:2]
+    buffer = _gray_buffers.get((slot, h, w))
+    if buffer is None:
+        buffer = np.empty((h, w), dtype=np.uint8)
+        _gray_buffers[(slot, h, w)] = buffer
+    cv2.cvtColor(capture.pixels, capture.to_gray, dst=buffer)
+    return buffer
+
+
+def to_rgb(capture: Capture, left: int, top: int, width: int, height: int) -> np.ndarray:
+    """RGB pixels of a capture-local rectangle, converting only that rectangle"""
+    pixels = capture.pixels[top:top + height, left:left + width]
+    if capture.to_rgb is None:
+        return pixels
+    return cv2.cvtColor(pixels, capture.to_rgb)
@@ -0,0 +1,98 @@
+"""
+Frame fingerprints and a match memo - skip matchTemplate when the screen has not changed
+
+Each frame gets a block-mean signature: the grayscale frame averaged down to
+one value per CELL_SIZE x CELL_SIZE block. A match result is remembered with
+the signature cells covering the area that was searched. When a later frame
+has the same cells there, the same template gets the same answer without
+being matched again.
+"""
+import math
+import threading
+import cv2
+import numpy as np
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class Config:
+    """Match memo configuration constants"""
+    ENABLED = True
+    CELL_SIZE = 16  # Frame pixels per signature cell side
+    TOLERANCE = 1  # Max per-cell difference of block means still counted as unchanged
+    MAX_ENTRIES = 512  # Remembered (slot, template, confidence) results
+
+
+def fingerprint(gray: np.ndarray, cell_size: int = Config.CELL_SIZE) -> Optional[np.ndarray]:
+    """Block means of a grayscale frame, a new array independent of the frame buffer
+
+    Cells are aligned to the frame origin; when the size is not a multiple of
+    cell_size, one more row/column of cells covers the last cell_size pixels.
+    None for frames smaller than a cell.
+    """
+    h, w = gray.shape
+    rows, cols = h // cell_size, w // cell_size
+    if rows == 0 or cols == 0:
+        return None
+    # Whole cells only: an integer downscale takes the fast INTER_AREA path
+    signature = cv2.resize(gray[:rows * cell_size, :cols * cell_size], (cols, rows), interpolation=cv2.INTER_AREA)
+    if h % cell_size:
+        bottom = cv2.resize(gray[h - cell_size:, :cols * cell_size], (cols, 1), interpolation=cv2.INTER_AREA)
+        signature = np.vstack((signature, bottom))
+    if w % cell_size:
+        right = cv2.resize(gray[:, w - cell_size:], (1, signature.shape[0]), interpolation=cv2.INTER_AREA)
+        signature = np.hstack((signature, right))
+    return signature
+
+
+def _cells(signature: np.ndarray, region: Optional[Tuple[int, int, int, int]],
+           cell_size: int = Config.CELL_SIZE) -> np.ndarray:
+    """Signature cells overlapping a frame-local region, all of them for None"""
+    if region is None:
+        return signature
+    left, top, width, height = region
+    return signature[top // cell_size:math.ceil((top + height) / cell_size),
+                     left // cell_size:math.ceil((left + width) / cell_size)]
+
+
+class MatchMemo:
+    """Last match per template, valid while the searched area's signature is unchanged"""
+
+    def __init__(self, max_entries: int = Config.MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (template, frame size, region, cells, match)
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, template: np.ndarray, signature: np.ndarray,
+            frame_size: Tuple[int, int]):
+        """Remembered match when nothing changed in its area, otherwise None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        cached_template, cached_size, region, cells, match = entry
+        if cached_template is not template or cached_size != frame_size:
+            return None  # Template reloaded or window resized
+        current = _cells(signature, region)
+        if current.shape != cells.shape:
+            return None
+        if cv2.absdiff(current, cells).max() > Config.TOLERANCE:
+            return None
+        return match
+
+    def put(self, key: tuple, template: np.ndarray, signature: np.ndarray,
+            frame_size: Tuple[int, int], region: Optional[Tuple[int, int, int, int]], match):
+        """Remember a match found by searching region (None for the whole frame)"""
+        cells = _cells(signature, region).copy()
+        with self._lock:
+            self._entries[key] = (template, frame_size, region, cells, match)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Forget every remembered match"""
+        with self._lock:
+            self._entries.clear()
+
+
+match_memo = MatchMemo()
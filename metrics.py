@@ -0,0 +1,264 @@
+"""
+Metrics - per-template match statistics, step and activity outcomes
+
+Counters and histograms live in memory and are exported in the Prometheus
+text format, both as a snapshot file rewritten every SNAPSHOT_INTERVAL
+seconds and, when HTTP_PORT is set, on http://HTTP_HOST:HTTP_PORT/metrics.
+
+    rok_template_calls_total{template="assets/fog/scout_camp.png"} 42
+    rok_template_score_bucket{template="...",le="0.8"} 3
+    rok_step_total{sequence="infantry",step="Click(infantry_house.png)",outcome="ok"} 12
+
+In multi-instance mode every series also carries instance="<name>" of the
+game window that recorded it.
+"""
+import atexit
+import bisect
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from bot_log import get_logger
+from multi_instance import current_instance
+
+logger = get_logger("metrics")
+
+
+class Config:
+    """Metrics configuration constants"""
+    SNAPSHOT_PATH = "logs/metrics.prom"
+    SNAPSHOT_INTERVAL = 60.0  # Seconds between snapshot rewrites
+    HTTP_HOST = "127.0.0.1"
+    HTTP_PORT: Optional[int] = None  # e.g. 9108 to serve /metrics, None disables the endpoint
+    SCORE_BUCKETS = (0.3, 0.4, 0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1.0)
+    LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+    MEMO_LATENCY_BUCKETS_MS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1)
+    STEP_BUCKETS_S = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Count one value"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, count) pairs including +Inf"""
+        pairs, running = [], 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            running += count
+            pairs.append(("+Inf" if bound == float('inf') else f"{bound:g}", running))
+        return pairs
+
+
+class HitBox:
+    """Bounding box of every hit of a template, top-left corners in frame coordinates"""
+
+    def __init__(self):
+        self.left = self.top = float('inf')
+        self.right = self.bottom = float('-inf')
+
+    def add(self, x: int, y: int):
+        """Grow the box to include a hit"""
+        self.left, self.top = min(self.left, x), min(self.top, y)
+        self.right, self.bottom = max(self.right, x), max(self.bottom, y)
+
+
+class Registry:
+    """Thread-safe counters, histograms and template hit boxes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.hit_boxes: Dict[Labels, HitBox] = {}  # Keyed by template (and instance) labels
+
+    def inc(self, name: str, labels: Labels, value: float = 1.0):
+        """Add to a counter"""
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0.0) + value
+
+    def observe(self, name: str, labels: Labels, value: float, buckets: Sequence[float]):
+        """Add a value to a histogram, created with buckets on first use"""
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(buckets)
+            histogram.observe(value)
+
+    def record_hit(self, labels: Labels, x: int, y: int):
+        """Grow the hit box of a template series"""
+        with self._lock:
+            box = self.hit_boxes.get(labels)
+            if box is None:
+                box = self.hit_boxes[labels] = HitBox()
+            box.add(x, y)
+
+    def clear(self):
+        """Drop everything recorded"""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.hit_boxes.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition of everything recorded"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    for le, count in histogram.cumulative():
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total:.6g}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+            if self.hit_boxes:
+                lines.append("# TYPE rok_template_hit_box gauge")
+                for box_labels, box in sorted(self.hit_boxes.items()):
+                    for edge in ("left", "top", "right", "bottom"):
+                        labels = box_labels + (('edge', edge),)
+                        lines.append(f"rok_template_hit_box{_format_labels(labels)} {getattr(box, edge):g}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+registry = Registry()
+
+
+def _labels(*pairs: Tuple[str, str]) -> Labels:
+    """Labels of a series, led by the game instance in multi-instance mode"""
+    instance = current_instance()
+    if instance is None:
+        return pairs
+    return (('instance', instance.name),) + pairs
+
+
+def record_match(template: str, score: Optional[float], latency_ms: float,
+                 hit: Optional[bool] = None, point: Optional[Tuple[int, int]] = None):
+    """One template search: best score, time spent and whether it cleared its threshold"""
+    labels = _labels(('template', template))
+    registry.inc("rok_template_calls_total", labels)
+    registry.observe("rok_template_latency_ms", labels, latency_ms, Config.LATENCY_BUCKETS_MS)
+    if score is not None:
+        registry.observe("rok_template_score", labels, score, Config.SCORE_BUCKETS)
+    if hit:
+        registry.inc("rok_template_hits_total", labels)
+        if point is not None:
+            registry.record_hit(labels, *point)
+
+
+def record_memo_hit(template: str, latency_ms: float):
+    """Template search answered from the match memo because its area was unchanged"""
+    labels = _labels(('template', template))
+    registry.inc("rok_template_memo_hits_total", labels)
+    registry.observe("rok_template_memo_latency_ms", labels, latency_ms, Config.MEMO_LATENCY_BUCKETS_MS)
+
+
+def record_step(sequence: str, step: str, ok: bool, seconds: float):
+    """Outcome and duration of one sequence step"""
+    labels = _labels(('sequence', sequence), ('step', step))
+    registry.inc("rok_step_total", labels + (('outcome', "ok" if ok else "fail"),))
+    registry.observe("rok_step_seconds", labels, seconds, Config.STEP_BUCKETS_S)
+
+
+def record_button(button: str, ok: bool, seconds: float):
+    """Outcome of one wait-and-click, with the time spent waiting for the button"""
+    labels = _labels(('button', button))
+    registry.inc("rok_button_total", labels + (('outcome', "ok" if ok else "fail"),))
+    registry.observe("rok_button_wait_seconds", labels, seconds, Config.STEP_BUCKETS_S)
+
+
+def record_activity(activity: str, result: str):
+    """Result of one scheduled activity"""
+    registry.inc("rok_activity_total", _labels(('activity', activity), ('result', result)))
+
+
+def write_snapshot(path: str = Config.SNAPSHOT_PATH):
+    """Write the current metrics atomically"""
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(registry.render())
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.error(f"Error writing metrics snapshot: {e}")
+
+
+def _serve(host: str, port: int):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes would flood the bot log
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Metrics on http://{host}:{port}/metrics")
+
+
+_exporter_started = False
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(interval: float = Config.SNAPSHOT_INTERVAL, port: Optional[int] = None):
+    """Start periodic snapshots, and the HTTP endpoint when a port is configured"""
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+
+    def snapshot_loop():
+        while True:
+            time.sleep(interval)
+            write_snapshot()
+
+    threading.Thread(target=snapshot_loop, name="metrics-snapshot", daemon=True).start()
+    atexit.register(write_snapshot)
+    port = Config.HTTP_PORT if port is None else port
+    if port:
+        try:
+            _serve(Config.HTTP_HOST, port)
+        except OSError as e:
+            logger.error(f"Error starting metrics endpoint: {e}")
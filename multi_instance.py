@@ -0,0 +1,243 @@
+"""
+Multi-instance orchestration - several emulator windows driven from one process
+
+Usage: python multi_instance.py [instances.json]
+
+instances.json lists the game windows, each with a fixed region or a window
+title to look up:
+
+    [
+        {"name": "main", "window_title": "BlueStacks 1"},
+        {"name": "farm", "region": [960, 0, 960, 540]}
+    ]
+
+Every instance runs the combo bot in its own thread. Screen captures are
+shared: one grab of the area covering all windows serves every instance
+that needs a fresh frame. Mouse and keyboard are serialized through one
+input lock, so while one instance sleeps between steps another can click.
+"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from capture import Capture, Region
+from capture import get_backend as get_capture_backend
+from bot_log import get_logger
+
+logger = get_logger("multi_instance")
+
+
+class Config:
+    """Multi-instance configuration constants"""
+    INSTANCES_PATH = "instances.json"
+    START_STAGGER = 1.0  # Seconds between instance starts, avoids a burst of identical grabs
+
+
+class Instance:
+    """One game window and the per-window state the shared modules keep"""
+
+    def __init__(self, name: str, region: Region, window_title: Optional[str] = None):
+        self.name = name
+        self.region = region
+        self.window_title = window_title
+        self.frame = None  # Shared bot_utils.Frame of this window
+        self.input_at = 0.0  # time.monotonic() of the last input sent to this window
+
+    def invalidate(self):
+        """Expire the window's frame because input was just sent to it"""
+        self.frame = None
+        self.input_at = time.monotonic()
+
+    def focus(self):
+        """Bring the window to the front so key presses reach it"""
+        if not self.window_title:
+            return
+        try:
+            import pygetwindow
+            windows = pygetwindow.getWindowsWithTitle(self.window_title)
+            if windows:
+                windows[0].activate()
+        except Exception as e:
+            logger.warning(f"Could not focus {self.name}: {e}")
+
+    def __repr__(self):
+        return f"Instance({self.name!r}, {self.region})"
+
+
+_local = threading.local()
+
+
+def current_instance() -> Optional[Instance]:
+    """Instance bound to the calling thread, None in single-instance mode"""
+    return getattr(_local, 'instance', None)
+
+
+@contextmanager
+def using_instance(instance: Optional[Instance]):
+    """Bind an instance to the calling thread"""
+    previous = current_instance()
+    _local.instance = instance
+    try:
+        yield instance
+    finally:
+        _local.instance = previous
+
+
+_input_lock = threading.RLock()
+_focused: Optional[Instance] = None
+
+
+@contextmanager
+def exclusive_input():
+    """Hold the mouse and keyboard, focusing the caller's window first"""
+    global _focused
+    with _input_lock:
+        instance = current_instance()
+        if instance is not None and _focused is not instance:
+            instance.focus()
+            _focused = instance
+        yield
+
+
+class SharedGrabber:
+    """One screen grab covering every instance, sliced per window"""
+
+    def __init__(self, instances: List[Instance]):
+        self.instances = instances
+        lefts = [i.region[0] for i in instances]
+        tops = [i.region[1] for i in instances]
+        rights = [i.region[0] + i.region[2] for i in instances]
+        bottoms = [i.region[1] + i.region[3] for i in instances]
+        self.union: Region = (min(lefts), min(tops), max(rights) - min(lefts), max(bottoms) - min(tops))
+        self._lock = threading.Lock()
+        self._capture: Optional[Capture] = None
+        self._captured_at = 0.0
+        self.grabs = 0
+
+    def grab(self, instance: Instance, max_age: float) -> Capture:
+        """Capture of the instance's window taken after its last input"""
+        with self._lock:
+            now = time.monotonic()
+            if (self._capture is None or self._captured_at <= instance.input_at
+                    or now - self._captured_at > max_age):
+                self._capture = get_capture_backend().grab(self.union)
+                self._captured_at = now
+                self.grabs += 1
+            union = self._capture
+        return self._slice(union, instance.region)
+
+    def _slice(self, union: Capture, region: Region) -> Capture:
+        left = region[0] - union.origin[0]
+        top = region[1] - union.origin[1]
+        pixels = union.pixels[top:top + region[3], left:left + region[2]]
+        return Capture(pixels, union.to_gray, union.to_rgb, (region[0], region[1]))
+
+
+_grabber: Optional[SharedGrabber] = None
+
+
+def shared_grabber() -> Optional[SharedGrabber]:
+    """Grabber of the running orchestrator, None in single-instance mode"""
+    return _grabber
+
+
+def _resolve_region(entry: dict) -> Optional[Region]:
+    region = entry.get('region')
+    if region and len(region) == 4:
+        return tuple(int(v) for v in region)
+    title = entry.get('window_title')
+    if not title:
+        return None
+    try:
+        import pygetwindow
+        windows = [w for w in pygetwindow.getWindowsWithTitle(title) if w.width > 0]
+    except Exception:
+        return None
+    if not windows:
+        return None
+    window = windows[0]
+    return (window.left, window.top, window.width, window.height)
+
+
+def load_instances(path: str = Config.INSTANCES_PATH) -> List[Instance]:
+    """Read instances.json, skipping windows that cannot be located"""
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    instances = []
+    for index, entry in enumerate(entries):
+        name = entry.get('name') or f"instance{index + 1}"
+        region = _resolve_region(entry)
+        if region is None:
+            logger.info(f"Skipping {name}: no region and window not found")
+            continue
+        instances.append(Instance(name, region, entry.get('window_title')))
+    return instances
+
+
+def _run_instance(instance: Instance, stop_flag: threading.Event):
+    """Combo bot loop of one window"""
+    import ComboFogBarTroopBot as combo
+
+    with using_instance(instance):
+        scheduler = combo.create_scheduler()
+        while not stop_flag.is_set():
+            try:
+                combo.run_cycle(scheduler, stop_flag)
+            except Exception as e:
+                logger.error(f"Unexpected error: {e}")
+                time.sleep(combo.Config.get_random_delay())
+
+
+def run(instances: List[Instance]) -> Tuple[SharedGrabber, List[threading.Thread]]:
+    """Start one bot thread per instance sharing grabs and input"""
+    global _grabber
+    import ComboFogBarTroopBot as combo
+
+    _grabber = SharedGrabber(instances)
+    logger.info(f"Capturing {len(instances)} windows from one grab of {_grabber.union}")
+    threads = []
+    for instance in instances:
+        thread = threading.Thread(target=_run_instance, args=(instance, combo.stop_bot_flag),
+                                  name=instance.name, daemon=True)
+        thread.start()
+        threads.append(thread)
+        time.sleep(Config.START_STAGGER)
+    return _grabber, threads
+
+
+def main():
+    import ComboFogBarTroopBot as combo
+    from bot_utils import ensure_assets_directory
+    from sequences import preload_assets
+    from metrics import start_exporter
+    from scale_calibration import calibrate_templates
+    import pyautogui
+
+    path = sys.argv[1] if len(sys.argv) > 1 else Config.INSTANCES_PATH
+    instances = load_instances(path)
+    if not instances:
+        logger.info(f"No usable instances in {path}")
+        return
+
+    ensure_assets_directory()
+    preload_assets()
+    calibrate_templates()  # Instances share the template cache, so they must share one window size
+    start_exporter()
+    pyautogui.FAILSAFE = True
+    pyautogui.PAUSE = combo.Config.SCREENSHOT_PAUSE
+    threading.Thread(target=combo.monitor_f12_key, daemon=True).start()
+
+    grabber, threads = run(instances)
+    try:
+        while any(thread.is_alive() for thread in threads) and not combo.stop_bot_flag.is_set():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        combo.stop_bot_flag.set()
+    logger.info(f"Stopped after {grabber.grabs} shared grabs")
+
+
+if __name__ == "__main__":
+    main()
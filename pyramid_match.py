@@ -0,0 +1,181 @@
+"""
+Coarse-to-fine template matching for large screens
+"""
+import os
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Hashable, List, Tuple
+
+
+class Config:
+    """Pyramid matcher configuration constants"""
+    ENABLED = True
+    SCALE = 0.5  # Coarse level size relative to full resolution
+    MIN_FRAME_PIXELS = 2560 * 1440  # Smaller frames are fast enough brute force
+    MIN_COARSE_SIDE = 10  # Template must keep at least this many pixels per side when downscaled
+    CANDIDATES = 3  # Coarse peaks refined at full resolution
+    REFINE_PAD = 3  # Extra full-resolution pixels searched around each peak
+
+
+_coarse_lock = threading.Lock()
+_coarse_cache = {}  # (slot, scale) -> (source array, downscaled array), one frame per instance and scale
+
+
+def _downscale(image: np.ndarray, scale: float) -> np.ndarray:
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def _coarse_frame(gray: np.ndarray, scale: float, slot: Hashable = None) -> np.ndarray:
+    """Downscaled frame, computed once per frame even across threads"""
+    with _coarse_lock:
+        cached = _coarse_cache.get((slot, scale))
+        if cached is not None and cached[0] is gray:
+            return cached[1]
+        coarse = _downscale(gray, scale)
+        _coarse_cache[(slot, scale)] = (gray, coarse)
+        return coarse
+
+
+def clear_cache(slot: Hashable = None):
+    """Forget the slot's downscaled frames, called on every new capture of that instance"""
+    with _coarse_lock:
+        for key in [key for key in _coarse_cache if key[0] == slot]:
+            del _coarse_cache[key]
+
+
+def should_use_pyramid(gray: np.ndarray, template: np.ndarray, scale: float = Config.SCALE) -> bool:
+    """Only big frames with templates that survive downscaling benefit"""
+    if not Config.ENABLED:
+        return False
+    if gray.shape[0] * gray.shape[1] < Config.MIN_FRAME_PIXELS:
+        return False
+    return min(template.shape) * scale >= Config.MIN_COARSE_SIDE
+
+
+def _coarse_peaks(result: np.ndarray, count: int, suppress: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Top peaks of a match map, blanking a template-sized area around each"""
+    result = result.copy()
+    peaks = []
+    sw, sh = suppress
+    for _ in range(count):
+        _, max_val, _, (x, y) = cv2.minMaxLoc(result)
+        if max_val <= -1.0:
+            break
+        peaks.append((x, y))
+        result[max(0, y - sh):y + sh + 1, max(0, x - sw):x + sw + 1] = -1.0
+    return peaks
+
+
+def match_pyramid(gray: np.ndarray, template: np.ndarray, scale: float = Config.SCALE,
+                  slot: Hashable = None) -> Tuple[Tuple[int, int], float]:
+    """Best (location, score) with the score taken at full resolution
+
+    The coarse pass only picks candidate positions. Every candidate is
+    re-scored with TM_CCOEFF_NORMED at full resolution, so thresholds mean
+    exactly what they mean for the brute-force path. slot names the game
+    instance owning gray, None in single-instance mode.
+    """
+    coarse_gray = _coarse_frame(gray, scale, slot)
+    coarse_template = _downscale(template, scale)
+    coarse_result = cv2.matchTemplate(coarse_gray, coarse_template, cv2.TM_CCOEFF_NORMED)
+    ch, cw = coarse_template.shape
+    peaks = _coarse_peaks(coarse_result, Config.CANDIDATES, (cw // 2, ch // 2))
+
+    h, w = template.shape
+    frame_h, frame_w = gray.shape
+    pad = int(round(1 / scale)) + Config.REFINE_PAD
+    best_loc, best_val = (0, 0), -1.0
+    for cx, cy in peaks:
+        left = max(0, int(cx / scale) - pad)
+        top = max(0, int(cy / scale) - pad)
+        right = min(frame_w, int(cx / scale) + w + pad)
+        bottom = min(frame_h, int(cy / scale) + h + pad)
+        result = cv2.matchTemplate(gray[top:bottom, left:right], template, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        if max_val > best_val:
+            best_loc, best_val = (left + max_loc[0], top + max_loc[1]), max_val
+    return best_loc, best_val
+
+
+def match_brute_force(gray: np.ndarray, template: np.ndarray) -> Tuple[Tuple[int, int], float]:
+    """Best (location, score) over the whole frame at full resolution"""
+    result = cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    return max_loc, max_val
+
+
+def benchmark(screenshot_dir: str, template_paths: List[str], threshold: float = 0.7,
+              repeats: int = 3) -> dict:
+    """Compare pyramid and brute-force matching on recorded screenshots"""
+    screenshots = sorted(
+        os.path.join(screenshot_dir, name) for name in os.listdir(screenshot_dir)
+        if name.lower().endswith('.png')
+    )
+    templates = {path: cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in template_paths}
+    templates = {path: template for path, template in templates.items() if template is not None}
+
+    brute_ms, pyramid_ms = [], []
+    disagreements = []
+    compared = 0
+    for screenshot_path in screenshots:
+        gray = cv2.imread(screenshot_path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            continue
+        for path, template in templates.items():
+            if template.shape[0] > gray.shape[0] or template.shape[1] > gray.shape[1]:
+                continue
+            if min(template.shape) * Config.SCALE < Config.MIN_COARSE_SIDE:
+                continue  # Always brute force in production
+            for _ in range(repeats):
+                start = time.perf_counter()
+                brute = match_brute_force(gray, template)
+                brute_ms.append((time.perf_counter() - start) * 1000)
+
+                clear_cache()  # Count the frame downscale in every run
+                start = time.perf_counter()
+                pyramid = match_pyramid(gray, template)
+                pyramid_ms.append((time.perf_counter() - start) * 1000)
+
+            compared += 1
+            brute_hit = brute[1] > threshold
+            pyramid_hit = pyramid[1] > threshold
+            same_place = abs(brute[0][0] - pyramid[0][0]) <= 2 and abs(brute[0][1] - pyramid[0][1]) <= 2
+            if brute_hit != pyramid_hit or (brute_hit and not same_place):
+                disagreements.append((screenshot_path, path, brute, pyramid))
+
+    return {
+        'screenshots': len(screenshots),
+        'templates': len(templates),
+        'compared': compared,
+        'brute_median_ms': float(np.median(brute_ms)) if brute_ms else 0.0,
+        'pyramid_median_ms': float(np.median(pyramid_ms)) if pyramid_ms else 0.0,
+        'disagreements': disagreements
+    }
+
+
+def main():
+    """Usage: python pyramid_match.py <screenshot_dir> [template.png ...]"""
+    if len(sys.argv) < 2:
+        print(main.__doc__)
+        return
+    template_paths = sys.argv[2:]
+    if not template_paths:
+        from sequences import collect_asset_paths
+        template_paths = sorted(set(collect_asset_paths()))
+
+    report = benchmark(sys.argv[1], template_paths)
+    print(f"Screenshots: {report['screenshots']}, templates: {report['templates']}, "
+          f"pyramid-eligible comparisons: {report['compared']}")
+    print(f"Brute force median: {report['brute_median_ms']:.2f} ms")
+    print(f"Pyramid median:     {report['pyramid_median_ms']:.2f} ms")
+    print(f"Hit/miss or location disagreements: {len(report['disagreements'])}")
+    for screenshot_path, path, brute, pyramid in report['disagreements']:
+        print(f"  {os.path.basename(screenshot_path)} {path}: brute {brute[1]:.3f}@{brute[0]} "
+              f"pyramid {pyramid[1]:.3f}@{pyramid[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Replay harness - run sequences headless against recorded screenshot streams
+
+Usage: python replay.py <frames_dir> <sequence> [--loop] [--seed N]
+
+The driver stands in for pyautogui: screenshot/locateOnScreen read the
+current recorded frame, and every click or key press advances to the next
+frame. time.sleep is replaced by a virtual clock so a run finishes as fast
+as the CPU allows while still reporting the wall time the bot would have
+spent; time.monotonic advances by the slept time too, so timeouts expire
+as they would live. random is seeded so click jitter and delays repeat run to run.
+"""
+import os
+import random
+import sys
+import time
+import types
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+Box = namedtuple('Box', 'left top width height')
+Point = namedtuple('Point', 'x y')
+
+
+class ReplayEvent(namedtuple('ReplayEvent', 'virtual_time kind args frame_index')):
+    """One recorded input or capture event"""
+
+
+class ImageNotFoundException(Exception):
+    """Mirror of pyautogui.ImageNotFoundException"""
+
+
+class ReplayDriver:
+    """Deterministic stand-in for pyautogui backed by a directory of frames"""
+
+    def __init__(self, frames_dir: str, loop: bool = False, screen_size: Optional[tuple] = None, seed: int = 0):
+        self.frames = sorted(
+            os.path.join(frames_dir, name) for name in os.listdir(frames_dir)
+            if name.lower().endswith('.png')
+        )
+        if not self.frames:
+            raise ValueError(f"No .png frames in {frames_dir}")
+        self.loop = loop
+        self.seed = seed
+        self.index = 0
+        self.virtual_time = 0.0
+        self.events: List[ReplayEvent] = []
+        self.mouse = (0, 0)
+        self._decoded: Dict[int, np.ndarray] = {}
+        self._screen_size = screen_size
+
+    # Frame stream
+
+    def current_rgb(self) -> np.ndarray:
+        """Decoded RGB pixels of the current frame"""
+        rgb = self._decoded.get(self.index)
+        if rgb is None:
+            bgr = cv2.imread(self.frames[self.index], cv2.IMREAD_COLOR)
+            if bgr is None:
+                raise ValueError(f"Could not read frame {self.frames[self.index]}")
+            rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+            self._decoded[self.index] = rgb
+        return rgb
+
+    def advance(self):
+        """Move to the next recorded frame after an input event"""
+        if self.index + 1 < len(self.frames):
+            self.index += 1
+        elif self.loop:
+            self.index = 0
+
+    def _record(self, kind: str, *args):
+        self.events.append(ReplayEvent(self.virtual_time, kind, args, self.index))
+
+    # pyautogui surface
+
+    def screenshot(self, region=None):
+        self._record('screenshot')
+        rgb = self.current_rgb()
+        if region is not None:
+            left, top, width, height = region
+            rgb = rgb[top:top + height, left:left + width]
+        try:
+            from PIL import Image
+            return Image.fromarray(rgb)
+        except ImportError:
+            return rgb
+
+    def size(self):
+        if self._screen_size:
+            return self._screen_size
+        h, w = self.current_rgb().shape[:2]
+        return (w, h)
+
+    def _match_map(self, image, region=None):
+        template = cv2.imread(image, cv2.IMREAD_GRAYSCALE) if isinstance(image, str) else image
+        if template is None:
+            raise OSError(f"Could not read {image}")
+        gray = cv2.cvtColor(self.current_rgb(), cv2.COLOR_RGB2GRAY)
+        left = top = 0
+        if region is not None:
+            left, top, width, height = region
+            gray = gray[top:top + height, left:left + width]
+        return cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED), template.shape, left, top
+
+    def locateOnScreen(self, image, confidence: float = 0.999, region=None, **kwargs):
+        self._record('locate', image)
+        result, (h, w), left, top = self._match_map(image, region)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        if max_val < confidence:
+            return None
+        return Box(left + max_loc[0], top + max_loc[1], w, h)
+
+    def locateAllOnScreen(self, image, confidence: float = 0.999, region=None, **kwargs):
+        self._record('locate_all', image)
+        result, (h, w), left, top = self._match_map(image, region)
+        ys, xs = np.where(result >= confidence)
+        return [Box(left + int(x), top + int(y), w, h) for y, x in zip(ys, xs)]
+
+    def position(self):
+        return Point(*self.mouse)
+
+    def moveTo(self, x=None, y=None, duration: float = 0.0, tween=None, **kwargs):
+        if x is not None and y is not None:
+            self.mouse = (int(x), int(y))
+        self.virtual_time += duration or 0.0
+        self._record('move', self.mouse)
+
+    def click(self, x=None, y=None, *args, **kwargs):
+        if isinstance(x, (tuple, list)):
+            if len(x) == 4:
+                x, y = x[0] + x[2] // 2, x[1] + x[3] // 2
+            else:
+                x, y = x[0], x[1]
+        if x is not None and y is not None:
+            self.mouse = (int(x), int(y))
+        self._record('click', self.mouse)
+        self.advance()
+
+    def press(self, keys, *args, **kwargs):
+        self._record('press', keys)
+        self.advance()
+
+    def sleep(self, seconds: float):
+        self.virtual_time += max(0.0, seconds)
+
+    def monotonic(self) -> float:
+        """Real elapsed time plus everything slept on the virtual clock"""
+        return _real_monotonic() + self.virtual_time
+
+    def as_module(self) -> types.ModuleType:
+        """Build a pyautogui-shaped module bound to this driver"""
+        module = types.ModuleType('pyautogui')
+        for name in ('screenshot', 'size', 'locateOnScreen', 'locateAllOnScreen',
+                     'position', 'moveTo', 'click', 'press'):
+            setattr(module, name, getattr(self, name))
+        linear = lambda n: n
+        for name in ('linear', 'easeInQuad', 'easeOutQuad', 'easeInOutQuad'):
+            setattr(module, name, linear)
+        module.ImageNotFoundException = ImageNotFoundException
+        module.FAILSAFE = False
+        module.PAUSE = 0.0
+        module.replay_driver = self
+        return module
+
+
+_real_sleep = time.sleep
+_real_monotonic = time.monotonic
+
+
+def install(driver: ReplayDriver):
+    """Route pyautogui and time.sleep through the driver
+
+    Must run before bot_utils/sequences are imported when pyautogui itself
+    cannot load (e.g. no display on a CI box).
+    """
+    try:
+        import pyautogui
+        for name in ('screenshot', 'size', 'locateOnScreen', 'locateAllOnScreen',
+                     'position', 'moveTo', 'click', 'press'):
+            setattr(pyautogui, name, getattr(driver, name))
+        pyautogui.PAUSE = 0.0
+        pyautogui.FAILSAFE = False
+    except Exception:
+        sys.modules['pyautogui'] = driver.as_module()
+    time.sleep = driver.sleep
+    time.monotonic = driver.monotonic
+    random.seed(driver.seed)
+
+    # Recorded frames are whole screens read through pyautogui.screenshot
+    import capture
+    capture.set_backend(capture.PyAutoGUICapture())
+    capture.set_game_region(None)
+
+    # Fresh frames for a fresh stream
+    if 'bot_utils' in sys.modules:
+        sys.modules['bot_utils'].invalidate_frame()
+
+
+def uninstall():
+    """Restore the real time.sleep and time.monotonic"""
+    time.sleep = _real_sleep
+    time.monotonic = _real_monotonic
+
+
+def _sequence_runners() -> Dict[str, Callable]:
+    from sequences import (
+        execute_fog_scout_sequence,
+        execute_barbarian_farm_sequence,
+        execute_infantry_sequence,
+        execute_archers_sequence,
+        execute_cavalry_sequence,
+        execute_siege_sequence
+    )
+    from sequences.resources_sequence import execute_resource_gathering
+    from sequences.reconnect_sequence import execute_reconnect_sequence
+    return {
+        'fog': execute_fog_scout_sequence,
+        'barbarian': lambda: execute_barbarian_farm_sequence(combo_mode=True),
+        'infantry': execute_infantry_sequence,
+        'archers': execute_archers_sequence,
+        'cavalry': execute_cavalry_sequence,
+        'siege': execute_siege_sequence,
+        'resources': execute_resource_gathering,
+        'reconnect': execute_reconnect_sequence
+    }
+
+
+def run_sequence(frames_dir: str, sequence: str, loop: bool = False, seed: int = 0) -> dict:
+    """Replay one sequence and return its result, timings and event log"""
+    driver = ReplayDriver(frames_dir, loop=loop, seed=seed)
+    install(driver)
+    try:
+        runner = _sequence_runners()[sequence]
+        start = time.perf_counter()
+        result = runner()
+        wall_time = time.perf_counter() - start
+    finally:
+        uninstall()
+    return {
+        'sequence': sequence,
+        'result': result,
+        'cpu_seconds': wall_time,
+        'virtual_seconds': driver.virtual_time,
+        'frames_used': driver.index + 1,
+        'events': driver.events
+    }
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        return
+    frames_dir, sequence = sys.argv[1], sys.argv[2]
+    seed = int(sys.argv[sys.argv.index('--seed') + 1]) if '--seed' in sys.argv else 0
+    report = run_sequence(frames_dir, sequence, loop='--loop' in sys.argv, seed=seed)
+    for event in report['events']:
+        print(f"{event.virtual_time:8.2f}s  frame {event.frame_index:<3} {event.kind:<11} {event.args}")
+    print(f"Result: {report['result']}")
+    print(f"Frames used: {report['frames_used']}, captures: "
+          f"{sum(1 for e in report['events'] if e.kind == 'screenshot')}")
+    print(f"Processing time: {report['cpu_seconds'] * 1000:.1f} ms, "
+          f"bot time (sleeps + mouse moves): {report['virtual_seconds']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
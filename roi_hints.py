@@ -0,0 +1,166 @@
+"""
+Region-of-interest hints - per-template search rectangles relative to the game window
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from bot_log import get_logger
+
+logger = get_logger("roi_hints")
+
+
+class Config:
+    """ROI configuration constants"""
+    MANIFEST_PATH = "assets/roi.json"  # Hand-written hints, shipped with assets
+    LEARNED_PATH = "assets/roi_learned.json"  # Hit boxes learned at runtime
+    LEARN_MIN_HITS = 5  # Hits needed before a learned ROI is trusted
+    LEARN_MARGIN = 0.04  # Padding around learned hit box, as fraction of the window
+    SAVE_INTERVAL = 30.0  # Seconds between background writes of learned hits
+
+
+Rect = Tuple[float, float, float, float]  # x, y, w, h as fractions of the window
+
+
+def _load_json(path: str) -> dict:
+    """Read a JSON file, empty dict when missing or broken"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+class RoiHints:
+    """Search rectangles per template, with hit-based learning and tightening"""
+
+    def __init__(self, manifest_path: str = Config.MANIFEST_PATH,
+                 learned_path: Optional[str] = Config.LEARNED_PATH):
+        self.manifest_path = manifest_path
+        self.learned_path = learned_path  # None: manual hints only, nothing learned or written
+        self._manual: Dict[str, Rect] = {}
+        self._hits: Dict[str, dict] = {}  # path -> {"box": [x0, y0, x1, y1], "count": n}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._flusher: Optional[threading.Thread] = None
+        self.reload()
+
+    def reload(self):
+        """Re-read manifest and learned hits from disk"""
+        manual = {}
+        for image_path, entry in _load_json(self.manifest_path).items():
+            rect = entry.get('rect') if isinstance(entry, dict) else None
+            if rect and len(rect) == 4:
+                manual[image_path] = tuple(float(v) for v in rect)
+        self._manual = manual
+        learned = _load_json(self.learned_path) if self.learned_path else {}
+        self._hits = {
+            image_path: entry for image_path, entry in learned.items()
+            if isinstance(entry, dict) and len(entry.get('box', [])) == 4
+        }
+
+    def rect(self, image_path: str) -> Optional[Rect]:
+        """Current fractional ROI: learned hit box (inside the manual hint) or the manual hint"""
+        manual = self._manual.get(image_path)
+        hits = self._hits.get(image_path)
+        if not hits or hits['count'] < Config.LEARN_MIN_HITS:
+            return manual
+
+        x0, y0, x1, y1 = hits['box']
+        margin = Config.LEARN_MARGIN
+        x0, y0 = max(0.0, x0 - margin), max(0.0, y0 - margin)
+        x1, y1 = min(1.0, x1 + margin), min(1.0, y1 + margin)
+        if manual:
+            # Tighten the hand-written hint, never grow past it
+            mx, my, mw, mh = manual
+            x0, y0 = max(x0, mx), max(y0, my)
+            x1, y1 = min(x1, mx + mw), min(y1, my + mh)
+            if x1 <= x0 or y1 <= y0:
+                return manual
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def region(self, image_path: str, frame_size: Tuple[int, int],
+               template_size: Tuple[int, int]) -> Optional[Tuple[int, int, int, int]]:
+        """Pixel search region (left, top, width, height) big enough for the template"""
+        rect = self.rect(image_path)
+        if rect is None:
+            return None
+
+        frame_w, frame_h = frame_size
+        template_w, template_h = template_size
+        left = int(rect[0] * frame_w)
+        top = int(rect[1] * frame_h)
+        width = max(int(rect[2] * frame_w + 0.5), template_w)
+        height = max(int(rect[3] * frame_h + 0.5), template_h)
+        left = max(0, min(left, frame_w - width))
+        top = max(0, min(top, frame_h - height))
+        width = min(width, frame_w)
+        height = min(height, frame_h)
+        if width >= frame_w and height >= frame_h:
+            return None  # Whole frame anyway
+        return (left, top, width, height)
+
+    def record_hit(self, image_path: str, left: int, top: int, width: int, height: int,
+                   frame_size: Tuple[int, int]):
+        """Grow the learned hit box of a template with a confirmed match"""
+        if self.learned_path is None:
+            return
+        frame_w, frame_h = frame_size
+        box = [left / frame_w, top / frame_h, (left + width) / frame_w, (top + height) / frame_h]
+        with self._lock:
+            entry = self._hits.get(image_path)
+            if entry is None:
+                self._hits[image_path] = {'box': box, 'count': 1}
+            else:
+                old = entry['box']
+                entry['box'] = [min(old[0], box[0]), min(old[1], box[1]), max(old[2], box[2]), max(old[3], box[3])]
+                entry['count'] += 1
+            self._dirty = True
+            if self._flusher is None:
+                self._start_flusher()
+
+    def _start_flusher(self):
+        """Write learned hits from a background thread and at exit, never from the matching threads"""
+        stop = threading.Event()  # Never set: Event.wait sleeps without going through time.sleep
+
+        def flush_loop():
+            while True:
+                stop.wait(Config.SAVE_INTERVAL)
+                self.save(force=True)
+
+        self._flusher = threading.Thread(target=flush_loop, name="roi-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.save, force=True)
+
+    def forget(self, image_path: str):
+        """Drop learned hits of a template, e.g. after the UI moved"""
+        with self._lock:
+            if self._hits.pop(image_path, None) is not None:
+                self._dirty = True
+        self.save(force=True)
+
+    def save(self, force: bool = False):
+        """Write learned hits when changed, throttled to Config.SAVE_INTERVAL unless forced"""
+        if not self._dirty or self.learned_path is None:
+            return
+        if not force and time.monotonic() - self._last_save < Config.SAVE_INTERVAL:
+            return
+        with self._lock:
+            data = json.dumps(self._hits, indent=2, sort_keys=True)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        try:
+            directory = os.path.dirname(self.learned_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.learned_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+        except OSError as e:
+            logger.error(f"Error saving learned ROIs: {e}")
+
+
+roi_hints = RoiHints()
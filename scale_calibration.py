@@ -0,0 +1,120 @@
+"""
+Scale calibration - match assets captured at one UI scale against any window size
+
+The game's scale relative to the assets is measured once from an anchor
+template that is always on screen (the city/map toggle), by searching a
+range of template sizes. Every cached template is then resized by that
+factor, so runtime matching stays single-scale. The result is stored with
+the frame size it was measured on and reused until the window size changes.
+
+Usage: python scale_calibration.py   (measure again and save)
+"""
+import numpy as np
+import cv2
+from typing import Optional, Tuple
+from bot_utils import get_frame, scale_template, template_cache
+from state_store import state_store
+from bot_log import get_logger
+
+logger = get_logger("scale_calibration")
+
+
+class Config:
+    """Calibration configuration constants"""
+    ANCHORS = ("assets/go_home.png", "assets/go_outside.png")  # One of them shows on city and map views
+    MIN_SCALE = 0.5
+    MAX_SCALE = 2.0
+    COARSE_STEP = 0.05  # Scale step of the half-resolution sweep
+    FINE_STEP = 0.01  # Scale step of the full-resolution refinement
+    MIN_SCORE = 0.8  # Best anchor score needed to trust the measurement
+    SNAP = 0.02  # Scales this close to 1 are treated as 1, leaving templates untouched
+    MIN_TEMPLATE_SIDE = 8  # Smaller resized templates match noise
+    STATE_KEY = "template_scale"
+
+
+def _best_score(gray: np.ndarray, template: np.ndarray, scale: float) -> Tuple[float, Tuple[int, int]]:
+    """Best score and location of template resized by scale, -1 when it doesn't fit"""
+    resized = scale_template(template, scale)
+    h, w = resized.shape
+    if min(h, w) < Config.MIN_TEMPLATE_SIDE or h > gray.shape[0] or w > gray.shape[1]:
+        return -1.0, (0, 0)
+    result = cv2.matchTemplate(gray, resized, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    return max_val, max_loc
+
+
+def measure_scale(gray: np.ndarray, template: np.ndarray) -> Tuple[float, float]:
+    """(scale, score) of template in a grayscale frame
+
+    A coarse sweep runs on a half-resolution frame; the best scale is then
+    refined at full resolution around the coarse hit.
+    """
+    half = cv2.resize(gray, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+    best_scale, best_score, best_loc = 1.0, -1.0, (0, 0)
+    for scale in np.arange(Config.MIN_SCALE, Config.MAX_SCALE + 1e-9, Config.COARSE_STEP):
+        score, loc = _best_score(half, template, scale * 0.5)
+        if score > best_score:
+            best_scale, best_score, best_loc = float(scale), score, loc
+
+    # Refine inside a window around the coarse hit, big enough for the largest candidate
+    pad = int(max(template.shape) * (best_scale + Config.COARSE_STEP)) + 4
+    left, top = max(0, best_loc[0] * 2 - pad), max(0, best_loc[1] * 2 - pad)
+    window = gray[top:best_loc[1] * 2 + 2 * pad, left:best_loc[0] * 2 + 2 * pad]
+    coarse_scale = best_scale
+    for scale in np.arange(coarse_scale - Config.COARSE_STEP, coarse_scale + Config.COARSE_STEP + 1e-9,
+                           Config.FINE_STEP):
+        score, _ = _best_score(window, template, scale)
+        if score > best_score:
+            best_scale, best_score = float(scale), score
+    return round(best_scale, 3), best_score
+
+
+def calibrate() -> Optional[float]:
+    """Measure the scale from the best-scoring anchor on the current frame, None when none is found"""
+    gray = get_frame().gray
+    best = None
+    for image_path in Config.ANCHORS:
+        template = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)  # Unscaled, unlike the cache
+        if template is None:
+            continue
+        scale, score = measure_scale(gray, template)
+        logger.debug(f"Anchor {image_path}: scale {scale:.3f}, score {score:.3f}")
+        if best is None or score > best[1]:
+            best = (scale, score)
+    if best is None or best[1] < Config.MIN_SCORE:
+        return None
+    scale = best[0]
+    return 1.0 if abs(scale - 1.0) < Config.SNAP else scale
+
+
+def calibrate_templates(force: bool = False) -> float:
+    """Apply the saved scale, measuring it again when the window size changed or force is set"""
+    try:
+        gray = get_frame().gray
+        frame_size = [gray.shape[1], gray.shape[0]]
+        saved = state_store.get(Config.STATE_KEY)
+        if not force and saved and saved.get('frame_size') == frame_size:
+            scale = float(saved['scale'])
+        else:
+            scale = calibrate()
+            if scale is None:
+                scale = float(saved['scale']) if saved else 1.0
+                logger.warning(f"No calibration anchor on screen - keeping template scale {scale:.3f}")
+            else:
+                state_store.put(Config.STATE_KEY, {'scale': scale, 'frame_size': frame_size})
+                logger.info(f"Template scale calibrated: {scale:.3f} for a {frame_size[0]}x{frame_size[1]} window")
+        template_cache.set_scale(scale)
+        return scale
+    except Exception as e:
+        logger.error(f"Error calibrating template scale: {e}")
+        return template_cache.scale
+
+
+def main():
+    """Measure the scale on the live screen and save it"""
+    scale = calibrate_templates(force=True)
+    print(f"Template scale: {scale:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Deadline-aware activity scheduler - run whichever activity is ready soonest
+"""
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+from bot_log import event, get_logger
+from tracing import span
+
+logger = get_logger("scheduler")
+
+
+class Config:
+    """Scheduler configuration constants"""
+    MAX_IDLE_WAIT = 30.0  # Longest single wait, so stop requests and idle hooks stay responsive
+
+
+class ActivityScheduler:
+    """Next-ready time per activity instead of a fixed rotation
+
+    Activities start ready. After each run the caller pushes the activity's
+    deadline out (training done, march back, stamina refilled...) and the
+    scheduler always picks the one with the earliest deadline, breaking ties
+    by least recently run and then by declaration order.
+    """
+
+    def __init__(self, activities: Iterable[Hashable]):
+        self.activities = list(dict.fromkeys(activities))
+        self.ready_at: Dict[Hashable, float] = {activity: 0.0 for activity in self.activities}
+        self.reasons: Dict[Hashable, str] = {}
+        self.last_run: Dict[Hashable, float] = {activity: 0.0 for activity in self.activities}
+        self.activity_counts: Dict[Hashable, int] = {activity: 0 for activity in self.activities}
+        self.success_counts: Dict[Hashable, int] = {activity: 0 for activity in self.activities}
+        self.total_runs = 0
+
+    def ready_in(self, activity: Hashable, now: Optional[float] = None) -> float:
+        """Seconds until the activity is ready, 0 when it already is"""
+        now = time.time() if now is None else now
+        return max(0.0, self.ready_at[activity] - now)
+
+    def defer(self, activity: Hashable, seconds: float, reason: str = ""):
+        """Make the activity ready again after seconds"""
+        self.ready_until(activity, time.time() + max(0.0, seconds), reason)
+
+    def ready_until(self, activity: Hashable, timestamp: float, reason: str = ""):
+        """Make the activity ready again at a wall-clock timestamp"""
+        self.ready_at[activity] = timestamp
+        self.reasons[activity] = reason
+
+    def next_activity(self) -> Tuple[Hashable, float]:
+        """(activity, seconds until ready) of the earliest deadline"""
+        now = time.time()
+        order = {activity: index for index, activity in enumerate(self.activities)}
+        activity = min(self.activities, key=lambda a: (max(self.ready_at[a], now), self.last_run[a], order[a]))
+        return activity, self.ready_in(activity, now)
+
+    def record_run(self, activity: Hashable):
+        """Count a run of the activity"""
+        self.last_run[activity] = time.time()
+        self.activity_counts[activity] += 1
+        self.total_runs += 1
+
+    def record_success(self, activity: Hashable):
+        """Count a successful run of the activity"""
+        self.success_counts[activity] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable deadlines and counters, activities keyed by name"""
+        def name(activity):
+            return str(getattr(activity, 'value', activity))
+        return {
+            'total_runs': self.total_runs,
+            'activities': {
+                name(activity): {
+                    'ready_at': self.ready_at[activity],
+                    'reason': self.reasons.get(activity, ""),
+                    'last_run': self.last_run[activity],
+                    'runs': self.activity_counts[activity],
+                    'successes': self.success_counts[activity]
+                } for activity in self.activities
+            }
+        }
+
+    def restore(self, data: Optional[Dict[str, Any]]):
+        """Load a snapshot, ignoring activities that no longer exist"""
+        if not data:
+            return
+        try:
+            entries = data.get('activities', {})
+            for activity in self.activities:
+                entry = entries.get(str(getattr(activity, 'value', activity)))
+                if not entry:
+                    continue
+                self.ready_at[activity] = float(entry.get('ready_at', 0.0))
+                if entry.get('reason'):
+                    self.reasons[activity] = entry['reason']
+                self.last_run[activity] = float(entry.get('last_run', 0.0))
+                self.activity_counts[activity] = int(entry.get('runs', 0))
+                self.success_counts[activity] = int(entry.get('successes', 0))
+            self.total_runs = int(data.get('total_runs', 0))
+        except (AttributeError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring saved schedule: {e}")
+
+    def wait_for_next(self, stop_flag: Optional[threading.Event] = None) -> Optional[Hashable]:
+        """Sleep until the earliest deadline, None when stopped while waiting"""
+        while True:
+            activity, wait = self.next_activity()
+            if wait <= 0:
+                return activity
+            wait = min(wait, Config.MAX_IDLE_WAIT)
+            reason = self.reasons.get(activity)
+            logger.info(f"Next: {getattr(activity, 'value', activity)} in {wait:.0f}s"
+                        f"{f' ({reason})' if reason else ''}",
+                        extra=event("scheduler_wait", activity=getattr(activity, 'value', activity),
+                                    wait=round(wait, 1), reason=reason))
+            with span("idle", "wait", next=str(getattr(activity, 'value', activity))):
+                if stop_flag is not None:
+                    if stop_flag.wait(wait):
+                        return None
+                else:
+                    time.sleep(wait)
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Deadline and counters of every activity, soonest first"""
+        now = time.time()
+        return [{
+            'activity': getattr(activity, 'value', activity),
+            'ready_in': round(self.ready_in(activity, now), 1),
+            'runs': self.activity_counts[activity],
+            'successes': self.success_counts[activity],
+            'reason': self.reasons.get(activity)
+        } for activity in sorted(self.activities, key=lambda a: self.ready_at[a])]
+
+    def status_lines(self) -> Iterable[str]:
+        """One line per activity, soonest first"""
+        return format_status(self.status())
+
+
+def format_status(entries: Iterable[Dict[str, Any]]) -> List[str]:
+    """Text lines of ActivityScheduler.status() entries"""
+    lines = []
+    for entry in entries:
+        wait = entry['ready_in']
+        state = "ready" if wait <= 0 else f"in {wait / 60:.1f} min"
+        lines.append(f"{entry['activity']:<16} {state:<12} runs {entry['runs']:<4}"
+                     f"ok {entry['successes']:<4}{entry['reason'] or ''}")
+    return lines
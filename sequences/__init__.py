@@ -8,11 +8,42 @@ from .archers_sequence import execute_archers_sequence
 from .cavalry_sequence import execute_cavalry_sequence
 from .siege_sequence import execute_siege_sequence
 
+
+def collect_asset_paths():
+    """Collect every template referenced by the AssetPaths classes of all sequences"""
+    from bot_utils import asset_paths
+    from . import (
+        fog_sequence, barbarian_sequence, infantry_sequence, archers_sequence,
+        cavalry_sequence, siege_sequence, reconnect_sequence, resources_sequence,
+        screen_state, shared_utils
+    )
+    return asset_paths(
+        fog_sequence.AssetPaths,
+        barbarian_sequence.AssetPaths,
+        infantry_sequence.AssetPaths,
+        archers_sequence.AssetPaths,
+        cavalry_sequence.AssetPaths,
+        siege_sequence.AssetPaths,
+        reconnect_sequence.AssetPaths,
+        resources_sequence.AssetPaths,
+        screen_state.AssetPaths,
+        shared_utils.SharedAssetPaths
+    )
+
+
+def preload_assets() -> bool:
+    """Decode and validate all sequence templates once at startup"""
+    from bot_utils import preload_templates
+    return preload_templates(collect_asset_paths())
+
+
 __all__ = [
     'execute_fog_scout_sequence',
     'execute_barbarian_farm_sequence',
     'execute_infantry_sequence',
     'execute_archers_sequence',
     'execute_cavalry_sequence',
-    'execute_siege_sequence'
+    'execute_siege_sequence',
+    'collect_asset_paths',
+    'preload_assets'
 ]
\ No newline at end of file
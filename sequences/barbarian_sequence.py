@@ -11,7 +11,12 @@ import re
 import threading
 from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from bot_utils import ensure_assets_directory, move_mouse_zigzag
+from bot_utils import ensure_assets_directory, move_mouse_zigzag, get_frame, press_key
+from vision import get_vision
+from bot_log import get_logger
+from tracing import span
+
+logger = get_logger("barbarian_sequence")
 
 # Global flag for F12 stop signal
 stop_bot_flag = threading.Event()
@@ -21,7 +26,7 @@ def monitor_f12_key():
     try:
         import keyboard
         keyboard.wait('f12')
-        print("F12 pressed - Stopping bot...", flush=True)
+        logger.info("F12 pressed - Stopping bot...")
         stop_bot_flag.set()
     except ImportError:
         pass
@@ -52,6 +57,15 @@ try:
 except ImportError:
     TESSERACT_AVAILABLE = False
 
+try:
+    from .digit_reader import read_stamina, learn_stamina
+    from .stamina_tracker import get_stamina_tracker
+    from .march_tracker import get_march_tracker, Config as MarchConfig
+except ImportError:
+    from digit_reader import read_stamina, learn_stamina
+    from stamina_tracker import get_stamina_tracker
+    from march_tracker import get_march_tracker, Config as MarchConfig
+
 try:
     from .shared_utils import (
         try_click_button,
@@ -60,6 +74,10 @@ try:
         retry_with_esc,
         try_click_button_silent,
         check_and_click_help_button,
+        clear_ui_and_probe,
+        wait_for_any,
+        Disconnected,
+        SharedAssetPaths,
         Config
     )
 except ImportError:
@@ -70,6 +88,10 @@ except ImportError:
         retry_with_esc,
         try_click_button_silent,
         check_and_click_help_button,
+        clear_ui_and_probe,
+        wait_for_any,
+        Disconnected,
+        SharedAssetPaths,
         Config
     )
 
@@ -101,7 +123,7 @@ MIN_STAMINA = 39
 def check_troop_available() -> bool:
     """Check if troops are available"""
     try:
-        location = pyautogui.locateOnScreen(AssetPaths.TROOP_AVAILABLE, confidence=0.7)
+        location = get_vision().find(AssetPaths.TROOP_AVAILABLE, confidence=0.7)
         return location is not None
     except Exception:
         return False
@@ -109,7 +131,7 @@ def check_troop_available() -> bool:
 def check_commander_onduty() -> bool:
     """Check if commander is on duty"""
     try:
-        location = pyautogui.locateOnScreen(AssetPaths.COMMANDER_ONDUTY, confidence=0.6)
+        location = get_vision().find(AssetPaths.COMMANDER_ONDUTY, confidence=0.6)
         return location is not None
     except Exception:
         return False
@@ -117,7 +139,7 @@ def check_commander_onduty() -> bool:
 def check_commander_available() -> bool:
     """Check if commander is available"""
     try:
-        location = pyautogui.locateOnScreen(AssetPaths.COMMANDER, confidence=0.6)
+        location = get_vision().find(AssetPaths.COMMANDER, confidence=0.6)
         return location is not None
     except Exception:
         return False
@@ -125,7 +147,7 @@ def check_commander_available() -> bool:
 def check_commander_back_available() -> bool:
     """Check if commander is available"""
     try:
-        location = pyautogui.locateOnScreen(AssetPaths.COMMANDER_BACK, confidence=0.6)
+        location = get_vision().find(AssetPaths.COMMANDER_BACK, confidence=0.6)
         return location is not None
     except Exception:
         return False
@@ -133,66 +155,55 @@ def check_commander_back_available() -> bool:
 def find_stamina_check_position():
     """Find stamina_check.png position on screen"""
     try:
-        stamina_check_path = AssetPaths.STAMINA_CHECK
-        
-        # Take screenshot
-        screenshot = np.array(pyautogui.screenshot())
-        screenshot = cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
-        
-        # Load template image
-        template = cv2.imread(stamina_check_path)
-        if template is None:
-            print(f"Error: Could not load {stamina_check_path}")
-            return None
-        
-        # Convert to grayscale for template matching
-        screenshot_gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-        template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-        
-        # Perform template matching
-        result = cv2.matchTemplate(screenshot_gray, template_gray, cv2.TM_CCOEFF_NORMED)
-        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        match = get_vision().find(AssetPaths.STAMINA_CHECK, confidence=0.6)
         
         # Check if match is good enough
-        if max_val > 0.6:
-            h, w = template_gray.shape
-            print(f"Stamina check found with confidence: {max_val:.3f}")
-            return (max_loc[0], max_loc[1], w, h)  # Return top-left corner and dimensions
+        if match:
+            logger.info(f"Stamina check found with confidence: {match.score:.3f}")
+            return (match.left, match.top, match.width, match.height)  # Return top-left corner and dimensions
         else:
-            print(f"Stamina check not found (confidence: {max_val:.3f})")
+            logger.info("Stamina check not found")
             return None
             
     except Exception as e:
-        print(f"Error finding stamina check: {e}")
+        logger.error(f"Error finding stamina check: {e}")
         return None
 
 def get_current_stamina() -> int:
     """Extract current stamina value"""
-    if not TESSERACT_AVAILABLE:
-        print("Tesseract not available for stamina detection")
-        return 0
-    
     try:
         # Find stamina check position first
         stamina_pos = find_stamina_check_position()
         if not stamina_pos:
-            print("Could not find stamina check position")
+            logger.warning("Could not find stamina check position")
             return 0
         
         stamina_x, stamina_y, stamina_w, stamina_h = stamina_pos
         
-        # Take screenshot
-        screenshot = pyautogui.screenshot()
+        # Crop the stamina check area itself from the frame used to find it
+        rgb = get_frame().crop(stamina_x, stamina_y, stamina_w, stamina_h)
+        gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        
+        # In-process glyph match first - milliseconds, no Tesseract subprocess
+        with span("ocr_glyphs", "ocr"):
+            stamina_value = read_stamina(gray)
+        if stamina_value is not None:
+            logger.info(f"Parsed stamina: {stamina_value}")
+            return stamina_value
         
-        # Crop the stamina check area itself
-        cropped = screenshot.crop((stamina_x, stamina_y, stamina_x + stamina_w, stamina_y + stamina_h))
+        if not TESSERACT_AVAILABLE:
+            logger.info("Tesseract not available for stamina detection")
+            return 0
+        
+        cropped = Image.fromarray(rgb)
         
         # Try Tesseract OCR with PSM 6 and 7 (known to work best)
         ocr_configs = ['--psm 6', '--psm 7']
         
         for config in ocr_configs:
             try:
-                text = pytesseract.image_to_string(cropped, config=config)
+                with span("ocr_tesseract", "ocr", config=config):
+                    text = pytesseract.image_to_string(cropped, config=config)
                 text = text.strip()
                 
                 if text and ('/' in text) and any(c.isdigit() for c in text):
@@ -207,100 +218,119 @@ def get_current_stamina() -> int:
                     for pattern in patterns:
                         matches = re.findall(pattern, text)
                         if matches:
-                            print(f"OCR text: '{text}'", flush=True)
-                            print(f"Matched pattern: {pattern}", flush=True)
-                            print(f"Raw match: '{matches[0]}'", flush=True)
+                            logger.info(f"OCR text: '{text}'")
+                            logger.info(f"Matched pattern: {pattern}")
+                            logger.info(f"Raw match: '{matches[0]}'")
                             # Remove separators (periods, commas) from the stamina value
                             stamina_str = matches[0].replace('.', '').replace(',', '')
                             stamina_value = int(stamina_str)
-                            print(f"Parsed stamina: {stamina_value}", flush=True)
+                            logger.info(f"Parsed stamina: {stamina_value}")
+                            
+                            # Teach the glyph reader so next reads skip Tesseract
+                            fraction = re.search(r'(\d[\d,.]*)/(\d[\d,.]*)', text)
+                            if fraction:
+                                learn_stamina(gray, *fraction.groups())
                             return stamina_value
             except Exception as e:
                 continue
         
-        print("Could not extract stamina value")
+        logger.warning("Could not extract stamina value")
         return 0
         
     except Exception as e:
-        print(f"Error extracting stamina: {e}")
+        logger.error(f"Error extracting stamina: {e}")
         return 0
 
 def handle_low_stamina(combo_mode: bool = False) -> str:
-    """Handle low stamina situation - try to recall troops"""
-    print(f"Stamina is low, attempting to recall troops...")
+    """Handle low stamina situation - try to recall troops
+
+    STAMINA_LOW means the troops were recalled; the caller waits for regen
+    (the scheduler in combo mode, main() standalone).
+    """
+    logger.info(f"Stamina is low, attempting to recall troops...")
     
     # Check if commander is available
     if check_commander_back_available():
-        print("Commander found - clicking commander")
+        logger.info("Commander found - clicking commander")
         if try_click_button(AssetPaths.COMMANDER_BACK):
             time.sleep(1)
             # Try to click troop back button
             if try_click_button(AssetPaths.TROOP_BACK):
-                print("Troops recalled successfully")
-                if combo_mode:
-                    print("Running in combo mode - returning STAMINA_LOW status")
-                    return "STAMINA_LOW"
-                else:
-                    print("Standalone mode - waiting 10 minutes for stamina recovery")
-                    time.sleep(600)  # Sleep 10 minutes (600 seconds)
-                    return "SUCCESS"
+                logger.info("Troops recalled successfully")
+                mode = "combo" if combo_mode else "standalone"
+                logger.info(f"Running in {mode} mode - returning STAMINA_LOW status")
+                return "STAMINA_LOW"
             else:
-                print("Could not find troop back button")
-                pyautogui.press('escape')  # Close commander window
+                logger.warning("Could not find troop back button")
+                press_key('escape')  # Close commander window
                 return "FAILED"
     else:
-        print("No commander found - waiting 10 seconds for troops to return")
+        logger.info("No commander found - waiting 10 seconds for troops to return")
         time.sleep(10)
         return "FAILED"
 
 def execute_barbarian_farm_sequence(combo_mode: bool = False) -> str:
     """Execute barbarian farm sequence with stamina management"""
-    # Step 1: Setup - Press ESC to clear UI
-    check_and_click_help_button()
-    # Check commander and troop availability logic
-    print("Checking commander on duty status...", flush=True)
-    commander_onduty = check_commander_onduty()
-    print(f"Commander on duty: {commander_onduty}", flush=True)
+    # Every march slot known busy - nothing to open until one is due back
+    marches = get_march_tracker()
+    if marches.all_busy():
+        logger.info(f"All march slots busy for {marches.seconds_until_free():.0f}s - skipping")
+        return "BUSY"
     
-    print("Checking troop availability...", flush=True)
-    troops_available = check_troop_available()
-    print(f"Troops available: {troops_available}", flush=True)
+    # Step 1: Setup - clear UI and check commander/troops from one batched probe
+    logger.info("Checking commander on duty status and troop availability...")
+    try:
+        found = clear_ui_and_probe(SharedAssetPaths.GO_OUTSIDE, {
+            AssetPaths.COMMANDER_ONDUTY: 0.6,
+            AssetPaths.TROOP_AVAILABLE: 0.7
+        })
+    except Disconnected:
+        return "FAILED"  # Nothing learned about the march slots
+    commander_onduty = found[AssetPaths.COMMANDER_ONDUTY] is not None
+    troops_available = found[AssetPaths.TROOP_AVAILABLE] is not None
+    logger.info(f"Commander on duty: {commander_onduty}")
+    logger.info(f"Troops available: {troops_available}")
     
     if commander_onduty and not troops_available:
-        print("Commander on duty but no troops available - ending session", flush=True)
-        return "FAILED"
+        logger.info("Commander on duty but no troops available - ending session")
+        marches.observe_all_busy()
+        return "BUSY"
     else:
-        print("===> proceeding with attack", flush=True)
-
-    check_and_click_close_esc()
-    check_and_click_go_outside()
+        marches.observe_free()
+        logger.info("===> proceeding with attack")
 
-    print("Open setting by ESC", flush=True)
-    pyautogui.press('escape')
-    time.sleep(0.5)
-
-    # Step 2: Check stamina
-    current_stamina = get_current_stamina()
-    if current_stamina == 0:
-        print("Could not detect stamina, proceeding anyway", flush=True)
-        pyautogui.press('escape')
-        time.sleep(0.5)
-    elif current_stamina <= MIN_STAMINA:
-        print(f"Stamina too low ({current_stamina} <= {MIN_STAMINA})", flush=True)
-        pyautogui.press('escape')
+    # Step 2: Check stamina - only open the panel when the model can't decide
+    stamina = get_stamina_tracker(MIN_STAMINA)
+    if stamina.needs_reading():
+        logger.info("Open setting by ESC")
+        press_key('escape')
         time.sleep(0.5)
-        return handle_low_stamina(combo_mode)
+
+        current_stamina = get_current_stamina()
+        if current_stamina == 0:
+            logger.warning("Could not detect stamina, proceeding anyway")
+            press_key('escape')
+            time.sleep(0.5)
+        elif current_stamina <= MIN_STAMINA:
+            stamina.observe(current_stamina)
+            logger.info(f"Stamina too low ({current_stamina} <= {MIN_STAMINA})")
+            press_key('escape')
+            time.sleep(0.5)
+            return handle_low_stamina(combo_mode)
+        else:
+            stamina.observe(current_stamina)
+            logger.info(f"Stamina sufficient ({current_stamina} > {MIN_STAMINA}), proceeding with attack")
+            press_key('escape')
+            time.sleep(0.5)
     else:
-        print(f"Stamina sufficient ({current_stamina} > {MIN_STAMINA}), proceeding with attack", flush=True)
-        pyautogui.press('escape')
-        time.sleep(0.5)
+        logger.info(f"Predicted stamina {stamina.predict():.0f} > {MIN_STAMINA}, skipping stamina read")
 
     # Check and click HOME_CENTER if found
     if try_click_button_silent(AssetPaths.HOME_CENTER):
-        print("HOME_CENTER found - clicked it", flush=True)
+        logger.info("HOME_CENTER found - clicked it")
         time.sleep(0.5)
     else:
-        print("HOME_CENTER not found - continuing process", flush=True)
+        logger.info("HOME_CENTER not found - continuing process")
 
     # Step 3-5: Normal barbarian attack flow
     # Execute initial sequence
@@ -314,15 +344,16 @@ def execute_barbarian_farm_sequence(combo_mode: bool = False) -> str:
     if not retry_with_esc(AssetPaths.ATTACK):
         return "FAILED"
     
-    # Smart flow based on commander availability
-    if check_commander_available():
-        print("Commander found - using normal flow", flush=True)
+    # Smart flow based on commander availability - wait for whichever march dialog renders
+    dialog = wait_for_any({AssetPaths.COMMANDER: 0.6, AssetPaths.ADD_TROOP_ALT: 0.7})
+    if dialog is not None and dialog[0] == AssetPaths.COMMANDER:
+        logger.info("Commander found - using normal flow")
         if not retry_with_esc(AssetPaths.ADD_TROOP):
             return "FAILED"
         if not retry_with_esc(AssetPaths.SEND_TROOP):
             return "FAILED"
     else:
-        print("No commander found - using alternative flow", flush=True)
+        logger.info("No commander found - using alternative flow")
         if not retry_with_esc(AssetPaths.ADD_TROOP_ALT):
             return "FAILED"
         if not retry_with_esc(AssetPaths.SELECT_TROOP_ALT):
@@ -330,17 +361,15 @@ def execute_barbarian_farm_sequence(combo_mode: bool = False) -> str:
         if not retry_with_esc(AssetPaths.SEND_TROOP_ALT):
             return "FAILED"
     
+    stamina.record_attack()
+    marches.record_dispatch("barbarian", MarchConfig.BARBARIAN_MARCH)
     return "SUCCESS"
 
 
 def main():
     """Main execution for standalone barbarian farm bot"""
-    import io
-    import sys
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    
-    print(f"RoK Barbarian Farm Bot starting in {Config.STEP_DELAY()} seconds...")
-    print("🔴 Press F12 anytime to stop the bot")
+    logger.info(f"RoK Barbarian Farm Bot starting in {Config.STEP_DELAY()} seconds...")
+    logger.info("🔴 Press F12 anytime to stop the bot")
     time.sleep(Config.STEP_DELAY())
     
     pyautogui.FAILSAFE = True
@@ -355,28 +384,34 @@ def main():
         while True:
             # Check if F12 was pressed
             if stop_bot_flag.is_set():
-                print("🛑 Bot stopped by F12 key press", flush=True)
+                logger.info("🛑 Bot stopped by F12 key press")
                 break
-            print(f"\n🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥", flush=True)
-            print(f"🔥                      BARBARIAN FARM CHU KỲ {cycle_count:<3}                   🔥", flush=True)
-            print(f"🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥", flush=True)
+            logger.info(f"\n🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥")
+            logger.info(f"🔥                      BARBARIAN FARM CHU KỲ {cycle_count:<3}                   🔥")
+            logger.info(f"🔥━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━🔥")
             
             result = execute_barbarian_farm_sequence(combo_mode=False)
             if result == "SUCCESS":
-                print("✅ Barbarian farm cycle completed successfully", flush=True)
+                logger.info("✅ Barbarian farm cycle completed successfully")
             elif result == "STAMINA_LOW":
-                print("⚠️  Stamina low - troops recalled, waited 10 minutes", flush=True)
+                wait = get_stamina_tracker(MIN_STAMINA).seconds_until_attack()
+                logger.warning(f"⚠️  Stamina low - troops recalled, waiting {wait / 60:.1f} minutes for stamina recovery")
+                time.sleep(wait)
+            elif result == "BUSY":
+                wait = get_march_tracker().seconds_until_free()
+                logger.info(f"⏭️  March slots busy - waiting {wait:.0f}s")
+                time.sleep(wait)
             else:
-                print("❌ Barbarian farm cycle failed, retrying...", flush=True)
+                logger.info("❌ Barbarian farm cycle failed, retrying...")
             
-            print("//==============================================================", flush=True)
+            logger.info("//==============================================================")
             cycle_count += 1
             time.sleep(Config.STEP_DELAY())
             
     except KeyboardInterrupt:
-        print("Barbarian farm bot stopped by user", flush=True)
+        logger.info("Barbarian farm bot stopped by user")
     except Exception as e:
-        print(f"Unexpected error: {e}", flush=True)
+        logger.error(f"Unexpected error: {e}")
 
 
 if __name__ == "__main__":
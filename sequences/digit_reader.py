@@ -0,0 +1,221 @@
+"""
+Digit reader - in-process nearest-neighbour OCR for the stamina counter
+
+Glyphs are segmented with connected components and compared against a bank
+of labelled samples. The bank is built offline from labelled stamina_check
+crops (see build_bank), and grows at runtime: every stamina value that
+Tesseract reads is split into glyphs and stored, so after a few reads the
+bot no longer needs to spawn Tesseract at all.
+
+Usage: python sequences/digit_reader.py <crops_dir>
+    Every PNG in crops_dir is a stamina_check-sized crop named after the
+    value it shows, "-" standing for the slash (e.g. 1114-1500.png).
+"""
+import os
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bot_log import get_logger
+
+logger = get_logger("digit_reader")
+
+
+class Config:
+    """Digit reader configuration constants"""
+    BANK_PATH = "assets/stamina_glyphs.npz"
+    GLYPH_SIZE = (12, 18)  # Normalized glyph width, height
+    MIN_HEIGHT_RATIO = 0.6  # Glyphs shorter than this fraction of the median height are separators
+    MAX_HEIGHT_RATIO = 1.6  # Taller than this times the median height is an icon, e.g. the "+" button
+    MAX_WIDTH_RATIO = 1.7  # Wider than this times the median width means touching glyphs
+    MAX_SAMPLES = 8  # Samples kept per label
+    MAX_DISTANCE = 0.25  # Mean absolute pixel difference accepted as a match
+    LABELS = "0123456789/"
+    # Crops whose value is known without OCR, always part of a built bank
+    SEED_CROPS = {"assets/barbarian/stamina_check.png": "1114/1500"}
+
+
+def _binarize(gray: np.ndarray) -> np.ndarray:
+    """Otsu threshold with the text as foreground, whichever polarity it has"""
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    if np.count_nonzero(binary) > binary.size // 2:
+        binary = cv2.bitwise_not(binary)  # Text covers less area than background
+    return binary
+
+
+def segment(gray: np.ndarray) -> List[np.ndarray]:
+    """Normalized glyph images left to right, separators dropped"""
+    binary = _binarize(gray)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    boxes = [tuple(stats[i][:4]) for i in range(1, count) if stats[i][cv2.CC_STAT_AREA] >= 3]
+    if not boxes:
+        return []
+    typical = float(np.median([box[3] for box in boxes]))
+    boxes = sorted(box for box in boxes
+                   if typical * Config.MIN_HEIGHT_RATIO <= box[3] <= typical * Config.MAX_HEIGHT_RATIO)
+    typical_width = float(np.median([box[2] for box in boxes]))
+    if any(box[2] > typical_width * Config.MAX_WIDTH_RATIO for box in boxes):
+        return []  # Merged glyphs would be misread, leave it to the fallback
+    glyphs = []
+    for left, top, width, height in boxes:
+        glyph = binary[top:top + height, left:left + width]
+        glyph = cv2.resize(glyph, Config.GLYPH_SIZE, interpolation=cv2.INTER_AREA)
+        glyphs.append(glyph.astype(np.float32) / 255.0)
+    return glyphs
+
+
+class GlyphBank:
+    """Labelled glyph samples with nearest-neighbour lookup"""
+
+    def __init__(self, path: str = Config.BANK_PATH):
+        self.path = path
+        self._samples: Dict[str, List[np.ndarray]] = {}
+        self._lock = threading.Lock()
+        # (matrix, labels) swapped as one object, classify() runs on pool and instance threads
+        self._index: Tuple[np.ndarray, List[str]] = (
+            np.empty((0, Config.GLYPH_SIZE[0] * Config.GLYPH_SIZE[1]), dtype=np.float32), [])
+        self.load()
+
+    def _rebuild(self):
+        """Flatten all samples into one matrix for a single vectorized lookup"""
+        labels, rows = [], []
+        for label, samples in self._samples.items():
+            for sample in samples:
+                labels.append(label)
+                rows.append(sample.ravel())
+        if rows:
+            matrix = np.stack(rows)
+        else:
+            matrix = np.empty((0, Config.GLYPH_SIZE[0] * Config.GLYPH_SIZE[1]), dtype=np.float32)
+        self._index = (matrix, labels)
+
+    def load(self):
+        """Read samples from disk, empty bank when missing or broken"""
+        try:
+            with np.load(self.path) as data:
+                # Labels outside LABELS come from older banks that stored icons
+                samples = {label: list(data[label]) for label in data.files if label in Config.LABELS}
+        except (OSError, ValueError):
+            samples = {}
+        with self._lock:
+            self._samples = samples
+            self._rebuild()
+
+    def save(self):
+        """Write samples"""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._lock:
+                arrays = {label: np.stack(samples) for label, samples in self._samples.items()}
+            with open(self.path, 'wb') as f:
+                np.savez_compressed(f, **arrays)
+        except OSError as e:
+            logger.error(f"Error saving glyph bank: {e}")
+
+    def ready(self) -> bool:
+        """Every digit and the slash have at least one sample"""
+        return all(self._samples.get(label) for label in Config.LABELS)
+
+    def classify(self, glyph: np.ndarray) -> Optional[str]:
+        """Label of the nearest sample, None when nothing is close enough"""
+        matrix, labels = self._index
+        if not labels:
+            return None
+        distances = np.mean(np.abs(matrix - glyph.ravel()), axis=1)
+        best = int(np.argmin(distances))
+        return labels[best] if distances[best] < Config.MAX_DISTANCE else None
+
+    def learn(self, glyphs: List[np.ndarray], text: str, save: bool = True) -> bool:
+        """Store glyphs labelled by text, one glyph per character
+
+        Nothing is stored when the glyph count differs from the text length:
+        a split or merged glyph would otherwise be kept under a wrong label.
+        """
+        if len(glyphs) != len(text) or any(c not in Config.LABELS for c in text):
+            return False
+        changed = False
+        with self._lock:
+            for glyph, label in zip(glyphs, text):
+                samples = self._samples.setdefault(label, [])
+                if len(samples) >= Config.MAX_SAMPLES:
+                    continue
+                if samples and min(float(np.mean(np.abs(s - glyph))) for s in samples) < 0.02:
+                    continue  # Near duplicate
+                samples.append(glyph)
+                changed = True
+            if changed:
+                self._rebuild()
+        if changed and save:
+            self.save()
+        return True
+
+
+glyph_bank = GlyphBank()
+
+
+def read_text(gray: np.ndarray) -> Optional[str]:
+    """Digits and slashes in a grayscale crop, None when any glyph is unknown"""
+    if not glyph_bank.ready():
+        return None
+    glyphs = segment(gray)
+    if not glyphs:
+        return None
+    labels = [glyph_bank.classify(glyph) for glyph in glyphs]
+    if None in labels:
+        return None
+    return "".join(labels)
+
+
+def read_stamina(gray: np.ndarray) -> Optional[int]:
+    """Current stamina from a "1,015/1,500" crop, None when unreadable"""
+    text = read_text(gray)
+    if not text or text.count('/') != 1:
+        return None
+    current = text.split('/')[0]
+    return int(current) if current.isdigit() else None
+
+
+def learn_stamina(gray: np.ndarray, current: str, maximum: str) -> bool:
+    """Teach the bank from a crop whose value another OCR already read"""
+    text = "".join(c for c in current if c.isdigit()) + "/" + "".join(c for c in maximum if c.isdigit())
+    return glyph_bank.learn(segment(gray), text)
+
+
+def build_bank(crops_dir: Optional[str] = None, bank: Optional[GlyphBank] = None) -> List[str]:
+    """Learn every labelled crop into the bank and save it, returning the crops that didn't segment
+
+    Crops are named after their value with "-" for the slash; Config.SEED_CROPS
+    are always included.
+    """
+    bank = glyph_bank if bank is None else bank
+    crops = dict(Config.SEED_CROPS)
+    if crops_dir:
+        for name in sorted(os.listdir(crops_dir)):
+            if name.lower().endswith('.png'):
+                crops[os.path.join(crops_dir, name)] = os.path.splitext(name)[0].replace('-', '/')
+    failed = []
+    for crop_path, text in crops.items():
+        gray = cv2.imread(crop_path, cv2.IMREAD_GRAYSCALE)
+        if gray is None or not bank.learn(segment(gray), text, save=False):
+            failed.append(crop_path)
+    bank.save()
+    return failed
+
+
+def main():
+    """Build the glyph bank from labelled crops"""
+    failed = build_bank(sys.argv[1] if len(sys.argv) > 1 else None)
+    missing = [label for label in Config.LABELS if not glyph_bank._samples.get(label)]
+    print(f"Glyph bank saved to {glyph_bank.path}")
+    for crop_path in failed:
+        print(f"  skipped {crop_path}: glyph count doesn't match its name")
+    if missing:
+        print(f"  still missing samples for: {' '.join(missing)} - add crops showing them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Sequence engine - declarative steps run by one shared execution loop
+"""
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bot_utils import preload_templates, press_key
+from bot_log import get_logger
+from metrics import record_step
+from tracing import span
+
+try:
+    from .shared_utils import (try_click_button, retry_with_esc, clear_ui_and_probe, wait_for, Disconnected,
+                               SharedAssetPaths, Config)
+except ImportError:
+    from shared_utils import (try_click_button, retry_with_esc, clear_ui_and_probe, wait_for, Disconnected,
+                              SharedAssetPaths, Config)
+
+logger = get_logger("engine")
+
+
+TIMING_HISTORY = 100  # Runs kept per step label
+
+
+class Step:
+    """One unit of a sequence - run returns False to end the sequence"""
+
+    def run(self, sequence: 'Sequence') -> bool:
+        raise NotImplementedError
+
+    def templates(self) -> List[str]:
+        """Template paths this step (and any nested step) can search for"""
+        return []
+
+    @property
+    def label(self) -> str:
+        return type(self).__name__
+
+
+class Find(Step):
+    """Wait until a template is visible"""
+
+    def __init__(self, image_path: str, confidence: float = 0.7, timeout: float = Config.STEP_TIMEOUT):
+        self.image_path = image_path
+        self.confidence = confidence
+        self.timeout = timeout
+
+    def run(self, sequence: 'Sequence') -> bool:
+        return wait_for(self.image_path, self.timeout, confidence=self.confidence) is not None
+
+    def templates(self) -> List[str]:
+        return [self.image_path]
+
+    @property
+    def label(self) -> str:
+        return f"Find({os.path.basename(self.image_path)})"
+
+
+class Click(Step):
+    """Wait for a button and click it, optionally pausing longer afterwards"""
+
+    def __init__(self, image_path: str, timeout: float = Config.STEP_TIMEOUT,
+                 delay: Optional[Callable[[], float]] = None):
+        self.image_path = image_path
+        self.timeout = timeout
+        self.delay = delay
+
+    def run(self, sequence: 'Sequence') -> bool:
+        if not try_click_button(self.image_path, self.timeout):
+            return False
+        if self.delay:
+            time.sleep(self.delay())
+        return True
+
+    def templates(self) -> List[str]:
+        return [self.image_path]
+
+    @property
+    def label(self) -> str:
+        return f"Click({os.path.basename(self.image_path)})"
+
+
+class RetryWithEsc(Click):
+    """Click a button, pressing ESC and retrying on failure"""
+
+    def __init__(self, image_path: str, max_retries: int = 1):
+        super().__init__(image_path)
+        self.max_retries = max_retries
+
+    def run(self, sequence: 'Sequence') -> bool:
+        return retry_with_esc(self.image_path, self.max_retries)
+
+    @property
+    def label(self) -> str:
+        return f"RetryWithEsc({os.path.basename(self.image_path)})"
+
+
+class PressKey(Step):
+    """Press a key and wait for the screen to settle"""
+
+    def __init__(self, key: str, delay: Callable[[], float] = Config.STEP_DELAY):
+        self.key = key
+        self.delay = delay
+
+    def run(self, sequence: 'Sequence') -> bool:
+        press_key(self.key)
+        time.sleep(self.delay())
+        return True
+
+    @property
+    def label(self) -> str:
+        return f"PressKey({self.key})"
+
+
+class Log(Step):
+    """Print a progress message"""
+
+    def __init__(self, message: str):
+        self.message = message
+
+    def run(self, sequence: 'Sequence') -> bool:
+        logger.info(self.message)
+        return True
+
+
+class Fail(Step):
+    """End the sequence unsuccessfully"""
+
+    def run(self, sequence: 'Sequence') -> bool:
+        return False
+
+
+class OptionalStep(Step):
+    """Run a step, continuing whatever its result"""
+
+    def __init__(self, step: Step):
+        self.step = step
+
+    def run(self, sequence: 'Sequence') -> bool:
+        sequence.run_step(self.step)
+        return True
+
+    def templates(self) -> List[str]:
+        return self.step.templates()
+
+    @property
+    def label(self) -> str:
+        return f"Optional({self.step.label})"
+
+
+class Guard(Step):
+    """Clear popups, navigate, and end the sequence when a stop template shows
+
+    All probes come from one batched capture via clear_ui_and_probe. When a
+    stop template is found, confirm (if given) decides whether to really stop.
+    A disconnect propagates as Disconnected, so it is not taken for a stop.
+    """
+
+    def __init__(self, navigate_path: str, stop_probes: Dict[str, float],
+                 confirm: Optional[Callable[[], bool]] = None):
+        self.navigate_path = navigate_path
+        self.stop_probes = stop_probes
+        self.confirm = confirm
+
+    def run(self, sequence: 'Sequence') -> bool:
+        found = clear_ui_and_probe(self.navigate_path, self.stop_probes)
+        if any(found.values()):
+            return not (self.confirm() if self.confirm else True)
+        return True
+
+    def templates(self) -> List[str]:
+        return [SharedAssetPaths.HELP_BUTTON, SharedAssetPaths.CLOSE_ESC, self.navigate_path, *self.stop_probes]
+
+    @property
+    def label(self) -> str:
+        return f"Guard({os.path.basename(self.navigate_path)})"
+
+
+class Branch(Step):
+    """Run then-steps when the condition step succeeds, otherwise-steps when it fails"""
+
+    def __init__(self, condition: Step, then: Iterable[Step] = (), otherwise: Iterable[Step] = ()):
+        self.condition = condition
+        self.then = list(then)
+        self.otherwise = list(otherwise)
+
+    def run(self, sequence: 'Sequence') -> bool:
+        if sequence.run_step(self.condition):
+            return sequence.run_steps(self.then)
+        return sequence.run_steps(self.otherwise)
+
+    def templates(self) -> List[str]:
+        paths = self.condition.templates()
+        for step in self.then + self.otherwise:
+            paths.extend(step.templates())
+        return paths
+
+    @property
+    def label(self) -> str:
+        return f"Branch({self.condition.label})"
+
+
+class Sequence:
+    """Named list of steps with template warm-up and per-step timings"""
+
+    def __init__(self, name: str, steps: Iterable[Step]):
+        self.name = name
+        self.steps = list(steps)
+        self.timings: Dict[str, deque] = {}  # step label -> seconds of recent runs
+        self._local = threading.local()  # Per-thread run state, instances share sequences
+        self._prepared = False
+
+    @property
+    def ended_by(self) -> Optional[Step]:
+        """Innermost step that ended this thread's last run, None when it completed"""
+        return getattr(self._local, 'ended_by', None)
+
+    def templates(self) -> List[str]:
+        """Every template the sequence can search for, in step order"""
+        paths = []
+        for step in self.steps:
+            paths.extend(step.templates())
+        return list(dict.fromkeys(paths))
+
+    def prepare(self) -> bool:
+        """Decode and cache the sequence's templates once"""
+        if self._prepared:
+            return True
+        self._prepared = True
+        return preload_templates(self.templates())
+
+    def run_step(self, step: Step) -> bool:
+        start = time.perf_counter()
+        ok = False
+        try:
+            with span(step.label, "step", sequence=self.name):
+                ok = step.run(self)
+            return ok
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings.setdefault(step.label, deque(maxlen=TIMING_HISTORY)).append(elapsed)
+            record_step(self.name, step.label, bool(ok), elapsed)
+
+    def run_steps(self, steps: Iterable[Step]) -> bool:
+        for step in steps:
+            if not self.run_step(step):
+                if self.ended_by is None:
+                    self._local.ended_by = step
+                return False
+        return True
+
+    def run(self) -> bool:
+        """Execute the sequence, False when any step ends it"""
+        self.prepare()
+        self._local.ended_by = None
+        try:
+            return self.run_steps(self.steps)
+        except Disconnected:
+            logger.warning(f"Disconnected during {self.name} sequence, ending session")
+            return False
+        except Exception as e:
+            logger.error(f"Error in {self.name} sequence: {e}, ending session")
+            return False
+
+    def slowest_steps(self, count: int = 3) -> List[tuple]:
+        """(label, mean seconds) of the slowest steps so far"""
+        means = [(label, sum(values) / len(values)) for label, values in self.timings.items()]
+        return sorted(means, key=lambda item: -item[1])[:count]
@@ -7,6 +7,8 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from bot_utils import ensure_assets_directory
+from vision import get_vision
+from bot_log import get_logger
 
 try:
     from .shared_utils import (
@@ -15,6 +17,9 @@ try:
         check_and_click_go_home,
         check_and_click_close_esc,
         check_and_click_help_button,
+        clear_ui_and_probe,
+        Disconnected,
+        SharedAssetPaths,
         Config
     )
 except ImportError:
@@ -24,9 +29,13 @@ except ImportError:
         check_and_click_go_home,
         check_and_click_close_esc,
         check_and_click_help_button,
+        clear_ui_and_probe,
+        Disconnected,
+        SharedAssetPaths,
         Config
     )
 
+logger = get_logger("fog_sequence")
 
 class AssetPaths:
     """Asset paths for fog scout"""
@@ -43,27 +52,27 @@ class AssetPaths:
 def check_scouter_check() -> bool:
     """Check if scouter check is found on screen"""
     try:
-        location = pyautogui.locateOnScreen(AssetPaths.SCOUTER_CHECK, confidence=0.7)
+        location = get_vision().find(AssetPaths.SCOUTER_CHECK, confidence=0.7)
         if location:
-            print("Scouter check found - ending session", flush=True)
+            logger.info("Scouter check found - ending session")
             return True
         return False
-    except pyautogui.ImageNotFoundException:
-        return False
     except Exception as e:
-        print(f"Error checking scouter check: {e}", flush=True)
+        logger.error(f"Error checking scouter check: {e}")
         return False
 
 
 def execute_fog_scout_sequence() -> bool:
     """Execute fog scout sequence with retry logic"""
-    check_and_click_help_button()
-    check_and_click_close_esc()
-    check_and_click_go_home()
+    try:
+        found = clear_ui_and_probe(SharedAssetPaths.GO_HOME, {AssetPaths.SCOUTER_CHECK: 0.7})
+    except Disconnected:
+        return False
     
     # Check scouter check - if not found, end session
-    if not check_scouter_check():
+    if found[AssetPaths.SCOUTER_CHECK] is None:
         return False
+    logger.info("Scouter check found - sending scout")
     if not try_click_button(AssetPaths.SCOUT_CAMP):
         return False
     
@@ -87,30 +96,26 @@ def execute_fog_scout_sequence() -> bool:
 
 def main():
     """Main execution for standalone fog scout bot"""
-    import io
-    import sys
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    
     pyautogui.FAILSAFE = True
     pyautogui.PAUSE = 0.3
     
     try:
         while True:
-            print("Starting fog scout cycle...", flush=True)
+            logger.info("Starting fog scout cycle...")
             
             if execute_fog_scout_sequence():
-                print("Fog scout cycle completed successfully", flush=True)
-                print("//=======================================", flush=True)
+                logger.info("Fog scout cycle completed successfully")
+                logger.info("//=======================================")
             else:
-                print("Fog scout cycle failed, retrying...", flush=True)
-                print("//=======================================", flush=True)
+                logger.info("Fog scout cycle failed, retrying...")
+                logger.info("//=======================================")
             
             time.sleep(Config.STEP_DELAY())
             
     except KeyboardInterrupt:
-        print("Fog scout bot stopped by user", flush=True)
+        logger.info("Fog scout bot stopped by user")
     except Exception as e:
-        print(f"Unexpected error: {e}", flush=True)
+        logger.error(f"Unexpected error: {e}")
 
 
 if __name__ == "__main__":
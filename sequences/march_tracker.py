@@ -0,0 +1,138 @@
+"""
+March slots - track dispatched armies and predict when a slot frees up
+"""
+import threading
+import time
+from typing import Dict, List, Optional
+from bot_log import get_logger
+
+logger = get_logger("march_tracker")
+
+
+class Config:
+    """March model configuration constants"""
+    SLOTS = 4  # March queue size of the account
+    BARBARIAN_MARCH = 90.0  # Seconds an attack march is out, there and back
+    GATHER_MARCH = 1800.0  # Seconds a gathering march is out
+    BUSY_RECHECK = 300.0  # Screen showed every slot busy with no known return time
+    LATE_RECHECK = 60.0  # Screen showed a march still out after its predicted return
+
+
+class MarchTracker:
+    """Marches sent by the bot with their estimated return times
+
+    The screen is only consulted once a march is due back; until then a full
+    queue is known to be busy without opening anything.
+    """
+
+    def __init__(self, slots: int = Config.SLOTS, state_key: Optional[str] = None):
+        self.slots = slots
+        self.state_key = state_key  # State store key, None keeps the model in memory only
+        self.marches: List[Dict] = []  # {"kind", "sent_at", "returns_at"}
+        self.blocked_until = 0.0  # Every slot seen busy, return times unknown
+        self._restore()
+
+    def _restore(self):
+        """Pick up marches saved by the previous run, return times are wall-clock"""
+        if self.state_key is None:
+            return
+        from state_store import state_store
+        data = state_store.get(self.state_key)
+        try:
+            if data:
+                self.marches = [
+                    {'kind': str(march['kind']), 'sent_at': float(march['sent_at']),
+                     'returns_at': float(march['returns_at'])}
+                    for march in data.get('marches', [])
+                ]
+                self.blocked_until = float(data.get('blocked_until', 0.0))
+        except (AttributeError, KeyError, TypeError, ValueError):
+            self.marches = []
+            self.blocked_until = 0.0
+
+    def _save(self):
+        """Persist marches still out"""
+        if self.state_key is None:
+            return
+        from state_store import state_store
+        state_store.put(self.state_key, {'marches': self.marches, 'blocked_until': self.blocked_until})
+
+    def out(self, now: Optional[float] = None) -> List[Dict]:
+        """Marches predicted to be still out"""
+        now = time.time() if now is None else now
+        return [march for march in self.marches if march['returns_at'] > now]
+
+    def all_busy(self) -> bool:
+        """True when no slot can be free, so the dispatch dialogs need not be opened"""
+        now = time.time()
+        return now < self.blocked_until or len(self.out(now)) >= self.slots
+
+    def seconds_until_free(self) -> float:
+        """Predicted wait until a slot frees up, 0 when one may already be free"""
+        now = time.time()
+        if not self.all_busy():
+            return 0.0
+        returns = [march['returns_at'] for march in self.out(now)]
+        soonest = min(returns) if len(returns) >= self.slots else now
+        return max(0.0, max(self.blocked_until, soonest) - now)
+
+    def record_dispatch(self, kind: str, duration: float):
+        """Account for one march sent out for duration seconds"""
+        now = time.time()
+        self.marches = self.out(now)
+        self.marches.append({'kind': kind, 'sent_at': now, 'returns_at': now + duration})
+        self.blocked_until = 0.0
+        logger.info(f"{kind} march sent, {len(self.marches)}/{self.slots} slots out")
+        self._save()
+
+    def observe_free(self):
+        """Screen showed an idle slot: marches due back are back"""
+        now = time.time()
+        out = self.out(now)
+        if len(out) != len(self.marches) or self.blocked_until:
+            self.marches = out
+            self.blocked_until = 0.0
+            self._save()
+
+    def observe_out(self, kind: str, count: int):
+        """Screen showed count marches of kind out: tracked ones beyond that came back early"""
+        now = time.time()
+        of_kind = sorted((march for march in self.out(now) if march['kind'] == kind),
+                         key=lambda march: march['returns_at'])
+        returned = of_kind[:max(0, len(of_kind) - count)]  # Soonest due back are likeliest home
+        if returned:
+            self.marches = [march for march in self.marches if not any(march is back for back in returned)]
+            logger.info(f"{len(returned)} {kind} march(es) back early, {len(self.out(now))}/{self.slots} slots out")
+            self._save()
+        if count >= self.slots:
+            self.observe_all_busy()
+        else:
+            self.observe_free()
+
+    def observe_all_busy(self):
+        """Screen showed every slot busy: hold marches due back a little longer, or block when none are known"""
+        now = time.time()
+        late = [march for march in self.marches if march['returns_at'] <= now]
+        for march in late:
+            march['returns_at'] = now + Config.LATE_RECHECK
+        if len(self.marches) < self.slots:
+            # Marches sent by hand or before the tracker existed
+            self.blocked_until = now + (Config.LATE_RECHECK if late else Config.BUSY_RECHECK)
+        logger.info(f"All march slots busy, next check in {self.seconds_until_free():.0f}s")
+        self._save()
+
+
+_trackers: Dict[str, MarchTracker] = {}
+_lock = threading.Lock()
+
+
+def get_march_tracker() -> MarchTracker:
+    """March tracker of the current game instance, restored from the state store"""
+    from state_store import scoped
+    key = scoped("marches")
+    with _lock:
+        tracker = _trackers.get(key)
+        if tracker is None:
+            tracker = MarchTracker(state_key=key)
+            _trackers[key] = tracker
+        return tracker
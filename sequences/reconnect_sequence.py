@@ -8,7 +8,8 @@ import os
 import random
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from bot_utils import ensure_assets_directory
+from bot_utils import ensure_assets_directory, click_match
+from bot_log import get_logger
 
 try:
     from .shared_utils import (
@@ -16,12 +17,16 @@ try:
         retry_with_esc,
         Config
     )
+    from .screen_state import ScreenState, classify
 except ImportError:
     from shared_utils import (
         try_click_button,
         retry_with_esc,
         Config
     )
+    from screen_state import ScreenState, classify
+
+logger = get_logger("reconnect_sequence")
 
 
 class AssetPaths:
@@ -33,62 +38,61 @@ class AssetPaths:
 def check_and_click_reconnect() -> bool:
     """Check for reconnect button and click if found"""
     try:
-        if try_click_button(AssetPaths.RECONNECT):
-            print("Reconnect button found - clicking to reconnect", flush=True)
-            return True
-        return False
+        # One classifier pass instead of polling for the button the whole step timeout
+        screen, found = classify()
+        if screen is not ScreenState.DISCONNECTED:
+            return False
+        logger.info("Reconnect button found - clicking to reconnect")
+        click_match(found[AssetPaths.RECONNECT], "reconnect_button.png")
+        return True
     except Exception as e:
-        print(f"Error checking reconnect button: {e}", flush=True)
+        logger.error(f"Error checking reconnect button: {e}")
         return False
 
 
 def execute_reconnect_sequence() -> bool:
     """Execute reconnect sequence"""
     try:
-        print("Checking for disconnection/reconnect button...", flush=True)
+        logger.info("Checking for disconnection/reconnect button...")
         
         # Try to find and click reconnect button
         if check_and_click_reconnect():
-            print("✅ Reconnect successful", flush=True)
+            logger.info("✅ Reconnect successful")
             # Wait a bit longer for reconnection to complete
-            time.sleep(3.0)
+            time.sleep(Config.RECONNECT_DELAY)
             return True
         else:
-            print("No reconnect button found - connection appears stable", flush=True)
+            logger.info("No reconnect button found - connection appears stable")
             return False
             
     except Exception as e:
-        print(f"Error in reconnect sequence: {e}", flush=True)
+        logger.error(f"Error in reconnect sequence: {e}")
         return False
 
 
 def main():
     """Main execution for standalone reconnect bot"""
-    import io
-    import sys
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    
-    print("RoK Reconnect Bot starting...", flush=True)
+    logger.info("RoK Reconnect Bot starting...")
     
     pyautogui.FAILSAFE = True
     pyautogui.PAUSE = 0.3
     
     try:
         while True:
-            print("\n🔌 Checking for reconnection needs...", flush=True)
+            logger.info("\n🔌 Checking for reconnection needs...")
             
             if execute_reconnect_sequence():
-                print("🔌 Reconnection completed", flush=True)
+                logger.info("🔌 Reconnection completed")
             else:
-                print("🔌 No reconnection needed", flush=True)
+                logger.info("🔌 No reconnection needed")
             
-            print("//============================================", flush=True)
+            logger.info("//============================================")
             time.sleep(5.0)  # Check every 5 seconds
             
     except KeyboardInterrupt:
-        print("Reconnect bot stopped by user", flush=True)
+        logger.info("Reconnect bot stopped by user")
     except Exception as e:
-        print(f"Unexpected error: {e}", flush=True)
+        logger.error(f"Unexpected error: {e}")
 
 
 if __name__ == "__main__":
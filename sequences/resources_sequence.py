@@ -4,6 +4,8 @@ import random
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vision import get_vision
+from bot_log import get_logger
 
 try:
     from .shared_utils import (
@@ -15,6 +17,12 @@ try:
         check_and_click_if_found,
         try_click_button_silent,
         move_mouse_zigzag,
+        click_at,
+        click_match,
+        clear_ui_and_probe,
+        wait_for,
+        Disconnected,
+        SharedAssetPaths,
         Config
     )
 except ImportError:
@@ -27,9 +35,22 @@ except ImportError:
         check_and_click_if_found,
         try_click_button_silent,
         move_mouse_zigzag,
+        click_at,
+        click_match,
+        clear_ui_and_probe,
+        wait_for,
+        Disconnected,
+        SharedAssetPaths,
         Config
     )
 
+try:
+    from .march_tracker import get_march_tracker, Config as MarchConfig
+except ImportError:
+    from march_tracker import get_march_tracker, Config as MarchConfig
+
+logger = get_logger("resources_sequence")
+
 
 class AssetPaths:
     """Asset paths for resources farm"""
@@ -54,73 +75,96 @@ class AssetPaths:
 def check_joan_rss():
     """Check if Joan RSS is available and print result"""
     try:
-        location = pyautogui.locateOnScreen(AssetPaths.JOAN_RSS, confidence=0.8)
+        location = get_vision().find(AssetPaths.JOAN_RSS, confidence=0.8)
         if location is not None:
-            print("Joan RSS found - resource available", flush=True)
+            logger.info("Joan RSS found - resource available")
             return True
         else:
-            print("Joan RSS not found - resource not available", flush=True)
+            logger.info("Joan RSS not found - resource not available")
             return False
     except Exception:
-        print("Joan RSS check failed - error occurred", flush=True)
+        logger.info("Joan RSS check failed - error occurred")
         return False
 
 def check_gaius_rss():
     """Check if Gaius RSS is available and print result"""
     try:
-        location = pyautogui.locateOnScreen(AssetPaths.GAIUS_RSS, confidence=0.8)
+        location = get_vision().find(AssetPaths.GAIUS_RSS, confidence=0.8)
         if location is not None:
-            print("Gaius RSS found - resource available", flush=True)
+            logger.info("Gaius RSS found - resource available")
             return True
         else:
-            print("Gaius RSS not found - resource not available", flush=True)
+            logger.info("Gaius RSS not found - resource not available")
             return False
     except Exception:
-        print("Gaius RSS check failed - error occurred", flush=True)
+        logger.info("Gaius RSS check failed - error occurred")
         return False
 
 def check_constance_rss():
     """Check if Constance RSS is available and print result"""
     try:
-        location = pyautogui.locateOnScreen(AssetPaths.CONSTANCE_RSS, confidence=0.8)
+        location = get_vision().find(AssetPaths.CONSTANCE_RSS, confidence=0.8)
         if location is not None:
-            print("Constance RSS found - resource available", flush=True)
+            logger.info("Constance RSS found - resource available")
             return True
         else:
-            print("Constance RSS not found - resource not available", flush=True)
+            logger.info("Constance RSS not found - resource not available")
             return False
     except Exception:
-        print("Constance RSS check failed - error occurred", flush=True)
+        logger.info("Constance RSS check failed - error occurred")
         return False
 
 def check_sarka_rss():
     """Check if Sarka RSS is available and print result"""
     try:
-        location = pyautogui.locateOnScreen(AssetPaths.SARKA_RSS, confidence=0.8)
+        location = get_vision().find(AssetPaths.SARKA_RSS, confidence=0.8)
         if location is not None:
-            print("Sarka RSS found - resource available", flush=True)
+            logger.info("Sarka RSS found - resource available")
             return True
         else:
-            print("Sarka RSS not found - resource not available", flush=True)
+            logger.info("Sarka RSS not found - resource not available")
             return False
     except Exception:
-        print("Sarka RSS check failed - error occurred", flush=True)
+        logger.info("Sarka RSS check failed - error occurred")
         return False
 
+RSS_COMMANDERS = {
+    AssetPaths.JOAN_RSS: 0.8,
+    AssetPaths.GAIUS_RSS: 0.8,
+    AssetPaths.CONSTANCE_RSS: 0.8,
+    AssetPaths.SARKA_RSS: 0.8
+}
+
+
+def count_rss_commanders() -> int:
+    """Count how many of the four RSS commanders are visible, all matched on one capture
+
+    Each visible commander is a gathering march out; the march tracker is
+    corrected with the count, so gatherers back early free their slots.
+    """
+    try:
+        counts = get_vision().count_many(RSS_COMMANDERS)
+        found = [os.path.basename(image_path)[:-4] for image_path, count in counts.items() if count]
+        logger.info(f"RSS commanders found: {len(found)}/{len(RSS_COMMANDERS)} {found}")
+        get_march_tracker().observe_out("gather", len(found))
+        return len(found)
+    except Exception:
+        logger.info("RSS commander count failed - error occurred")
+        return 0
+
 def execute_resource_gathering():
     """Execute resource gathering sequence when Joan RSS not found"""
     try:
         # Step 1: Setup - Press ESC to clear UI
-        check_and_click_help_button()
-        check_and_click_close_esc()
-        check_and_click_go_outside()
+        found = clear_ui_and_probe(SharedAssetPaths.GO_OUTSIDE, {AssetPaths.HOME_CENTER: 0.7})
         
         # Check and click HOME_CENTER if found
-        if try_click_button_silent(AssetPaths.HOME_CENTER):
-            print("HOME_CENTER found - clicked it", flush=True)
+        if found[AssetPaths.HOME_CENTER]:
+            click_match(found[AssetPaths.HOME_CENTER], "home_center.png")
+            logger.info("HOME_CENTER found - clicked it")
             time.sleep(0.5)
         else:
-            print("HOME_CENTER not found - continuing process", flush=True)
+            logger.info("HOME_CENTER not found - continuing process")
         
         # Click FIND_BAR
         if not try_click_button(AssetPaths.FIND_BAR):
@@ -132,7 +176,7 @@ def execute_resource_gathering():
         # resource_options = [AssetPaths.GO_RSS]
         selected_resource = random.choice(resource_options)
         resource_name = selected_resource.split('/')[-1].replace('.png', '')
-        print(f"Selected resource: {resource_name}", flush=True)
+        logger.info(f"Selected resource: {resource_name}")
         
         if not try_click_button(selected_resource):
             return False
@@ -149,44 +193,47 @@ def execute_resource_gathering():
         if not retry_with_esc(AssetPaths.ADD_TROOP):
             return False
         
+        # Optional buttons below live in the march dialog - make sure it rendered first
+        wait_for(AssetPaths.SEND_TROOP)
+        
         # Check if remove second commander button is found and click it
         check_and_click_if_found(AssetPaths.REMOVE_SECOND_COMMANDER, "Remove second commander")
         
         # Check if save_troop found and click 10 pixels to the left of its center
         try:
-            location = pyautogui.locateOnScreen(AssetPaths.SAVE_TROOP, confidence=0.8)
+            location = get_vision().find(AssetPaths.SAVE_TROOP, confidence=0.8)
             if location is not None:
-                print("Save troop found - clicking 10 pixels to the left", flush=True)
+                logger.info("Save troop found - clicking 10 pixels to the left")
                 center_x = location.left + location.width // 2
                 center_y = location.top + location.height // 2
                 click_x = center_x - 30  # Move 30 pixels to the left
                 move_mouse_zigzag(click_x, center_y)
-                pyautogui.click(click_x, center_y)
+                click_at(click_x, center_y)
                 time.sleep(Config.STEP_DELAY())
             else:
-                print("Save troop not found - continuing", flush=True)
+                logger.info("Save troop not found - continuing")
         except Exception as e:
-            print(f"Error checking save troop: {e}", flush=True)
+            logger.error(f"Error checking save troop: {e}")
         
         # Click SEND_TROOP
         if not retry_with_esc(AssetPaths.SEND_TROOP):
             return False
         
-        print("Resource gathering sequence completed successfully", flush=True)
+        get_march_tracker().record_dispatch("gather", MarchConfig.GATHER_MARCH)
+        logger.info("Resource gathering sequence completed successfully")
         return True
         
+    except Disconnected:
+        logger.warning("Disconnected - resource gathering ended")
+        return False
     except Exception as e:
-        print(f"Error in resource gathering: {e}", flush=True)
+        logger.error(f"Error in resource gathering: {e}")
         return False
 
 
 def main():
     """Main execution for resources sequence with continuous loop"""
-    import io
-    import sys
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    
-    print(f"RoK Resources Bot starting in {Config.STEP_DELAY()} seconds...")
+    logger.info(f"RoK Resources Bot starting in {Config.STEP_DELAY()} seconds...")
     time.sleep(Config.STEP_DELAY())
     
     pyautogui.FAILSAFE = True
@@ -194,32 +241,34 @@ def main():
     
     try:
         while True:
-            print("Starting resources cycle...", flush=True)
+            logger.info("Starting resources cycle...")
+            
+            # Known-busy march queue - skip the scan until a march is due back
+            marches = get_march_tracker()
+            if marches.all_busy():
+                wait = marches.seconds_until_free()
+                logger.info(f"All march slots busy - waiting {wait:.0f}s")
+                time.sleep(wait)
+                continue
             
             # Check RSS commanders and count how many are available
-            rss_checks = [
-                check_joan_rss(),
-                check_gaius_rss(), 
-                check_constance_rss(),
-                check_sarka_rss()
-            ]
-            available_count = sum(rss_checks)
+            available_count = count_rss_commanders()
             
             if available_count >= 3:
-                print(f"RSS commanders available ({available_count}/4) - no gathering needed", flush=True)
+                logger.info(f"RSS commanders available ({available_count}/4) - no gathering needed")
             else:
-                print("Starting resource gathering sequence...", flush=True)
+                logger.info("Starting resource gathering sequence...")
                 if execute_resource_gathering():
-                    print("Resource gathering cycle completed successfully", flush=True)
+                    logger.info("Resource gathering cycle completed successfully")
                 else:
-                    print("Resource gathering cycle failed, retrying...", flush=True)
+                    logger.info("Resource gathering cycle failed, retrying...")
             
             time.sleep(Config.STEP_DELAY())
             
     except KeyboardInterrupt:
-        print("Resources bot stopped by user", flush=True)
+        logger.info("Resources bot stopped by user")
     except Exception as e:
-        print(f"Unexpected error: {e}", flush=True)
+        logger.error(f"Unexpected error: {e}")
 
 
 if __name__ == "__main__":
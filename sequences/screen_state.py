@@ -0,0 +1,80 @@
+"""
+Screen state - label the current UI screen from one batched anchor probe
+"""
+import sys
+import os
+from enum import Enum
+from typing import Dict, Optional, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bot_utils import Match
+from vision import get_vision
+from bot_log import get_logger
+
+logger = get_logger("screen_state")
+
+
+class ScreenState(Enum):
+    """UI screens the bot can be on"""
+    DISCONNECTED = "disconnected"
+    POPUP = "popup"
+    BARRACKS = "barracks"
+    MARCH = "march"
+    MAP = "map"
+    CITY = "city"
+    UNKNOWN = "unknown"
+
+
+class AssetPaths:
+    """Anchor templates, one or more per screen"""
+    RECONNECT = "assets/reconnect_button.png"
+    CLOSE_ESC = "assets/close_esc.png"
+    CONFIRM_TRAIN = "assets/troop/confirm_train.png"
+    SEND_TROOP = "assets/barbarian/send_troop_button.png"
+    GO_HOME = "assets/go_home.png"
+    GO_OUTSIDE = "assets/go_outside.png"
+
+
+# Checked in order: popups are drawn over the map or city view, so a popup
+# anchor wins over the view anchor behind it
+ANCHORS: Dict[ScreenState, Dict[str, float]] = {
+    ScreenState.DISCONNECTED: {AssetPaths.RECONNECT: 0.7},
+    ScreenState.POPUP: {AssetPaths.CLOSE_ESC: 0.7},
+    ScreenState.MAP: {AssetPaths.GO_HOME: 0.7},  # Home button only shows outside the city
+    ScreenState.CITY: {AssetPaths.GO_OUTSIDE: 0.7}
+}
+
+# Full-screen panels hide the city/map toggle, so their anchors (which have
+# no ROI hint) are only searched when none of the above was found
+DIALOG_ANCHORS: Dict[ScreenState, Dict[str, float]] = {
+    ScreenState.BARRACKS: {AssetPaths.CONFIRM_TRAIN: 0.7},
+    ScreenState.MARCH: {AssetPaths.SEND_TROOP: 0.7}
+}
+
+
+def _probes(anchors: Dict[ScreenState, Dict[str, float]]) -> Dict[str, float]:
+    probes = {}
+    for state_anchors in anchors.values():
+        probes.update(state_anchors)
+    return probes
+
+
+def state_of(found: Dict[str, Optional[Match]]) -> ScreenState:
+    """First screen whose anchor was found"""
+    for anchors in (ANCHORS, DIALOG_ANCHORS):
+        for state, state_anchors in anchors.items():
+            if any(found.get(image_path) is not None for image_path in state_anchors):
+                return state
+    return ScreenState.UNKNOWN
+
+
+def classify(extra_probes: Optional[Dict[str, float]] = None) -> Tuple[ScreenState, Dict[str, Optional[Match]]]:
+    """Screen state and every probed match, extra probes answered by the same pass"""
+    probes = _probes(ANCHORS)
+    probes.update(extra_probes or {})
+    found = get_vision().find_many(probes)
+    state = state_of(found)
+    if state is ScreenState.UNKNOWN:
+        found.update(get_vision().find_many(_probes(DIALOG_ANCHORS)))  # Same frame, no input in between
+        state = state_of(found)
+    logger.debug(f"Screen: {state.value}")
+    return state, found
@@ -6,20 +6,39 @@ import time
 import sys
 import os
 import random
+from typing import Dict, Optional, Tuple
 
 # Add parent directory to path when running as standalone
 if __name__ == '__main__' or '.' not in __name__:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from bot_utils import click_button, move_mouse_zigzag
+from bot_utils import click_button, click_match, move_mouse_zigzag, press_key, click_at, Match
+from vision import get_vision
+from bot_log import get_logger
+from metrics import record_button
+
+try:
+    from .screen_state import ScreenState, classify, AssetPaths as ScreenAssetPaths
+except ImportError:
+    from screen_state import ScreenState, classify, AssetPaths as ScreenAssetPaths
+
+logger = get_logger("shared_utils")
 
 
 class Config:
     """Configuration constants"""
     MAX_RETRIES = 2
     STEP_DELAY = lambda: random.uniform(1.5, 2.5)
-    BUTTON_DELAY = lambda: random.uniform(1.5, 2.5)
+    BUTTON_DELAY = lambda: random.uniform(0.25, 0.6)  # Human-like floor after a click, next step waits on its own
     RETRY_DELAY = lambda: random.uniform(1.5, 2.5)
+    STEP_TIMEOUT = 2.5  # Max seconds to wait for the next button to render
+    OPTIONAL_TIMEOUT = 0.5  # Max seconds to look for a popup that usually doesn't show
+    POLL_INTERVAL = 0.15  # Seconds between captures while waiting
+    RECONNECT_DELAY = 3.0  # Seconds for the game to reload after reconnecting
+
+
+class Disconnected(Exception):
+    """The game showed the reconnect screen, the running sequence must end"""
 
 
 class SharedAssetPaths:
@@ -31,12 +50,32 @@ class SharedAssetPaths:
     HELP_BUTTON = f"{BASE_DIR}/help_button.png"
 
 
-def try_click_button(button_path: str) -> bool:
-    """Try to click button once"""
-    if click_button(button_path):
-        time.sleep(Config.BUTTON_DELAY())
-        return True
-    return False
+def wait_for(button_path: str, timeout: float = Config.STEP_TIMEOUT,
+             poll_interval: float = Config.POLL_INTERVAL, confidence: float = 0.7) -> Optional[Match]:
+    """Return as soon as button is visible, None after timeout"""
+    return get_vision().wait_for(button_path, timeout, poll_interval, confidence)
+
+
+def wait_for_any(probes: Dict[str, float], timeout: float = Config.STEP_TIMEOUT,
+                 poll_interval: float = Config.POLL_INTERVAL) -> Optional[Tuple[str, Match]]:
+    """Return (path, match) as soon as any of the buttons is visible"""
+    return get_vision().wait_for_any(probes, timeout, poll_interval)
+
+
+def try_click_button(button_path: str, timeout: float = Config.STEP_TIMEOUT) -> bool:
+    """Wait for button to render, click it, then pause for the human-like floor"""
+    button_name = os.path.basename(button_path)
+    logger.debug(f"Waiting for image: {button_path}")
+    start = time.perf_counter()
+    match = wait_for(button_path, timeout)
+    record_button(button_path, match is not None, time.perf_counter() - start)
+    if match is None:
+        logger.info(f"Button not found: {button_name}")
+        return False
+    logger.debug(f"Image found with accuracy: {match.score:.3f}")
+    click_match(match, button_name)
+    time.sleep(Config.BUTTON_DELAY())
+    return True
 
 
 def try_click_button_silent(button_path: str) -> bool:
@@ -47,17 +86,17 @@ def try_click_button_silent(button_path: str) -> bool:
 def check_and_click_if_found(button_path: str, button_name: str, confidence: float = 0.7) -> bool:
     """Check if button is found and click it if available, otherwise continue"""
     try:
-        location = pyautogui.locateOnScreen(button_path, confidence=confidence)
+        location = get_vision().find(button_path, confidence=confidence)
         if location is not None:
-            print(f"{button_name} found - clicking it", flush=True)
-            pyautogui.click(location)
+            logger.info(f"{button_name} found - clicking it")
+            click_at(*location.center)
             time.sleep(Config.STEP_DELAY())
             return True
         else:
-            print(f"{button_name} not found - continuing", flush=True)
+            logger.info(f"{button_name} not found - continuing")
             return False
     except Exception as e:
-        print(f"Error checking {button_name}: {e}", flush=True)
+        logger.error(f"Error checking {button_name}: {e}")
         return False
 
 
@@ -65,10 +104,9 @@ def check_and_click_go_home() -> bool:
     """Check go home button and press space if found"""
     try:
         # Check if GO_HOME button exists
-        location = pyautogui.locateOnScreen(SharedAssetPaths.GO_HOME, confidence=0.7)
-        if location is not None:
-            print("GO_HOME found - pressing space", flush=True)
-            pyautogui.press('space')
+        if get_vision().exists(SharedAssetPaths.GO_HOME, confidence=0.7):
+            logger.info("GO_HOME found - pressing space")
+            press_key('space')
             time.sleep(Config.STEP_DELAY())
             return True
         return False
@@ -80,10 +118,9 @@ def check_and_click_go_outside() -> bool:
     """Check go outside button and press space if found"""
     try:
         # Check if GO_OUTSIDE button exists
-        location = pyautogui.locateOnScreen(SharedAssetPaths.GO_OUTSIDE, confidence=0.7)
-        if location is not None:
-            print("GO_OUTSIDE found - pressing space", flush=True)
-            pyautogui.press('space')
+        if get_vision().exists(SharedAssetPaths.GO_OUTSIDE, confidence=0.7):
+            logger.info("GO_OUTSIDE found - pressing space")
+            press_key('space')
             time.sleep(Config.STEP_DELAY())
             return True
         return False
@@ -113,12 +150,61 @@ def check_and_click_help_button() -> bool:
         return False
 
 
+def _reconnect_if_disconnected(screen: ScreenState, found: Dict[str, Optional[Match]]):
+    """Click reconnect and raise Disconnected when the screen shows the reconnect button"""
+    if screen is ScreenState.DISCONNECTED:
+        logger.info("Disconnected - clicking reconnect and ending session")
+        click_match(found[ScreenAssetPaths.RECONNECT], "reconnect_button.png")
+        time.sleep(Config.RECONNECT_DELAY)
+        raise Disconnected()
+
+
+def clear_ui_and_probe(navigate_path: str, extra_probes: Dict[str, float]) -> Dict[str, Optional[Match]]:
+    """Classify the screen, recover to the navigated view and answer extra checks
+
+    One batched pass labels the screen and runs the extra probes. Only the
+    recovery the screen needs is done: close a popup, back out of a dialog
+    left open, or press space when navigate_path is showing. On the reconnect
+    screen, reconnect is clicked and Disconnected is raised - nothing on
+    screen says anything about the probes then.
+    """
+    screen, found = classify({SharedAssetPaths.HELP_BUTTON: 0.7, navigate_path: 0.7, **extra_probes})
+    _reconnect_if_disconnected(screen, found)
+    screen_changed = False
+    
+    if found[SharedAssetPaths.HELP_BUTTON]:
+        click_match(found[SharedAssetPaths.HELP_BUTTON], "help_button.png")
+        time.sleep(Config.BUTTON_DELAY())
+        screen_changed = True
+    
+    if screen is ScreenState.POPUP:
+        click_match(found[ScreenAssetPaths.CLOSE_ESC], "close_esc.png")
+        time.sleep(Config.BUTTON_DELAY())
+        screen_changed = True
+    elif screen in (ScreenState.BARRACKS, ScreenState.MARCH):
+        logger.info(f"{screen.value} dialog left open - pressing ESC")
+        press_key('escape')
+        time.sleep(Config.BUTTON_DELAY())
+        screen_changed = True
+    
+    # A closed popup or dialog may have been hiding the navigation button
+    if screen_changed:
+        screen, found = classify({navigate_path: 0.7, **extra_probes})
+        _reconnect_if_disconnected(screen, found)
+    
+    if found[navigate_path]:
+        logger.info(f"{os.path.basename(navigate_path)} found on {screen.value} - pressing space")
+        press_key('space')
+        time.sleep(Config.STEP_DELAY())
+        found = get_vision().find_many(extra_probes)
+    return {image_path: found[image_path] for image_path in extra_probes}
+
 
 def retry_with_esc(button_path: str, max_retries: int = 1) -> bool:
     """Retry button click with ESC press on failure"""
     for retry_count in range(max_retries):
         if try_click_button(button_path):
             return True
-        pyautogui.press('escape')
+        press_key('escape')
         time.sleep(Config.RETRY_DELAY())
     return False
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+Stamina model - predict action points from regen rate and attacks launched
+"""
+import threading
+import time
+from typing import Dict, Optional
+from bot_log import get_logger
+
+logger = get_logger("stamina_tracker")
+
+
+class Config:
+    """Stamina model configuration constants"""
+    REGEN_SECONDS = 90.0  # Seconds per regenerated point
+    ATTACK_COST = 50  # Points spent per barbarian attack
+    MAX_STAMINA = 1500  # Regen stops at the cap
+    REREAD_MARGIN = 50  # Re-read when the prediction is this close to the attack threshold
+    MAX_PREDICTION_AGE = 3600.0  # Re-read at least this often (potions, events, manual play)
+    DRIFT_TOLERANCE = 30  # Reading vs prediction difference reported as drift
+    DEFAULT_RECOVERY = 600.0  # Seconds to wait when nothing was ever read
+
+
+class StaminaTracker:
+    """One OCR reading rolled forward by elapsed time and attacks"""
+
+    def __init__(self, min_stamina: int, state_key: Optional[str] = None):
+        self.min_stamina = min_stamina
+        self.state_key = state_key  # State store key, None keeps the model in memory only
+        self.value: Optional[float] = None  # Stamina at observed_at
+        self.observed_at = 0.0
+        self.read_at = 0.0  # Last real reading, drift accumulates after MAX_PREDICTION_AGE
+        self._restore()
+
+    def _restore(self):
+        """Pick up the model saved by the previous run, still valid since regen is wall-clock"""
+        if self.state_key is None:
+            return
+        from state_store import state_store
+        data = state_store.get(self.state_key)
+        try:
+            if data and data.get('value') is not None:
+                self.value = float(data['value'])
+                self.observed_at = float(data['observed_at'])
+                self.read_at = float(data['read_at'])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            self.value = None
+
+    def _save(self):
+        """Persist the model anchor"""
+        if self.state_key is None:
+            return
+        from state_store import state_store
+        state_store.put(self.state_key, {
+            'value': self.value, 'observed_at': self.observed_at, 'read_at': self.read_at
+        })
+
+    def observe(self, value: int):
+        """Anchor the model on an OCR reading"""
+        now = time.time()
+        predicted = self.predict(now)
+        if predicted is not None and abs(predicted - value) > Config.DRIFT_TOLERANCE:
+            logger.info(f"Stamina drift: predicted {predicted:.0f}, read {value}")
+        self.value = float(value)
+        self.observed_at = now
+        self.read_at = now
+        self._save()
+
+    def predict(self, now: Optional[float] = None) -> Optional[float]:
+        """Current stamina estimate, None before the first reading"""
+        if self.value is None:
+            return None
+        now = time.time() if now is None else now
+        regenerated = (now - self.observed_at) / Config.REGEN_SECONDS
+        if self.value >= Config.MAX_STAMINA:
+            return self.value  # Above cap (potions) nothing regenerates
+        return min(float(Config.MAX_STAMINA), self.value + regenerated)
+
+    def record_attack(self, cost: int = Config.ATTACK_COST):
+        """Account for one launched attack"""
+        predicted = self.predict()
+        if predicted is None:
+            return
+        self.value = predicted - cost
+        self.observed_at = time.time()
+        self._save()
+
+    def needs_reading(self) -> bool:
+        """True when the prediction can't be trusted to decide the next attack"""
+        predicted = self.predict()
+        if predicted is None:
+            return True
+        if time.time() - self.read_at > Config.MAX_PREDICTION_AGE:
+            return True
+        return predicted <= self.min_stamina + Config.REREAD_MARGIN
+
+    def seconds_until_attack(self) -> float:
+        """Predicted wait until stamina is back above the attack threshold"""
+        predicted = self.predict()
+        if predicted is None:
+            return Config.DEFAULT_RECOVERY
+        missing = self.min_stamina + 1 - predicted
+        return max(0.0, missing * Config.REGEN_SECONDS)
+
+
+_trackers: Dict[str, StaminaTracker] = {}
+_lock = threading.Lock()
+
+
+def get_stamina_tracker(min_stamina: int) -> StaminaTracker:
+    """Stamina tracker of the current game instance, restored from the state store"""
+    from state_store import scoped
+    key = scoped("stamina")
+    with _lock:
+        tracker = _trackers.get(key)
+        if tracker is None:
+            tracker = StaminaTracker(min_stamina, key)
+            _trackers[key] = tracker
+        return tracker
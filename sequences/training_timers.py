@@ -0,0 +1,108 @@
+"""
+Training queue timers - OCR of the countdown under each busy troop building
+"""
+import os
+import re
+import sys
+import threading
+import time
+from typing import Dict, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bot_utils import get_frame, Match
+from state_store import state_store, scoped
+from bot_log import get_logger
+from tracing import span
+
+try:
+    from .barbarian_sequence import TESSERACT_AVAILABLE  # Also points pytesseract at its binary
+except ImportError:
+    from barbarian_sequence import TESSERACT_AVAILABLE
+
+if TESSERACT_AVAILABLE:
+    import pytesseract
+
+logger = get_logger("training_timers")
+
+
+class Config:
+    """Training timer configuration constants"""
+    STATE_KEY = "training_timers"  # State store key of the completion timestamps per troop type
+    # Countdown box relative to the training check match: x, y, w, h in multiples of the match size
+    TIMER_BOX = (-0.75, 1.0, 2.5, 0.7)
+    OCR_CONFIG = '--psm 7 -c tessedit_char_whitelist=0123456789:d'
+    MAX_SECONDS = 30 * 24 * 3600  # Anything longer is a misread
+
+
+TIMER_PATTERN = re.compile(r'(?:(\d+)\s*d\s*)?(?:(\d{1,2}):)?(\d{1,2}):(\d{2})')
+
+
+def parse_countdown(text: str) -> Optional[int]:
+    """Seconds of a "1d 02:13:45", "02:13:45" or "13:45" countdown"""
+    match = TIMER_PATTERN.search(text.replace(' ', ''))
+    if not match:
+        return None
+    days, hours, minutes, seconds = (int(group) if group else 0 for group in match.groups())
+    if minutes >= 60 or seconds >= 60:
+        return None
+    total = ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+    return total if 0 < total <= Config.MAX_SECONDS else None
+
+
+def read_countdown(check: Match) -> Optional[int]:
+    """OCR the countdown shown next to a training check match, in seconds"""
+    if not TESSERACT_AVAILABLE:
+        return None
+    try:
+        from PIL import Image
+        bx, by, bw, bh = Config.TIMER_BOX
+        left = max(0, int(check.left + bx * check.width))
+        top = max(0, int(check.top + by * check.height))
+        width = int(bw * check.width)
+        height = int(bh * check.height)
+        cropped = Image.fromarray(get_frame().crop(left, top, width, height))
+        with span("ocr_tesseract", "ocr", config=Config.OCR_CONFIG):
+            text = pytesseract.image_to_string(cropped, config=Config.OCR_CONFIG).strip()
+        seconds = parse_countdown(text)
+        if seconds is None:
+            logger.warning(f"Could not read training timer from '{text}'")
+        return seconds
+    except Exception as e:
+        logger.error(f"Error reading training timer: {e}")
+        return None
+
+
+class TrainingTimers:
+    """Completion timestamp per troop type, persisted per game instance"""
+
+    def __init__(self, key: str = Config.STATE_KEY):
+        self.key = key
+        self._lock = threading.Lock()
+
+    def _completions(self) -> Dict[str, float]:
+        """Stored timestamps of the current instance"""
+        data = state_store.get(scoped(self.key))
+        try:
+            return {troop: float(ts) for troop, ts in (data or {}).items()}
+        except (AttributeError, TypeError, ValueError):
+            return {}
+
+    def completion(self, troop: str) -> Optional[float]:
+        """Wall-clock time the troop's queue frees up, None when unknown"""
+        return self._completions().get(troop)
+
+    def remaining(self, troop: str) -> Optional[float]:
+        """Seconds until the troop's queue frees up, None when unknown or already free"""
+        completion = self.completion(troop)
+        if completion is None or completion <= time.time():
+            return None
+        return completion - time.time()
+
+    def set_remaining(self, troop: str, seconds: int):
+        """Record a countdown read now"""
+        with self._lock:
+            completions = self._completions()
+            completions[troop] = time.time() + seconds
+            state_store.put(scoped(self.key), completions)
+
+
+training_timers = TrainingTimers()
@@ -0,0 +1,158 @@
+"""
+Troop Training Sequence - one step list shared by infantry, archers, cavalry and siege
+"""
+import pyautogui
+import time
+import sys
+import os
+import threading
+from typing import Dict
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bot_utils import move_mouse_zigzag
+from vision import get_vision
+from bot_log import get_logger
+
+try:
+    from .engine import Sequence, Guard, Click, Find, RetryWithEsc, PressKey, Log, Fail, Branch
+    from .shared_utils import SharedAssetPaths, Config
+    from .training_timers import read_countdown, training_timers
+except ImportError:
+    from engine import Sequence, Guard, Click, Find, RetryWithEsc, PressKey, Log, Fail, Branch
+    from shared_utils import SharedAssetPaths, Config
+    from training_timers import read_countdown, training_timers
+
+logger = get_logger("troop_sequence")
+
+
+# Global flag for F12 stop signal
+stop_bot_flag = threading.Event()
+
+def monitor_f12_key():
+    """Monitor for F12 key press to stop the bot"""
+    try:
+        import keyboard
+        keyboard.wait('f12')
+        logger.info("F12 pressed - Stopping bot...")
+        stop_bot_flag.set()
+    except ImportError:
+        pass
+    except Exception:
+        pass
+
+
+class TroopTraining:
+    """Training flow of one troop type, built from its AssetPaths"""
+
+    def __init__(self, troop: str, troop_house: str, troop_train: str, confirm_train: str,
+                 add_rss: str, training_check: str, confirm_confidence: float = 0.7):
+        self.troop = troop
+        self.training_check = training_check
+        TRAININGS[troop.lower()] = self
+        self.guard = Guard(SharedAssetPaths.GO_HOME, {training_check: 0.6}, confirm=self.check_training_check)
+        self.sequence = Sequence(troop.lower(), [
+            # Already training - end session
+            self.guard,
+            # Click troop house (2 times), then train button
+            Click(troop_house),
+            Click(troop_house),
+            Click(troop_train),
+            Branch(Find(confirm_train, confidence=confirm_confidence), then=[
+                Log("Confirm train found - proceeding with training"),
+                RetryWithEsc(confirm_train),
+                # Resources short: ADD_RSS popup, then confirm again - usually absent, so only a short look
+                Branch(Click(add_rss, timeout=Config.OPTIONAL_TIMEOUT, delay=Config.STEP_DELAY), then=[
+                    Log("ADD_RSS clicked - clicking CONFIRM_TRAIN again"),
+                    RetryWithEsc(confirm_train)
+                ])
+            ], otherwise=[
+                Log("Confirm train not found - pressing ESC and ending session"),
+                PressKey('escape'),
+                Fail()
+            ])
+        ])
+
+    def check_training_check(self) -> bool:
+        """Check if the training check is found on screen"""
+        try:
+            location = get_vision().find(self.training_check, confidence=0.6)
+            if location:
+                logger.info(f"{self.troop} training check found - ending session")
+                read_training_timers()
+                move_mouse_zigzag(*location.center)
+                return True
+            return False
+        except Exception as e:
+            logger.error(f"Error checking {self.troop.lower()} training check: {e}")
+            return False
+
+    def run(self) -> str:
+        """Execute the training sequence, returning SUCCESS, BUSY (queue still training) or FAILED"""
+        if self.sequence.run():
+            return "SUCCESS"
+        if self.sequence.ended_by is self.guard:
+            return "BUSY"
+        return "FAILED"
+
+    def execute(self) -> bool:
+        """Execute the training sequence"""
+        return self.run() == "SUCCESS"
+
+    def main(self):
+        """Main execution for a standalone training bot"""
+        name = self.troop.lower()
+        logger.info(f"RoK {self.troop} Training Bot starting in {Config.STEP_DELAY()} seconds...")
+        logger.info("🔴 Press F12 anytime to stop the bot")
+        time.sleep(Config.STEP_DELAY())
+
+        pyautogui.FAILSAFE = True
+        pyautogui.PAUSE = 0.3
+
+        # Start F12 key monitoring in a separate thread
+        f12_thread = threading.Thread(target=monitor_f12_key, daemon=True)
+        f12_thread.start()
+
+        try:
+            while True:
+                # Check if F12 was pressed
+                if stop_bot_flag.is_set():
+                    logger.info("🛑 Bot stopped by F12 key press")
+                    break
+
+                logger.info(f"Starting {name} training cycle...")
+
+                if self.execute():
+                    logger.info(f"{self.troop} training cycle completed successfully")
+                else:
+                    logger.info(f"{self.troop} training cycle failed, retrying...")
+                logger.info("//============================================")
+
+                time.sleep(Config.STEP_DELAY())
+
+        except KeyboardInterrupt:
+            logger.info(f"{self.troop} training bot stopped by user")
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+
+
+TRAININGS: Dict[str, TroopTraining] = {}  # lowercase troop name -> training flow
+
+
+def read_training_timers() -> Dict[str, int]:
+    """OCR the countdown of every busy queue visible in the current frame
+
+    Completion timestamps are persisted so the scheduler can come back right
+    when each queue frees up. Returns troop -> seconds for the timers read.
+    """
+    probes = {training.training_check: 0.6 for training in TRAININGS.values()}
+    found = get_vision().find_many(probes)
+    read = {}
+    for troop, training in TRAININGS.items():
+        match = found.get(training.training_check)
+        if match is None:
+            continue
+        seconds = read_countdown(match)
+        if seconds is not None:
+            training_timers.set_remaining(troop, seconds)
+            read[troop] = seconds
+            logger.info(f"{training.troop} queue frees up in {seconds // 3600}h {seconds % 3600 // 60:02d}m")
+    return read
@@ -0,0 +1,120 @@
+"""
+Persistent bot state - append-only JSON log so restarts resume where they stopped
+
+Every put() appends one {"key", "value", "ts"} line and the last line per
+key wins on load. Replaying a few hundred lines takes a millisecond or two,
+and the log is rewritten with one line per key - on load or after a put -
+once it grows past COMPACT_RATIO times the number of live keys. A torn last
+line from a crash is skipped, and the next put starts on a fresh line.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from bot_log import get_logger
+
+logger = get_logger("state_store")
+
+
+class Config:
+    """State store configuration constants"""
+    STATE_PATH = "bot_state.jsonl"
+    COMPACT_RATIO = 20  # Rewrite the log when it holds this many lines per live key
+    COMPACT_MIN_LINES = 200  # Never compact smaller logs
+
+
+class StateStore:
+    """Key/value state persisted as an append-only JSON-lines log"""
+
+    def __init__(self, path: str = Config.STATE_PATH):
+        self.path = path
+        self._lock = threading.RLock()  # compact() runs inside put()
+        self._values: Dict[str, Any] = {}
+        self._lines = 0
+        self._torn_tail = False  # Log does not end with a newline
+        self.load()
+
+    def load(self):
+        """Replay the log, last value per key wins"""
+        values, lines, torn_tail = {}, 0, False
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    torn_tail = not line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                        values[entry['key']] = entry['value']
+                        lines += 1
+                    except (ValueError, KeyError, TypeError):
+                        continue  # Torn write
+        except OSError:
+            pass
+        with self._lock:
+            self._values = values
+            self._lines = lines
+            self._torn_tail = torn_tail
+            if self._needs_compaction():
+                self.compact()
+
+    def reopen(self, path: str):
+        """Switch to another log, e.g. a scratch log that keeps benchmarks out of the live state"""
+        with self._lock:
+            self.path = path
+            self.load()
+
+    def _needs_compaction(self) -> bool:
+        return self._lines > max(Config.COMPACT_MIN_LINES, Config.COMPACT_RATIO * len(self._values))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Last stored value of key"""
+        return self._values.get(key, default)
+
+    def put(self, key: str, value: Any):
+        """Store value under key, skipped when unchanged"""
+        with self._lock:
+            if key in self._values and self._values[key] == value:
+                return
+            try:
+                line = json.dumps({'key': key, 'value': value, 'ts': round(time.time(), 3)},
+                                  ensure_ascii=False, sort_keys=True)
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    # Keep a torn line from a crash from swallowing this record
+                    f.write(("\n" if self._torn_tail else "") + line + "\n")
+                self._torn_tail = False
+                self._values[key] = json.loads(line)['value']  # Same shape as after a reload
+                self._lines += 1
+            except (OSError, TypeError, ValueError) as e:
+                logger.error(f"Error saving state '{key}': {e}")
+                return
+            if self._needs_compaction():
+                self.compact()
+
+    def compact(self):
+        """Rewrite the log with one line per key"""
+        with self._lock:
+            temp_path = self.path + ".tmp"
+            try:
+                now = round(time.time(), 3)
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    for key, value in self._values.items():
+                        f.write(json.dumps({'key': key, 'value': value, 'ts': now},
+                                           ensure_ascii=False, sort_keys=True) + "\n")
+                os.replace(temp_path, self.path)
+                self._lines = len(self._values)
+                self._torn_tail = False
+            except OSError as e:
+                logger.error(f"Error compacting state: {e}")
+
+
+def scoped(key: str) -> str:
+    """Key of the current game instance, unchanged in single-instance mode"""
+    from multi_instance import current_instance
+    instance = current_instance()
+    return f"{instance.name}/{key}" if instance is not None else key
+
+
+state_store = StateStore()
@@ -0,0 +1,65 @@
+"""
+Shared test setup - headless pyautogui through the replay driver and a fake wall clock
+"""
+import os
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import replay
+
+
+def _blank_frames_dir(width: int = 8, height: int = 8) -> str:
+    directory = tempfile.mkdtemp(prefix="rok_tests_")
+    cv2.imwrite(os.path.join(directory, "000.png"), np.zeros((height, width, 3), np.uint8))
+    return directory
+
+
+# pyautogui must be replaced before bot_utils is first imported (no display here);
+# uninstall keeps the stand-in module and restores the real clock
+replay.install(replay.ReplayDriver(_blank_frames_dir()))
+replay.uninstall()
+
+
+class FakeClock:
+    """time.time stand-in that only moves when told to"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(time, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def screen(tmp_path):
+    """Show a BGR image as the whole screen, returns a function taking the image"""
+    import bot_utils
+
+    def show(image: np.ndarray):
+        frames_dir = tmp_path / "frames"
+        frames_dir.mkdir(exist_ok=True)
+        cv2.imwrite(str(frames_dir / "000.png"), image)
+        replay.install(replay.ReplayDriver(str(frames_dir)))
+        bot_utils.invalidate_frame()
+        return bot_utils.get_frame()
+
+    yield show
+    replay.uninstall()
+    bot_utils.invalidate_frame()
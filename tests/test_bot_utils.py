@@ -0,0 +1,88 @@
+"""
+Template cache and multi-match detection
+"""
+import os
+import cv2
+import numpy as np
+import bot_utils
+from bot_utils import TemplateCache
+
+
+def _pattern(seed: int, size: int = 20) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (size, size), dtype=np.uint8)
+
+
+def test_template_cache_reloads_when_the_file_changes(tmp_path):
+    path = str(tmp_path / "button.png")
+    cv2.imwrite(path, _pattern(1))
+    cache = TemplateCache(recheck_interval=0.0)
+    first = cache.get(path)
+    assert cache.get(path) is first  # Same mtime, same decoded array
+
+    cv2.imwrite(path, _pattern(2))
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    reloaded = cache.get(path)
+    assert reloaded is not first
+    assert np.array_equal(reloaded, _pattern(2))
+
+
+def test_template_cache_missing_file_is_none(tmp_path):
+    assert TemplateCache().get(str(tmp_path / "missing.png")) is None
+
+
+def test_set_scale_resizes_and_keeps_cached_templates(tmp_path):
+    paths = [str(tmp_path / f"t{index}.png") for index in range(3)]
+    for index, path in enumerate(paths):
+        cv2.imwrite(path, _pattern(index))
+    cache = TemplateCache()
+    assert cache.preload(paths) == []
+
+    cache.set_scale(1.5)
+    assert len(cache) == 3  # Decoded again at the new scale, not dropped
+    assert cache._entries[paths[0]][0].shape == (30, 30)
+
+    cache.set_scale(1.0)
+    assert np.array_equal(cache.get(paths[0]), _pattern(0))
+
+
+def _scene(positions, template: np.ndarray) -> np.ndarray:
+    gray = np.random.default_rng(7).integers(0, 256, (200, 300), dtype=np.uint8)
+    h, w = template.shape
+    for x, y in positions:
+        gray[y:y + h, x:x + w] = template
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def test_all_matches_returns_one_match_per_copy(tmp_path, screen):
+    template = _pattern(3)
+    path = str(tmp_path / "icon.png")
+    cv2.imwrite(path, template)
+    positions = [(10, 15), (120, 40), (250, 150)]
+    frame = screen(_scene(positions, template))
+
+    matches = bot_utils.locate_all(path, 0.9, frame=frame)
+    assert sorted((match.left, match.top) for match in matches) == sorted(positions)
+    assert all(match.score > 0.99 and (match.width, match.height) == (20, 20) for match in matches)
+
+
+def test_all_matches_is_best_first_and_capped(tmp_path, screen):
+    template = _pattern(4)
+    path = str(tmp_path / "icon.png")
+    cv2.imwrite(path, template)
+    faded = (template * 0.6).astype(np.uint8) + 40
+    image = _scene([(10, 15), (120, 40)], template)
+    image[100:120, 200:220] = cv2.cvtColor(faded, cv2.COLOR_GRAY2BGR)
+    frame = screen(image)
+
+    matches = bot_utils._all_matches(frame, path, 0.5, max_matches=2)
+    assert len(matches) == 2
+    assert matches[0].score >= matches[1].score
+    assert (200, 100) not in [(match.left, match.top) for match in matches]
+
+
+def test_all_matches_nothing_above_confidence(tmp_path, screen):
+    path = str(tmp_path / "icon.png")
+    cv2.imwrite(path, _pattern(5))
+    frame = screen(_scene([], _pattern(6)))
+    assert bot_utils.locate_all(path, 0.9, frame=frame) == []
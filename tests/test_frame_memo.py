@@ -0,0 +1,69 @@
+"""
+Frame signatures and the match memo
+"""
+import numpy as np
+from frame_memo import Config, MatchMemo, fingerprint
+
+
+def _frame(height: int = 64, width: int = 96) -> np.ndarray:
+    return np.random.default_rng(0).integers(0, 256, (height, width), dtype=np.uint8)
+
+
+def test_fingerprint_is_block_means():
+    gray = _frame()
+    signature = fingerprint(gray, cell_size=16)
+    assert signature.shape == (4, 6)
+    assert abs(int(signature[1, 2]) - gray[16:32, 32:48].mean()) <= 1
+
+
+def test_fingerprint_covers_partial_edge_cells():
+    gray = _frame(70, 100)
+    signature = fingerprint(gray, cell_size=16)
+    assert signature.shape == (5, 7)
+    assert abs(int(signature[-1, -1]) - gray[-16:, -16:].mean()) <= 1
+
+
+def test_fingerprint_of_a_tiny_frame_is_none():
+    assert fingerprint(_frame(8, 100), cell_size=16) is None
+
+
+def test_memo_hits_while_the_searched_area_is_unchanged():
+    memo, gray, template = MatchMemo(), _frame(), np.zeros((8, 8), np.uint8)
+    region = (0, 0, 32, 32)
+    memo.put(("slot", "t.png"), template, fingerprint(gray), gray.shape, region, "match")
+
+    changed_elsewhere = gray.copy()
+    changed_elsewhere[40:, 60:] = 255
+    assert memo.get(("slot", "t.png"), template, fingerprint(changed_elsewhere), gray.shape) == "match"
+
+    changed_inside = gray.copy()
+    changed_inside[:16, :16] = 255
+    assert memo.get(("slot", "t.png"), template, fingerprint(changed_inside), gray.shape) is None
+
+
+def test_memo_tolerates_small_brightness_noise():
+    memo, gray, template = MatchMemo(), _frame(), np.zeros((8, 8), np.uint8)
+    signature = fingerprint(gray)
+    memo.put("key", template, signature, gray.shape, None, "match")
+
+    assert memo.get("key", template, signature + Config.TOLERANCE, gray.shape) == "match"
+    assert memo.get("key", template, signature + Config.TOLERANCE + 1, gray.shape) is None
+
+
+def test_memo_misses_after_template_reload_or_resize():
+    memo, gray, template = MatchMemo(), _frame(), np.zeros((8, 8), np.uint8)
+    signature = fingerprint(gray)
+    memo.put("key", template, signature, gray.shape, None, "match")
+
+    assert memo.get("key", template.copy(), signature, gray.shape) is None
+    assert memo.get("key", template, signature, (gray.shape[0], gray.shape[1] + 16)) is None
+    assert memo.get("other", template, signature, gray.shape) is None
+
+
+def test_memo_evicts_least_recently_stored():
+    memo, gray, template = MatchMemo(max_entries=2), _frame(), np.zeros((8, 8), np.uint8)
+    signature = fingerprint(gray)
+    for key in ("a", "b", "c"):
+        memo.put(key, template, signature, gray.shape, None, key)
+    assert memo.get("a", template, signature, gray.shape) is None
+    assert memo.get("c", template, signature, gray.shape) == "c"
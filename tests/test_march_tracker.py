@@ -0,0 +1,59 @@
+"""
+March slot model: dispatch, return and corrections from the screen
+"""
+from sequences.march_tracker import Config, MarchTracker
+
+
+def test_dispatch_fills_slots_until_the_first_return(clock):
+    tracker = MarchTracker(slots=2)
+    tracker.record_dispatch("barbarian", 90)
+    assert not tracker.all_busy()
+    clock.advance(10)
+    tracker.record_dispatch("gather", 1800)
+    assert tracker.all_busy()
+    assert tracker.seconds_until_free() == 80
+
+    clock.advance(80)
+    assert not tracker.all_busy()
+    assert tracker.seconds_until_free() == 0
+    assert [march['kind'] for march in tracker.out()] == ["gather"]
+
+
+def test_dispatch_drops_returned_marches(clock):
+    tracker = MarchTracker(slots=2)
+    tracker.record_dispatch("barbarian", 90)
+    clock.advance(100)
+    tracker.record_dispatch("barbarian", 90)
+    assert len(tracker.marches) == 1
+
+
+def test_observe_out_forgets_marches_back_early(clock):
+    tracker = MarchTracker(slots=4)
+    for duration in (1800, 1200, 600):
+        tracker.record_dispatch("gather", duration)
+    tracker.record_dispatch("barbarian", 90)
+
+    tracker.observe_out("gather", 1)
+    kept = tracker.out()
+    assert sorted(march['returns_at'] - clock.now for march in kept) == [90, 1800]
+    assert not tracker.all_busy()
+
+
+def test_observe_out_full_queue_blocks_for_untracked_marches(clock):
+    tracker = MarchTracker(slots=4)
+    tracker.record_dispatch("gather", 1800)
+    tracker.observe_out("gather", 4)  # Three sent by hand
+    assert tracker.all_busy()
+    assert tracker.seconds_until_free() == Config.BUSY_RECHECK
+
+    tracker.observe_out("gather", 3)
+    assert not tracker.all_busy()
+
+
+def test_observe_all_busy_holds_overdue_marches(clock):
+    tracker = MarchTracker(slots=1)
+    tracker.record_dispatch("barbarian", 90)
+    clock.advance(120)
+    tracker.observe_all_busy()
+    assert tracker.all_busy()
+    assert tracker.seconds_until_free() == Config.LATE_RECHECK
@@ -0,0 +1,64 @@
+"""
+Search regions from hand-written and learned ROI hints
+"""
+import json
+from roi_hints import Config, RoiHints
+
+FRAME = (1000, 500)
+
+
+def _hints(tmp_path, manual: dict, learned: dict = None) -> RoiHints:
+    manifest = tmp_path / "roi.json"
+    manifest.write_text(json.dumps({path: {"rect": rect} for path, rect in manual.items()}))
+    if learned is None:
+        return RoiHints(str(manifest), learned_path=None)
+    learned_path = tmp_path / "roi_learned.json"
+    learned_path.write_text(json.dumps(learned))
+    return RoiHints(str(manifest), str(learned_path))
+
+
+def test_manual_hint_in_pixels(tmp_path):
+    hints = _hints(tmp_path, {"a.png": [0.1, 0.2, 0.3, 0.4]})
+    assert hints.region("a.png", FRAME, (20, 20)) == (100, 100, 300, 200)
+    assert hints.region("unknown.png", FRAME, (20, 20)) is None
+
+
+def test_region_grows_to_fit_the_template_and_stays_inside_the_frame(tmp_path):
+    hints = _hints(tmp_path, {"a.png": [0.98, 0.0, 0.01, 0.01]})
+    assert hints.region("a.png", FRAME, (50, 40)) == (950, 0, 50, 40)
+
+
+def test_whole_frame_region_is_none(tmp_path):
+    hints = _hints(tmp_path, {"a.png": [0.0, 0.0, 1.0, 1.0], "b.png": [0.5, 0.5, 0.1, 0.1]})
+    assert hints.region("a.png", FRAME, (20, 20)) is None
+    assert hints.region("b.png", (40, 30), (40, 30)) is None  # Template as big as the frame
+
+
+def test_learned_hits_tighten_the_manual_hint(tmp_path):
+    manual = {"a.png": [0.0, 0.0, 0.5, 0.5]}
+    learned = {"a.png": {"box": [0.2, 0.2, 0.3, 0.3], "count": Config.LEARN_MIN_HITS}}
+    hints = _hints(tmp_path, manual, learned)
+    margin = Config.LEARN_MARGIN
+    assert hints.region("a.png", FRAME, (10, 10)) == (
+        int((0.2 - margin) * 1000), int((0.2 - margin) * 500),
+        int((0.1 + 2 * margin) * 1000 + 0.5), int((0.1 + 2 * margin) * 500 + 0.5))
+
+
+def test_learned_hits_are_ignored_until_trusted(tmp_path):
+    manual = {"a.png": [0.0, 0.0, 0.5, 0.5]}
+    learned = {"a.png": {"box": [0.2, 0.2, 0.3, 0.3], "count": Config.LEARN_MIN_HITS - 1}}
+    assert _hints(tmp_path, manual, learned).region("a.png", FRAME, (10, 10)) == (0, 0, 500, 250)
+
+
+def test_learned_hits_never_grow_past_the_manual_hint(tmp_path):
+    manual = {"a.png": [0.0, 0.0, 0.5, 0.5]}
+    learned = {"a.png": {"box": [0.7, 0.7, 0.8, 0.8], "count": Config.LEARN_MIN_HITS}}
+    assert _hints(tmp_path, manual, learned).rect("a.png") == (0.0, 0.0, 0.5, 0.5)
+
+
+def test_manual_only_hints_learn_nothing(tmp_path):
+    hints = _hints(tmp_path, {"a.png": [0.0, 0.0, 0.5, 0.5]})
+    for _ in range(Config.LEARN_MIN_HITS):
+        hints.record_hit("a.png", 100, 100, 10, 10, FRAME)
+    assert hints.rect("a.png") == (0.0, 0.0, 0.5, 0.5)
+    assert hints._flusher is None
@@ -0,0 +1,68 @@
+"""
+Deadline-aware activity selection and schedule persistence
+"""
+from enum import Enum
+from scheduler import ActivityScheduler
+
+
+class Activity(Enum):
+    FOG = "fog"
+    BARBARIAN = "barbarian"
+    TROOPS = "troops"
+
+
+def test_ready_activities_run_in_declaration_order(clock):
+    scheduler = ActivityScheduler(list(Activity))
+    assert scheduler.next_activity() == (Activity.FOG, 0.0)
+
+
+def test_least_recently_run_wins_a_tie(clock):
+    scheduler = ActivityScheduler(list(Activity))
+    scheduler.record_run(Activity.FOG)
+    clock.advance(1)
+    scheduler.record_run(Activity.BARBARIAN)
+    assert scheduler.next_activity() == (Activity.TROOPS, 0.0)
+    clock.advance(1)
+    scheduler.record_run(Activity.TROOPS)
+    assert scheduler.next_activity() == (Activity.FOG, 0.0)
+
+
+def test_earliest_deadline_wins(clock):
+    scheduler = ActivityScheduler(list(Activity))
+    scheduler.defer(Activity.FOG, 300, "scouts out")
+    scheduler.defer(Activity.BARBARIAN, 120, "stamina")
+    scheduler.defer(Activity.TROOPS, 600, "training")
+    assert scheduler.next_activity() == (Activity.BARBARIAN, 120.0)
+
+    clock.advance(400)
+    assert scheduler.next_activity() == (Activity.FOG, 0.0)  # Both overdue, declared first
+    scheduler.defer(Activity.FOG, -5)
+    assert scheduler.ready_in(Activity.FOG) == 0.0
+
+
+def test_snapshot_restores_into_a_new_scheduler(clock):
+    scheduler = ActivityScheduler(list(Activity))
+    scheduler.defer(Activity.TROOPS, 600, "training")
+    scheduler.record_run(Activity.FOG)
+    scheduler.record_success(Activity.FOG)
+
+    restored = ActivityScheduler(list(Activity))
+    restored.restore(scheduler.snapshot())
+    assert restored.snapshot() == scheduler.snapshot()
+    assert restored.reasons[Activity.TROOPS] == "training"
+    assert restored.next_activity() == (Activity.BARBARIAN, 0.0)
+
+
+def test_restore_ignores_removed_activities_and_bad_data(clock):
+    scheduler = ActivityScheduler(list(Activity))
+    scheduler.defer(Activity.FOG, 60)
+    data = scheduler.snapshot()
+    data['activities']['retired'] = {'ready_at': 1.0}
+
+    restored = ActivityScheduler([Activity.FOG, Activity.TROOPS])
+    restored.restore(data)
+    assert restored.ready_in(Activity.FOG) == 60.0
+
+    restored.restore(None)
+    restored.restore({'activities': {'fog': {'ready_at': "soon"}}})
+    assert restored.ready_in(Activity.FOG) == 60.0
@@ -0,0 +1,55 @@
+"""
+Stamina model: regeneration between readings and the wait until the next attack
+"""
+from sequences.stamina_tracker import Config, StaminaTracker
+
+
+def test_prediction_regenerates_from_the_last_reading(clock):
+    tracker = StaminaTracker(min_stamina=200)
+    assert tracker.predict() is None
+    tracker.observe(300)
+    clock.advance(Config.REGEN_SECONDS * 10)
+    assert tracker.predict() == 310
+
+
+def test_prediction_stops_at_the_cap(clock):
+    tracker = StaminaTracker(min_stamina=200)
+    tracker.observe(Config.MAX_STAMINA - 5)
+    clock.advance(Config.REGEN_SECONDS * 100)
+    assert tracker.predict() == Config.MAX_STAMINA
+
+    tracker.observe(Config.MAX_STAMINA + 300)  # Potions go above the cap
+    clock.advance(Config.REGEN_SECONDS * 100)
+    assert tracker.predict() == Config.MAX_STAMINA + 300
+
+
+def test_attacks_spend_from_the_prediction(clock):
+    tracker = StaminaTracker(min_stamina=200)
+    tracker.observe(400)
+    clock.advance(Config.REGEN_SECONDS * 20)
+    tracker.record_attack(50)
+    assert tracker.predict() == 370
+    clock.advance(Config.REGEN_SECONDS * 5)
+    assert tracker.predict() == 375
+
+
+def test_wait_until_attack(clock):
+    tracker = StaminaTracker(min_stamina=200)
+    assert tracker.seconds_until_attack() == Config.DEFAULT_RECOVERY
+    tracker.observe(150)
+    assert tracker.seconds_until_attack() == 51 * Config.REGEN_SECONDS
+    clock.advance(51 * Config.REGEN_SECONDS)
+    assert tracker.seconds_until_attack() == 0
+
+
+def test_needs_reading_near_the_threshold_or_when_stale(clock):
+    tracker = StaminaTracker(min_stamina=200)
+    assert tracker.needs_reading()
+    tracker.observe(1000)
+    assert not tracker.needs_reading()
+    tracker.observe(200 + Config.REREAD_MARGIN)
+    assert tracker.needs_reading()
+
+    tracker.observe(1000)
+    clock.advance(Config.MAX_PREDICTION_AGE + 1)
+    assert tracker.needs_reading()
@@ -0,0 +1,78 @@
+"""
+Append-only state log: compaction and recovery from torn writes
+"""
+import json
+from state_store import Config, StateStore
+
+
+def _lines(path) -> list:
+    with open(path, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def test_values_survive_a_reload(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    store = StateStore(path)
+    store.put("march", {"kind": "gather", "until": 12.5})
+    store.put("stamina", 900)
+    store.put("stamina", 900)  # Unchanged, not appended
+
+    assert len(_lines(path)) == 2
+    reloaded = StateStore(path)
+    assert reloaded.get("march") == {"kind": "gather", "until": 12.5}
+    assert reloaded.get("stamina") == 900
+    assert reloaded.get("missing", "default") == "default"
+
+
+def test_put_compacts_a_growing_log(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    store = StateStore(path)
+    for value in range(Config.COMPACT_MIN_LINES * 3):
+        store.put("counter", value)
+        store.put("other", -value)
+
+    assert store._lines <= Config.COMPACT_MIN_LINES
+    assert len(_lines(path)) == store._lines
+    reloaded = StateStore(path)
+    assert reloaded.get("counter") == Config.COMPACT_MIN_LINES * 3 - 1
+    assert reloaded.get("other") == -(Config.COMPACT_MIN_LINES * 3 - 1)
+
+
+def test_load_compacts_an_oversized_log(tmp_path):
+    path = tmp_path / "state.jsonl"
+    with open(path, 'w', encoding='utf-8') as f:
+        for value in range(Config.COMPACT_MIN_LINES + 1):
+            f.write(json.dumps({'key': "counter", 'value': value, 'ts': 0}) + "\n")
+
+    store = StateStore(str(path))
+    lines = _lines(path)
+    assert len(lines) == store._lines == 1
+    assert json.loads(lines[0])['value'] == Config.COMPACT_MIN_LINES
+
+
+def test_torn_tail_is_skipped_and_does_not_swallow_the_next_put(tmp_path):
+    path = tmp_path / "state.jsonl"
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'key': "kept", 'value': 1, 'ts': 0}) + "\n")
+        f.write('{"key": "lost", "val')  # Crash mid-write
+
+    store = StateStore(str(path))
+    assert store.get("kept") == 1 and store.get("lost") is None
+    assert store._torn_tail
+
+    store.put("after", 2)
+    reloaded = StateStore(str(path))
+    assert reloaded.get("kept") == 1
+    assert reloaded.get("after") == 2
+    assert not reloaded._torn_tail
+
+
+def test_reopen_switches_logs(tmp_path):
+    live, scratch = str(tmp_path / "live.jsonl"), str(tmp_path / "scratch.jsonl")
+    store = StateStore(live)
+    store.put("key", "live")
+    store.reopen(scratch)
+    assert store.get("key") is None
+    store.put("key", "scratch")
+    store.reopen(live)
+    assert store.get("key") == "live"
@@ -0,0 +1,25 @@
+"""
+Training countdown parsing
+"""
+import pytest
+from sequences.training_timers import Config, parse_countdown
+
+
+@pytest.mark.parametrize("text, seconds", [
+    ("13:45", 13 * 60 + 45),
+    ("02:13:45", 2 * 3600 + 13 * 60 + 45),
+    ("1d 02:13:45", 86400 + 2 * 3600 + 13 * 60 + 45),
+    ("Time: 0 2 : 1 3 : 4 5", 2 * 3600 + 13 * 60 + 45),  # OCR spacing
+])
+def test_parse_countdown(text, seconds):
+    assert parse_countdown(text) == seconds
+
+
+@pytest.mark.parametrize("text", ["", "Train", "00:00", "12:60", "01:75:00"])
+def test_parse_countdown_rejects_misreads(text):
+    assert parse_countdown(text) is None
+
+
+def test_parse_countdown_rejects_implausible_lengths():
+    days = Config.MAX_SECONDS // 86400 + 1
+    assert parse_countdown(f"{days}d 00:00:01") is None
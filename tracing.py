@@ -0,0 +1,182 @@
+"""
+Tracing - opt-in spans exported as Chrome trace-event JSON
+
+Set ROK_TRACE=1 (or call enable()) and every cycle is written to
+logs/traces/ as one JSON file per game instance; open it in chrome://tracing or
+https://ui.perfetto.dev to see captures, template matches, OCR, mouse
+moves, clicks and sleeps nested under their step, activity and cycle.
+
+When tracing is off, span() returns a shared no-op context manager, so an
+instrumented call costs one global lookup.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from bot_log import get_logger
+from multi_instance import current_instance
+
+logger = get_logger("tracing")
+
+
+class Config:
+    """Tracing configuration constants"""
+    ENABLED = os.environ.get("ROK_TRACE", "") not in ("", "0")
+    TRACE_DIR = "logs/traces"
+    MAX_FILES = 200  # Oldest cycle traces are deleted beyond this
+    MAX_EVENTS = 200000  # Buffered events kept when nothing exports them
+
+
+_enabled = False
+_events: List[Tuple[Optional[str], Dict[str, Any]]] = []  # (instance name, event)
+_lock = threading.Lock()
+_origin = 0.0
+_real_sleep: Optional[Callable[[float], None]] = None
+_exports = 0
+
+
+class _Span:
+    """Complete ("X") event measured from enter to exit"""
+    __slots__ = ('name', 'cat', 'args', 'start')
+
+    def __init__(self, name: str, cat: str, args: Dict[str, Any]):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        event = {
+            'name': self.name, 'cat': self.cat, 'ph': 'X',
+            'ts': (self.start - _origin) * 1e6, 'dur': (end - self.start) * 1e6,
+            'pid': os.getpid(), 'tid': threading.get_ident()
+        }
+        if self.args:
+            event['args'] = self.args
+        instance = current_instance()
+        with _lock:
+            if len(_events) < Config.MAX_EVENTS:
+                _events.append((instance.name if instance is not None else None, event))
+        return False
+
+
+class _NullSpan:
+    """Span that records nothing"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, cat: str = "bot", **args):
+    """Context manager timing a block as one trace event"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, cat, args)
+
+
+def traced(name: str, cat: str = "bot"):
+    """Decorator recording each call of a function as a span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name, cat, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _traced_sleep(seconds: float):
+    with _Span("sleep", "sleep", {'seconds': round(seconds, 3)}):
+        _real_sleep(seconds)
+
+
+def is_enabled() -> bool:
+    """True while spans are being recorded"""
+    return _enabled
+
+
+def enable():
+    """Start recording, time.sleep calls included"""
+    global _enabled, _origin, _real_sleep
+    if _enabled:
+        return
+    _origin = time.perf_counter()
+    _real_sleep = time.sleep  # Whatever is installed now, e.g. the replay clock
+    time.sleep = _traced_sleep
+    _enabled = True
+    logger.info(f"Tracing enabled, cycles are written to {Config.TRACE_DIR}")
+
+
+def disable():
+    """Stop recording and restore time.sleep"""
+    global _enabled
+    if not _enabled:
+        return
+    _enabled = False
+    if time.sleep is _traced_sleep:
+        time.sleep = _real_sleep
+
+
+def export(label: str = "trace", path: Optional[str] = None) -> Optional[str]:
+    """Write and clear the calling instance's events since its last export, returns the file path"""
+    global _events, _exports
+    if not _enabled:
+        return None
+    instance = current_instance()
+    name = instance.name if instance is not None else None
+    with _lock:
+        events = [event for owner, event in _events if owner == name]
+        _events = [(owner, event) for owner, event in _events if owner != name]
+    if not events:
+        return None
+
+    threads = {thread.ident: thread.name for thread in threading.enumerate()}
+    metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+                 'args': {'name': threads.get(tid, str(tid))}}
+                for tid in {event['tid'] for event in events}]
+    if path is None:
+        if name is not None:
+            label = f"{name}_{label}"
+        safe_label = "".join(c if c.isalnum() or c in "-_" else "_" for c in label)
+        _exports += 1
+        path = os.path.join(Config.TRACE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{_exports:05d}_{safe_label}.json")
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f)
+        _prune(os.path.dirname(path) or ".")
+        return path
+    except OSError as e:
+        logger.error(f"Error writing trace: {e}")
+        return None
+
+
+def _prune(directory: str):
+    """Keep the newest MAX_FILES traces"""
+    try:
+        files = sorted(f for f in os.listdir(directory) if f.endswith(".json"))
+        for name in files[:-Config.MAX_FILES]:
+            os.remove(os.path.join(directory, name))
+    except OSError:
+        pass
+
+
+if Config.ENABLED:
+    enable()
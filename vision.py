@@ -0,0 +1,169 @@
+"""
+Vision backends - one detection interface for every sequence
+"""
+import time
+import statistics
+import pyautogui
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bot_utils import (Config, Match, invalidate_frame, locate_all, locate_template, match_all_templates,
+                       match_templates)
+from metrics import record_match
+
+
+class Vision:
+    """Template detection interface shared by all sequences"""
+    name = "base"
+
+    def find(self, image_path: str, confidence: float = Config.ACCURACY_THRESHOLD) -> Optional[Match]:
+        """Best match of template on screen or None"""
+        raise NotImplementedError
+
+    def find_all(self, image_path: str, confidence: float = Config.ACCURACY_THRESHOLD) -> List[Match]:
+        """Every location scoring above confidence"""
+        raise NotImplementedError
+
+    def find_many(self, probes: Dict[str, float]) -> Dict[str, Optional[Match]]:
+        """Best match per template (path -> confidence), None when below its threshold"""
+        return {image_path: self.find(image_path, confidence) for image_path, confidence in probes.items()}
+
+    def find_all_many(self, probes: Dict[str, float]) -> Dict[str, List[Match]]:
+        """Every location per template (path -> confidence)"""
+        return {image_path: self.find_all(image_path, confidence) for image_path, confidence in probes.items()}
+
+    def count_many(self, probes: Dict[str, float]) -> Dict[str, int]:
+        """Number of visible copies per template (path -> confidence)"""
+        return {image_path: len(matches) for image_path, matches in self.find_all_many(probes).items()}
+
+    def exists(self, image_path: str, confidence: float = Config.ACCURACY_THRESHOLD) -> bool:
+        """Check if template is visible"""
+        return self.find(image_path, confidence) is not None
+
+    def wait_for(self, image_path: str, timeout: float, poll_interval: float = 0.25,
+                 confidence: float = Config.ACCURACY_THRESHOLD) -> Optional[Match]:
+        """Poll until template appears or timeout expires"""
+        deadline = time.monotonic() + timeout
+        while True:
+            match = self.find(image_path, confidence)
+            if match is not None:
+                return match
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(poll_interval, remaining))
+            invalidate_frame()
+
+    def wait_for_any(self, probes: Dict[str, float], timeout: float,
+                     poll_interval: float = 0.25) -> Optional[Tuple[str, Match]]:
+        """Poll until any template appears, return (path, match) of the best one"""
+        deadline = time.monotonic() + timeout
+        while True:
+            found = [(path, match) for path, match in self.find_many(probes).items() if match is not None]
+            if found:
+                return max(found, key=lambda item: item[1].score)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(poll_interval, remaining))
+            invalidate_frame()
+
+
+class OpenCVVision(Vision):
+    """Cached templates + shared frame + cv2.matchTemplate"""
+    name = "opencv"
+
+    def find(self, image_path: str, confidence: float = Config.ACCURACY_THRESHOLD) -> Optional[Match]:
+        return locate_template(image_path, confidence)
+
+    def find_all(self, image_path: str, confidence: float = Config.ACCURACY_THRESHOLD) -> List[Match]:
+        return locate_all(image_path, confidence)
+
+    def find_many(self, probes: Dict[str, float]) -> Dict[str, Optional[Match]]:
+        best = match_templates(probes, confidences=probes)
+        return {
+            image_path: match if match is not None and match.score > probes[image_path] else None
+            for image_path, match in best.items()
+        }
+
+    def find_all_many(self, probes: Dict[str, float]) -> Dict[str, List[Match]]:
+        return match_all_templates(probes)
+
+
+class PyAutoGUIVision(Vision):
+    """pyautogui.locateOnScreen - re-reads the PNG and re-captures per call
+
+    locateOnScreen reports no score, only whether the threshold was cleared,
+    so matches carry the requested confidence as a lower bound on their
+    score. Metrics get no score from this backend.
+    """
+    name = "pyautogui"
+
+    def find(self, image_path: str, confidence: float = Config.ACCURACY_THRESHOLD) -> Optional[Match]:
+        start = time.perf_counter()
+        try:
+            box = pyautogui.locateOnScreen(image_path, confidence=confidence)
+        except pyautogui.ImageNotFoundException:
+            box = None
+        record_match(image_path, None, (time.perf_counter() - start) * 1000, box is not None)
+        if box is None:
+            return None
+        return Match(box.left, box.top, box.width, box.height, confidence)  # Score unknown, at least confidence
+
+    def find_all(self, image_path: str, confidence: float = Config.ACCURACY_THRESHOLD) -> List[Match]:
+        try:
+            boxes = pyautogui.locateAllOnScreen(image_path, confidence=confidence)
+            return [Match(box.left, box.top, box.width, box.height, confidence) for box in boxes]
+        except pyautogui.ImageNotFoundException:
+            return []
+
+
+_vision: Vision = OpenCVVision()
+
+
+def get_vision() -> Vision:
+    """Get active vision backend"""
+    return _vision
+
+
+def set_vision(vision: Vision):
+    """Swap active vision backend"""
+    global _vision
+    _vision = vision
+
+
+def measure_latency(backends: Iterable[Vision], image_paths: Iterable[str],
+                    iterations: int = 5) -> Dict[str, Dict[str, float]]:
+    """Median find() latency in ms per backend, capture included"""
+    image_paths = list(image_paths)
+    results = {}
+    for backend in backends:
+        timings = []
+        for _ in range(iterations):
+            for image_path in image_paths:
+                invalidate_frame()
+                start = time.perf_counter()
+                backend.find(image_path)
+                timings.append((time.perf_counter() - start) * 1000)
+        results[backend.name] = {
+            'median_ms': statistics.median(timings) if timings else 0.0,
+            'max_ms': max(timings) if timings else 0.0,
+            'calls': len(timings)
+        }
+    return results
+
+
+def main():
+    """Compare backend latency on the live screen"""
+    import sys
+    image_paths = sys.argv[1:]
+    if not image_paths:
+        from sequences import collect_asset_paths
+        image_paths = sorted(set(collect_asset_paths()))
+
+    results = measure_latency([OpenCVVision(), PyAutoGUIVision()], image_paths)
+    for name, stats in results.items():
+        print(f"{name:<10} median {stats['median_ms']:7.1f} ms  max {stats['max_ms']:7.1f} ms  ({stats['calls']} calls)")
+
+
+if __name__ == "__main__":
+    main()